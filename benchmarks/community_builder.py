@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Time building community models of N copies of a GEM.
+
+The sparse builder (GEM.from_community) is compared with a naive merge that
+copies each member's reactions with suffixed IDs and adds them one member at
+a time with cobra's add_reactions (only run for small communities). Solving
+the community with GLPK takes far longer than building it for large
+communities, so it is only timed with --solve.
+
+Usage:
+    python benchmarks/community_builder.py --model data/models/iSO595v7.xml
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+from cobra import Model
+
+from phycogem.reconstruction import GEM
+
+this_file_dir = Path(__file__).parent
+
+
+def naive_merge(gem: GEM, n_members: int) -> Model:
+    """Merge member copies reaction by reaction, keeping a shared "e" pool."""
+    community = Model("community")
+    for i in range(n_members):
+        member = gem.model.copy()
+        suffix = f"_m{i}"
+        for met in member.metabolites:
+            if met.compartment != "e":
+                met.id += suffix
+        for rxn in member.reactions:
+            if not (rxn.boundary and rxn.compartments == {"e"}):
+                rxn.id += suffix
+        member.repair()
+        community.add_reactions(
+            [rxn for rxn in member.reactions if rxn.id not in community.reactions]
+        )
+    return community
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--model", type=Path, default=this_file_dir.parent / "data/models/iSO595v7.xml"
+    )
+    parser.add_argument("--members", type=int, nargs="+", default=[4, 20, 100])
+    parser.add_argument("--naive-max", type=int, default=4)
+    parser.add_argument("--solve", action="store_true")
+    args = parser.parse_args()
+
+    gem = GEM(args.model)
+    results = []
+    for n_members in args.members:
+        start = time.perf_counter()
+        community = GEM.from_community({f"m{i}": gem for i in range(n_members)}).model
+        build_time = time.perf_counter() - start
+        growth, solve_time = None, None
+        if args.solve:
+            start = time.perf_counter()
+            growth = community.slim_optimize()
+            solve_time = time.perf_counter() - start
+        naive_time = None
+        if n_members <= args.naive_max:
+            start = time.perf_counter()
+            naive_merge(gem, n_members)
+            naive_time = time.perf_counter() - start
+        results.append(
+            {
+                "members": n_members,
+                "reactions": len(community.reactions),
+                "metabolites": len(community.metabolites),
+                "build_seconds": build_time,
+                "naive_seconds": naive_time,
+                "solve_seconds": solve_time,
+                "growth": growth,
+            }
+        )
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare convergence per CPU-second of flux samplers (ACHR, OptGP and CHRR).
+
+Convergence is measured as the effective sample size (ESS) of each reaction's
+flux trace, estimated from its autocorrelation. The median ESS across
+non-fixed reactions is divided by the CPU time (including child processes)
+spent sampling.
+
+Usage:
+    python benchmarks/sampling_convergence.py --model data/models/iSO595v7.xml
+"""
+
+import argparse
+import resource
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from phycogem.reconstruction import GEM
+from phycogem.sampling import CHRRSampler, get_sampler
+
+this_file_dir = Path(__file__).parent
+
+
+def cpu_time() -> float:
+    """Return CPU time used by this process and its finished children."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def effective_sample_size(chain: np.ndarray) -> np.ndarray:
+    """Estimate the effective sample size of each column of a chain.
+
+    Uses the initial positive sequence of autocorrelations (Geyer, 1992).
+
+    Args:
+        chain (np.ndarray): steps x variables array of a single chain.
+
+    Returns:
+        np.ndarray: effective sample size of each variable.
+    """
+    n = chain.shape[0]
+    centered = chain - chain.mean(axis=0)
+    spectrum = np.fft.rfft(centered, n=2 * n, axis=0)
+    autocovariance = np.fft.irfft(spectrum * np.conj(spectrum), axis=0)[:n]
+    variance = autocovariance[0]
+    ess = np.full(chain.shape[1], np.nan)
+    for j in np.flatnonzero(variance > 1e-12):
+        rho = autocovariance[:, j] / variance[j]
+        pair_sums = rho[1:-1:2] + rho[2::2]
+        negative = np.flatnonzero(pair_sums < 0)
+        cutoff = negative[0] if len(negative) > 0 else len(pair_sums)
+        tau = -1 + 2 * (rho[0] + rho[1 : 2 * cutoff + 1].sum()) if cutoff else 1
+        ess[j] = n / max(tau, 1.0)
+    return ess
+
+
+def benchmark_method(
+    gem: GEM, method: str, n_samples: int, thinning: int, seed: int, n_chains: int
+) -> dict:
+    """Sample with a given method and measure ESS per CPU-second."""
+    start_cpu, start_wall = cpu_time(), time.perf_counter()
+    if method == "chrr":
+        sampler = CHRRSampler(
+            gem.model, thinning=thinning, n_chains=n_chains, seed=seed
+        )
+    else:
+        sampler = get_sampler(gem.model, method, thinning=thinning, seed=seed)
+    setup_cpu = cpu_time() - start_cpu
+    samples = sampler.sample(n_samples)
+    sampling_cpu = cpu_time() - start_cpu - setup_cpu
+    wall_time = time.perf_counter() - start_wall
+    if method == "chrr":
+        chains = samples.to_numpy().reshape(-1, sampler.n_chains, samples.shape[1])
+        ess = np.nansum(
+            [effective_sample_size(chains[:, c]) for c in range(chains.shape[1])],
+            axis=0,
+        )
+    else:
+        ess = effective_sample_size(samples.to_numpy())
+    median_ess = float(np.nanmedian(ess))
+    return {
+        "method": method,
+        "n_samples": n_samples,
+        "setup_cpu_s": setup_cpu,
+        "sampling_cpu_s": sampling_cpu,
+        "wall_s": wall_time,
+        "median_ess": median_ess,
+        "ess_per_cpu_s": median_ess / (setup_cpu + sampling_cpu),
+        "ess_per_sampling_cpu_s": median_ess / sampling_cpu,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--model",
+        type=Path,
+        default=this_file_dir.parent / "data" / "models" / "iSO595v7.xml",
+    )
+    parser.add_argument("--n-samples", type=int, default=2000)
+    parser.add_argument("--thinning", type=int, default=100)
+    parser.add_argument("--methods", nargs="+", default=["achr", "optgp", "chrr"])
+    parser.add_argument(
+        "--chrr-chains",
+        type=int,
+        default=10,
+        help="CHRR chains; keep samples per chain large enough to estimate ESS",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    gem = GEM(args.model)
+    results = pd.DataFrame(
+        [
+            benchmark_method(
+                gem,
+                method,
+                args.n_samples,
+                args.thinning,
+                args.seed,
+                args.chrr_chains,
+            )
+            for method in args.methods
+        ]
+    )
+    print(results.to_string(index=False, float_format="{:.3f}".format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark GEM operations and flag performance regressions.
+
+Every public GEM method is run on the shipped model (iSO595v7) and on
+synthetic models scaled up from it (see make_synthetic_model), besides
+get_graph_object_from_smetana_table on synthetic tables of increasing size
+and rename_rxn_ids_for_escher on synthetic flux samples. Each case is timed
+(best wall time of --repeat runs, on a fresh copy of the model) and its peak
+memory is measured with tracemalloc in a separate run.
+
+Results are appended to a JSON lines history, one record per case, tagged
+with a run ID and the git commit. The compare command flags cases that got
+slower (or used more memory) than in a baseline run by more than a threshold.
+
+Usage:
+    python benchmarks/suite.py run --scales 1 4
+    python benchmarks/suite.py compare --baseline <run ID or commit>
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from cobra import Model
+
+from phycogem.community import merge_models
+from phycogem.reconstruction import GEM
+from phycogem.visualization import (
+    get_graph_object_from_smetana_table,
+    rename_rxn_ids_for_escher,
+)
+
+this_file_dir = Path(__file__).parent
+repo_dir = this_file_dir.parent
+model_file = repo_dir / "data" / "models" / "iSO595v7.xml"
+media_file = repo_dir / "data" / "marine_media" / "media_db.tsv"
+compounds_file = repo_dir / "data" / "compounds" / "mnx_compounds.tsv"
+history_file = this_file_dir / "results" / "history.jsonl"
+
+
+def make_synthetic_model(model: Model, scale: int) -> Model:
+    """Scale up a model by merging copies of it.
+
+    Copies share the extracellular compartment and exchange reactions, every
+    other metabolite and reaction is duplicated (see community.merge_models).
+
+    Args:
+        model (Model): cobra model.
+        scale (int): number of copies.
+
+    Returns:
+        Model: synthetic model, about scale times larger.
+    """
+    return merge_models(
+        {f"s{i}": model for i in range(scale)}, model_id=f"{model.id}x{scale}"
+    )
+
+
+def make_smetana_table(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Make a synthetic smetana detailed table.
+
+    Args:
+        n_rows (int): number of rows.
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: table with donor, receiver, compound and smetana columns.
+    """
+    rng = np.random.default_rng(seed)
+    n_models, n_compounds = max(2, int(np.sqrt(n_rows) / 2)), max(1, n_rows // 20)
+    return pd.DataFrame(
+        {
+            "donor": np.char.add(
+                "mag", rng.integers(n_models, size=n_rows).astype(str)
+            ),
+            "receiver": np.char.add(
+                "mag", rng.integers(n_models, size=n_rows).astype(str)
+            ),
+            "compound": np.char.add(
+                "cpd", rng.integers(n_compounds, size=n_rows).astype(str)
+            ),
+            "smetana": rng.random(n_rows),
+        }
+    )
+
+
+def _first_metabolite(gem: GEM, compartment: str) -> str:
+    return next(
+        met.id for met in gem.model.metabolites if met.compartment == compartment
+    )
+
+
+GEM_CASES = {
+    "__init__": lambda gem, files: GEM(files["model"]),
+    "from_model": lambda gem, files: GEM.from_model(gem.model),
+    "from_community": lambda gem, files: GEM.from_community({"a": gem, "b": gem}),
+    "write": lambda gem, files: gem.write(files["tmp_dir"] / "model.xml"),
+    "stoichiometry": lambda gem, files: gem.stoichiometry,
+    "remove_shuttle_reactions": lambda gem, files: gem.remove_shuttle_reactions(),
+    "move_reactions_to_cytoplasm": lambda gem, files: (
+        gem.move_reactions_to_cytoplasm()
+    ),
+    "annotate_compounds": lambda gem, files: gem.annotate_compounds(compounds_file),
+    "prepare_for_carveme": lambda gem, files: gem.prepare_for_carveme(
+        files["tmp_dir"] / "reactions.csv"
+    ),
+    "curate_universe": lambda gem, files: gem.curate_universe(
+        compounds_file, files["tmp_dir"] / "universe.csv"
+    ),
+    "set_bounds": lambda gem, files: gem.set_bounds(
+        gem.model.reactions, lower_bounds=-10, upper_bounds=10
+    ),
+    "open_exchanges": lambda gem, files: gem.open_exchanges(),
+    "close_exchanges": lambda gem, files: gem.close_exchanges(),
+    "remove_duplicated_reactions": lambda gem, files: (
+        gem.remove_duplicated_reactions(
+            [[rxn.id, None] for rxn in gem.model.reactions[:20]]
+        )
+    ),
+    "get_organic_exchanges": lambda gem, files: gem.get_organic_exchanges(),
+    "get_inorganic_exchanges": lambda gem, files: gem.get_inorganic_exchanges(),
+    "open_inorganic_exchanges": lambda gem, files: gem.open_inorganic_exchanges(),
+    "add_external_metabolite": lambda gem, files: gem.add_external_metabolite(
+        _first_metabolite(gem, "c")
+    ),
+    "add_transport_reaction": lambda gem, files: gem.add_transport_reaction(
+        _first_metabolite(gem, "c"), _first_metabolite(gem, "e")
+    ),
+    "add_exchanges_for_metabolites": lambda gem, files: (
+        gem.add_exchanges_for_metabolites([_first_metabolite(gem, "c")])
+    ),
+    "set_medium": lambda gem, files: gem.set_medium("MARINE", media_file),
+    "rescale_fluxes": lambda gem, files: gem.rescale_fluxes(),
+    "remove_blocked_reactions": lambda gem, files: gem.remove_blocked_reactions(),
+    "scan": lambda gem, files: gem.scan(
+        {gem.model.exchanges[0].id: np.linspace(-10, 0, 20)}
+    ),
+    "compute_flux_ranges": lambda gem, files: gem.compute_flux_ranges(
+        [rxn.id for rxn in gem.model.reactions[:100]]
+    ),
+    "single_gene_deletion": lambda gem, files: gem.single_gene_deletion(),
+    "double_gene_deletion": lambda gem, files: gem.double_gene_deletion(
+        [gene.id for gene in gem.model.genes[:50]]
+    ),
+    "sample_flux_space": lambda gem, files: gem.sample_flux_space(
+        n_samples=100, n_processes=1, method="chrr", seed=0
+    ),
+}
+
+
+def measure(func, setup, repeat: int = 3) -> dict:
+    """Measure best wall time and peak (traced) memory of a function.
+
+    Args:
+        func (Callable): function called with the output of setup.
+        setup (Callable): function returning the argument of func, excluded
+            from measurements.
+        repeat (int, optional): number of timed runs. Defaults to 3.
+
+    Returns:
+        dict: status, seconds, peak_memory_mb and error.
+    """
+    record = {"status": "done", "seconds": None, "peak_memory_mb": None, "error": None}
+    try:
+        times = []
+        for _ in range(repeat):
+            arg = setup()
+            start = time.perf_counter()
+            func(arg)
+            times.append(time.perf_counter() - start)
+        arg = setup()
+        tracemalloc.start()
+        try:
+            func(arg)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+        return record
+    record["seconds"] = min(times)
+    record["peak_memory_mb"] = peak / 1024**2
+    return record
+
+
+def _get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=repo_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    scales: list[int] = (1, 4),
+    table_sizes: list[int] = (1000, 10000, 100000),
+    repeat: int = 3,
+    cases: list[str] = None,
+    output_file: Path = history_file,
+) -> pd.DataFrame:
+    """Run benchmark cases and append results to history.
+
+    Args:
+        scales (list[int], optional): scales of synthetic models, 1 being the
+            shipped model. Defaults to (1, 4).
+        table_sizes (list[int], optional): rows of synthetic smetana tables.
+            Defaults to (1000, 10000, 100000).
+        repeat (int, optional): number of timed runs per case. Defaults to 3.
+        cases (list[str], optional): names of cases to run. Defaults to None
+            (all cases).
+        output_file (Path, optional): JSON lines history file. Defaults to
+            benchmarks/results/history.jsonl.
+
+    Returns:
+        pd.DataFrame: results of this run.
+    """
+    run_info = {
+        "run_id": (
+            f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}"
+            f"-{uuid.uuid4().hex[:8]}"
+        ),
+        "commit": _get_commit(),
+        "python": sys.version.split()[0],
+    }
+    base_gem = GEM(model_file)
+    records = []
+
+    def store(target: str, case: str, record: dict) -> None:
+        records.append({**run_info, "target": target, "case": case, **record})
+        print(
+            f"{target:>14} {case:<32} {record['status']:>6} "
+            f"{record['seconds'] or float('nan'):10.4f} s "
+            f"{record['peak_memory_mb'] or float('nan'):10.1f} MB",
+            flush=True,
+        )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in scales:
+            target = model_file.stem if scale == 1 else f"{model_file.stem}x{scale}"
+            if scale == 1:
+                model = base_gem.model
+            else:
+                model = make_synthetic_model(base_gem.model, scale)
+            files = {"tmp_dir": Path(tmp_dir), "model": Path(tmp_dir) / "target.xml"}
+            GEM.from_model(model).write(files["model"])
+            for case, func in GEM_CASES.items():
+                if cases is not None and case not in cases:
+                    continue
+                record = measure(
+                    lambda gem: func(gem, files),
+                    lambda: GEM.from_model(model.copy()),
+                    repeat,
+                )
+                store(target, case, record)
+
+            case = "rename_rxn_ids_for_escher"
+            if cases is None or case in cases:
+                reaction_ids = [rxn.id for rxn in model.reactions]
+                fluxes = pd.DataFrame(
+                    np.random.default_rng(0).random((1000, len(reaction_ids))),
+                    columns=reaction_ids,
+                )
+                mapping = {rxn_id: f"{rxn_id}_mapped" for rxn_id in reaction_ids[::2]}
+                record = measure(
+                    lambda arg: rename_rxn_ids_for_escher(*arg),
+                    lambda: (fluxes, mapping),
+                    repeat,
+                )
+                store(target, case, record)
+
+        case = "get_graph_object_from_smetana_table"
+        if cases is None or case in cases:
+            for n_rows in table_sizes:
+                table = make_smetana_table(n_rows)
+                record = measure(
+                    lambda table: get_graph_object_from_smetana_table(
+                        table, weight="smetana"
+                    ),
+                    lambda: table,
+                    repeat,
+                )
+                store(f"smetana_{n_rows}", case, record)
+
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return pd.DataFrame(records)
+
+
+def read_history(history: Path = history_file) -> pd.DataFrame:
+    """Read benchmark history.
+
+    Args:
+        history (Path, optional): JSON lines history file. Defaults to
+            benchmarks/results/history.jsonl.
+
+    Returns:
+        pd.DataFrame: one row per run and case.
+    """
+    return pd.read_json(history, lines=True, dtype={"run_id": str, "commit": str})
+
+
+def _select_run(history: pd.DataFrame, run: str = None) -> pd.DataFrame:
+    """Select results of a run, by run ID or git commit (latest run)."""
+    run_ids = history.run_id.drop_duplicates().tolist()
+    if run is None:
+        run_id = run_ids[-1]
+    elif run in run_ids:
+        run_id = run
+    else:
+        matches = history[history.commit == run].run_id
+        if matches.empty:
+            raise ValueError(f"Run or commit {run} not found in history.")
+        run_id = matches.iloc[-1]
+    return history[history.run_id == run_id]
+
+
+def compare_runs(
+    history: pd.DataFrame,
+    baseline: str = None,
+    current: str = None,
+    threshold: float = 0.2,
+    min_seconds: float = 0.01,
+    min_memory_mb: float = 1.0,
+) -> pd.DataFrame:
+    """Compare a run against a baseline run, flagging regressions.
+
+    A case regresses if its time, or its peak memory, grows by more than the
+    threshold. Differences below min_seconds (in time) and min_memory_mb (in
+    peak memory) are regarded as noise.
+    Cases that failed in the current run but not in the baseline also regress.
+
+    Args:
+        history (pd.DataFrame): benchmark history, see read_history.
+        baseline (str, optional): baseline run ID or git commit. Defaults to
+            None (run before the current one).
+        current (str, optional): current run ID or git commit. Defaults to
+            None (latest run).
+        threshold (float, optional): tolerated relative increase. Defaults to
+            0.2.
+        min_seconds (float, optional): tolerated absolute increase in time.
+            Defaults to 0.01.
+        min_memory_mb (float, optional): tolerated absolute increase in peak
+            memory. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: one row per case, with time and memory ratios and a
+            regression flag.
+    """
+    current_run = _select_run(history, current)
+    if baseline is None:
+        run_ids = history.run_id.drop_duplicates().tolist()
+        index = run_ids.index(current_run.run_id.iloc[0])
+        if index == 0:
+            raise ValueError("No run before the current one to compare against.")
+        baseline = run_ids[index - 1]
+    baseline_run = _select_run(history, baseline)
+    columns = ["target", "case", "status", "seconds", "peak_memory_mb"]
+    comparison = current_run[columns].merge(
+        baseline_run[columns],
+        on=["target", "case"],
+        suffixes=("", "_baseline"),
+    )
+    comparison["time_ratio"] = comparison.seconds / comparison.seconds_baseline
+    comparison["memory_ratio"] = (
+        comparison.peak_memory_mb / comparison.peak_memory_mb_baseline
+    )
+    slower = (comparison.time_ratio > 1 + threshold) & (
+        comparison.seconds - comparison.seconds_baseline > min_seconds
+    )
+    larger = (comparison.memory_ratio > 1 + threshold) & (
+        comparison.peak_memory_mb - comparison.peak_memory_mb_baseline > min_memory_mb
+    )
+    broken = (comparison.status == "failed") & (comparison.status_baseline == "done")
+    comparison["regression"] = slower | larger | broken
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history", type=Path, default=history_file)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("--scales", type=int, nargs="+", default=[1, 4])
+    run_parser.add_argument(
+        "--table-sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--cases", nargs="+", default=None)
+    compare_parser = subparsers.add_parser("compare", help="flag regressions")
+    compare_parser.add_argument("--baseline", default=None)
+    compare_parser.add_argument("--current", default=None)
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser.add_argument("--min-seconds", type=float, default=0.01)
+    compare_parser.add_argument("--min-memory-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_suite(
+            scales=args.scales,
+            table_sizes=args.table_sizes,
+            repeat=args.repeat,
+            cases=args.cases,
+            output_file=args.history,
+        )
+        return
+    comparison = compare_runs(
+        read_history(args.history),
+        baseline=args.baseline,
+        current=args.current,
+        threshold=args.threshold,
+        min_seconds=args.min_seconds,
+        min_memory_mb=args.min_memory_mb,
+    )
+    with pd.option_context("display.width", 200, "display.max_rows", None):
+        print(
+            comparison[
+                [
+                    "target",
+                    "case",
+                    "seconds",
+                    "time_ratio",
+                    "memory_ratio",
+                    "regression",
+                ]
+            ].to_string(index=False)
+        )
+    n_regressions = int(comparison.regression.sum())
+    print(f"{n_regressions} regression(s) found.")
+    sys.exit(1 if n_regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
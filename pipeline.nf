@@ -43,32 +43,44 @@ process memote {
     """
 }
 
-process remove_duplicated_reactions
+process remove_duplicated_reactions {
+    publishDir "${params.outdir}/curated_gems", mode: 'copy'
+
+    input:
+    tuple val(model_id), path(gem_file), path(memote_report)
+
+    output:
+    path "curated/${model_id}.xml"
+
+    script:
+    """
+    echo '[["remove_duplicated_reactions", {"memote_report": "${memote_report}"}]]' > steps.json
+    phycogem curate steps.json . curated --pattern ${gem_file}
+    """
+}
 
 process merge_community {
     publishDir "${params.outdir}/merged_community", mode: 'copy'
 
     input:
-    path xml_files from gems_ch
+    path xml_files
 
     output:
     path "merged.xml"
 
     script:
     """
-    carve --solver gurobi \\
-     --init M9[marine] \\
-     --gapfill M9[marine] \\
-     --mediadb ${params.media_file} \\
-     --output merged.xml \\
-     --fbc2 \\
-     $xml_files
+    phycogem community ${xml_files} --output-file merged.xml
     """
 }
 
 workflow {
     mags.view().set { mags_ch }
     carveme( mags_ch ).view().set { gems_ch }
-    merge_community( gems_ch )
-    memote( gems_ch )
+    memote( gems_ch ).set { reports_ch }
+    remove_duplicated_reactions(
+        gems_ch.map { gem -> tuple(gem.baseName, gem) }
+            .join( reports_ch.map { report -> tuple(report.baseName, report) } )
+    ).set { curated_ch }
+    merge_community( curated_ch.collect() )
 }
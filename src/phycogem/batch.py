@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import phycogem.cli as cli
+import phycogem.profiling as profiling
+from phycogem.cache import ModelCache
+from phycogem.lazy import lazy_import
+from phycogem.media import load_media_db
+from phycogem.quality import Memote
+from phycogem.reconstruction import GEM
+
+cobra = lazy_import("cobra")
+pd = lazy_import("pandas")
+
+MANIFEST_COLUMNS = ["model", "index", "step", "status", "seconds", "error"]
+
+
+def _remove_duplicated_reactions(
+    gem: GEM, memote_report: Path = None, duplicated_reactions: list[list] = None
+) -> None:
+    if memote_report is not None:
+        duplicated_reactions = Memote(memote_report).get_duplicated_reactions()
+    gem.remove_duplicated_reactions(duplicated_reactions)
+
+
+def _set_medium(gem: GEM, medium_id: str, media_db: Path, **kwargs) -> None:
+    gem.set_medium(medium_id, load_media_db(str(media_db)), **kwargs)
+
+
+_STEP_ADAPTERS = {
+    "remove_duplicated_reactions": _remove_duplicated_reactions,
+    "set_medium": _set_medium,
+}
+
+
+def parse_steps(steps: list) -> list[tuple[str, dict]]:
+    """Normalize a declared sequence of curation steps.
+
+    Each step is either the name of a GEM method or a (name, kwargs) pair.
+    String arguments may contain a "{model}" placeholder, replaced by the model
+    ID (the model file name without extension) when the step runs. Besides the
+    GEM methods, remove_duplicated_reactions also accepts a memote_report
+    argument, and set_medium reuses media databases across steps and models.
+
+    Args:
+        steps (list): declared steps.
+
+    Returns:
+        list[tuple[str, dict]]: (name, kwargs) pairs.
+    """
+    parsed_steps = []
+    for step in steps:
+        name, kwargs = (step, {}) if isinstance(step, str) else step
+        if not callable(getattr(GEM, name, None)) or name.startswith("_"):
+            raise ValueError(f"Unknown curation step: {name}")
+        parsed_steps.append((name, dict(kwargs)))
+    return parsed_steps
+
+
+def _get_signature(step: tuple[str, dict]) -> str:
+    return json.dumps(step, sort_keys=True, default=str)
+
+
+def _apply_step(gem: GEM, model_id: str, name: str, kwargs: dict) -> None:
+    kwargs = {
+        key: value.replace("{model}", model_id) if isinstance(value, str) else value
+        for key, value in kwargs.items()
+    }
+    if name in _STEP_ADAPTERS:
+        _STEP_ADAPTERS[name](gem, **kwargs)
+    else:
+        getattr(gem, name)(**kwargs)
+
+
+def _write_manifest(manifest_file: Path, records: list[dict]) -> None:
+    tmp_file = manifest_file.with_name(f"{manifest_file.name}.tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(records, f, indent=2)
+    os.replace(tmp_file, manifest_file)
+
+
+def curate_model(
+    model_file: Path, steps: list[tuple[str, dict]], output_dir: Path
+) -> list[dict]:
+    """Apply a sequence of curation steps to a model, resuming previous runs.
+
+    After each step, the model is checkpointed and the step's status and
+    timing are recorded in a per-model manifest. Steps already done in a
+    previous run with the same arguments are skipped, resuming from the last
+    checkpoint, or from model_file if that checkpoint is missing or unreadable.
+    The curated model is written to output_dir/<model ID>.xml.
+
+    Args:
+        model_file (Path): path to SBML model file.
+        steps (list[tuple[str, dict]]): curation steps, see parse_steps.
+        output_dir (Path): output directory.
+
+    Returns:
+        list[dict]: manifest records of the model's steps.
+    """
+    model_id = Path(model_file).stem
+    model_dir = Path(output_dir) / model_id
+    model_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file = model_dir / "manifest.json"
+    output_file = Path(output_dir) / f"{model_id}.xml"
+    checkpoints = ModelCache(model_dir / "checkpoints", max_size=float("inf"))
+
+    records = []
+    if manifest_file.is_file():
+        with open(manifest_file) as f:
+            records = json.load(f)
+    n_done = 0
+    for record, step in zip(records, steps):
+        if record["status"] != "done" or record["signature"] != _get_signature(step):
+            break
+        n_done += 1
+    records = records[:n_done]
+    if n_done == len(steps) and output_file.is_file():
+        return records
+
+    gem = None
+    try:
+        model = checkpoints.get(str(n_done)) if n_done else None
+        if isinstance(model, cobra.Model):
+            gem = GEM.from_model(model)
+    except Exception:
+        pass
+    if gem is None:
+        # Missing or unreadable checkpoint: rerun all steps from the input model
+        n_done, records = 0, []
+        try:
+            gem = GEM(model_file)
+        except Exception as e:
+            load_error = f"Failed to load model: {type(e).__name__}: {e}"
+            if not steps:
+                raise RuntimeError(load_error) from e
+
+    for index in range(n_done, len(steps)):
+        name, kwargs = steps[index]
+        record = {
+            "model": model_id,
+            "index": index,
+            "step": name,
+            "signature": _get_signature(steps[index]),
+            "status": "done",
+            "seconds": None,
+            "error": None,
+        }
+        start = time.perf_counter()
+        try:
+            if gem is None:
+                raise RuntimeError(load_error)
+            _apply_step(gem, model_id, name, kwargs)
+            checkpoints.put(str(index + 1), gem.model)
+            checkpoints.remove(str(index))
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["seconds"] = time.perf_counter() - start
+        records.append(record)
+        _write_manifest(manifest_file, records)
+        if record["status"] == "failed":
+            return records
+
+    gem.write(output_file)
+    return records
+
+
+def _curate_model_worker(args: tuple) -> list[dict]:
+    with profiling.worker_profile():
+        return curate_model(*args)
+
+
+def run_batch(
+    model_dir: Path,
+    steps: list,
+    output_dir: Path,
+    processes: int = 1,
+    pattern: str = "*.xml",
+    verbose: bool = False,
+) -> pd.DataFrame:
+    """Apply a sequence of curation steps to every model in a directory.
+
+    Models are curated in parallel (see curate_model). Per-model, per-step
+    status and timings are collected in output_dir/manifest.tsv. Rerunning
+    the batch skips steps that are already done, so that a failed or
+    interrupted batch can be resumed.
+
+    Args:
+        model_dir (Path): directory containing SBML models.
+        steps (list): declared curation steps, see parse_steps.
+        output_dir (Path): output directory.
+        processes (int, optional): number of parallel processes. Defaults to 1.
+        pattern (str, optional): glob pattern of model files. Defaults to
+            "*.xml".
+        verbose (bool, optional): print progress. Defaults to False.
+
+    Returns:
+        pd.DataFrame: manifest, one row per model and step.
+    """
+    steps = parse_steps(steps)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model_files = sorted(Path(model_dir).glob(pattern))
+    args = [(model_file, steps, output_dir) for model_file in model_files]
+
+    all_records = []
+
+    def store_records(records: list[dict], n_done: int) -> None:
+        all_records.extend(records)
+        if verbose and records:
+            failed = [record for record in records if record["status"] == "failed"]
+            status = f"failed at {failed[0]['step']}" if failed else "done"
+            print(f"{records[0]['model']}: {status} [{n_done}/{len(model_files)}]")
+
+    if processes > 1 and len(model_files) > 1:
+        with cobra.util.ProcessPool(min(processes, len(model_files))) as pool:
+            for n_done, records in enumerate(
+                pool.imap_unordered(_curate_model_worker, args), start=1
+            ):
+                store_records(records, n_done)
+    else:
+        for n_done, arg in enumerate(args, start=1):
+            store_records(_curate_model_worker(arg), n_done)
+
+    manifest = pd.DataFrame(all_records, columns=MANIFEST_COLUMNS)
+    manifest = manifest.sort_values(["model", "index"]).reset_index(drop=True)
+    manifest.to_csv(output_dir / "manifest.tsv", sep="\t", index=False)
+    return manifest
+
+
+def main():
+    """Run the curate command of the phycogem CLI (python -m phycogem.batch)."""
+    cli.main(["curate", *sys.argv[1:]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from functools import partial
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from phycogem.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from cobra import Metabolite, Model, Reaction
+    from cobra.core.dictlist import DictList
+    from numpy.typing import ArrayLike
+
+cobra = lazy_import("cobra")
+optlang = lazy_import("optlang")
+
+
+def _rebuild(dict_list: DictList, removed_ids: set) -> None:
+    """Drop objects from a DictList in place, rebuilding its index once."""
+    kept = [obj for obj in dict_list if obj.id not in removed_ids]
+    list.__delitem__(dict_list, slice(None))
+    list.extend(dict_list, kept)
+    dict_list._generate_index()
+
+
+def _remove_from_groups(model: Model, members: list) -> None:
+    members = set(members)
+    for group in model.groups:
+        associated = [member for member in group.members if member in members]
+        if associated:
+            group.remove_members(associated)
+
+
+def remove_metabolites(model: Model, metabolites: list[Metabolite]) -> None:
+    """Remove metabolites from a model in a single batch.
+
+    Same result as Model.remove_metabolites (non-destructive): metabolites are
+    detached from their reactions. However, the metabolite list index and the
+    solver are updated only once, instead of once per metabolite. Falls back
+    to cobra when called within a model context.
+
+    Args:
+        model (Model): cobra model.
+        metabolites (list[Metabolite]): metabolites to remove.
+    """
+    if cobra.util.get_context(model):
+        model.remove_metabolites(metabolites)
+        return
+    metabolites = [met for met in metabolites if met.id in model.metabolites]
+    if not metabolites:
+        return
+    _remove_from_groups(model, metabolites)
+    for met in metabolites:
+        met._model = None
+        for reaction in list(met._reaction):
+            del reaction._metabolites[met]
+            met._reaction.discard(reaction)
+    _rebuild(model.metabolites, {met.id for met in metabolites})
+    constraints = model.solver.constraints
+    model.remove_cons_vars([constraints[met.id] for met in metabolites])
+
+
+def remove_reactions(
+    model: Model, reactions: list[Reaction], remove_orphans: bool = False
+) -> None:
+    """Remove reactions from a model in a single batch.
+
+    Same result as Model.remove_reactions, including the removal of orphan
+    metabolites and genes. However, the reaction list index and the solver are
+    updated only once, instead of once per reaction. Falls back to cobra when
+    called within a model context.
+
+    Args:
+        model (Model): cobra model.
+        reactions (list[Reaction]): reactions to remove.
+        remove_orphans (bool, optional): remove metabolites and genes left
+            without reactions. Defaults to False.
+    """
+    if cobra.util.get_context(model):
+        model.remove_reactions(reactions, remove_orphans=remove_orphans)
+        return
+    reactions = [
+        model.reactions.get_by_id(rxn.id)
+        for rxn in reactions
+        if rxn.id in model.reactions
+    ]
+    if not reactions:
+        return
+    model.remove_cons_vars(
+        [
+            variable
+            for rxn in reactions
+            for variable in (rxn.forward_variable, rxn.reverse_variable)
+        ]
+    )
+    _rebuild(model.reactions, {rxn.id for rxn in reactions})
+    orphan_metabolites, orphan_genes = {}, {}
+    for rxn in reactions:
+        rxn._model = None
+        for met in rxn._metabolites:
+            if rxn in met._reaction:
+                met._reaction.remove(rxn)
+                if remove_orphans and len(met._reaction) == 0:
+                    orphan_metabolites[met.id] = met
+        for gene in rxn._genes:
+            if rxn in gene._reaction:
+                gene._reaction.remove(rxn)
+                if remove_orphans and len(gene._reaction) == 0:
+                    orphan_genes[gene.id] = gene
+    _remove_from_groups(model, reactions)
+    remove_metabolites(model, list(orphan_metabolites.values()))
+    if orphan_genes:
+        _rebuild(model.genes, set(orphan_genes))
+        for gene in orphan_genes.values():
+            gene._model = None
+
+
+def _get_compartments(reaction: Reaction) -> set:
+    return {
+        met.compartment for met in reaction._metabolites if met.compartment is not None
+    }
+
+
+def _plan_collapse(
+    model: Model,
+    reactions: list[Reaction],
+    target_compartment: str = "c",
+    allowed_compartments: set = None,
+    excluded_metabolites: set = frozenset(),
+) -> tuple[list[Metabolite], list[Metabolite], list[Reaction]]:
+    """Plan the move of reactions to a target compartment.
+
+    Reactions are visited in order, on a sparse ID mapping of their
+    stoichiometry, as if metabolites were moved one at a time: a metabolite
+    that is moved is detached from the reactions visited after it. Hence, a
+    reaction is only moved if it still involves compartments other than the
+    allowed ones when it is visited. Only the compartments of existing target
+    metabolites are changed in the model.
+
+    Args:
+        model (Model): cobra model.
+        reactions (list[Reaction]): candidate reactions, in model order.
+        target_compartment (str, optional): compartment into which metabolites
+            are merged. Defaults to "c".
+        allowed_compartments (set, optional): compartments that are kept.
+            Defaults to None (move all candidates).
+        excluded_metabolites (set, optional): IDs of metabolites regarded as
+            absent from the model. Defaults to an empty set.
+
+    Returns:
+        tuple[list[Metabolite], list[Metabolite], list[Reaction]]: metabolites
+            to add, metabolites to remove and reactions replacing the moved
+            ones (which have the same IDs).
+    """
+    metabolites = {
+        met.id: met for met in model.metabolites if met.id not in excluded_metabolites
+    }
+    compartments = {}
+    stoichiometry = {
+        rxn.id: {met.id: coeff for met, coeff in rxn._metabolites.items()}
+        for rxn in reactions
+    }
+    new_metabolites, removed_metabolites, target_ids = {}, [], set()
+    planned_reactions = []
+
+    for rxn in reactions:
+        rxn_stoichiometry = stoichiometry[rxn.id]
+        if allowed_compartments is not None:
+            rxn_compartments = {
+                compartments.get(met_id, metabolites[met_id].compartment)
+                for met_id in rxn_stoichiometry
+            }
+            rxn_compartments.discard(None)
+            if rxn_compartments.issubset(allowed_compartments):
+                continue
+        new_stoichiometry = {}
+        for met_id, coeff in list(rxn_stoichiometry.items()):
+            new_met_id = met_id[:-1] + target_compartment
+            if new_met_id not in metabolites:
+                met = metabolites.pop(met_id)
+                new_met = met.copy()
+                new_met.id = new_met_id
+                new_met.compartment = target_compartment
+                metabolites[new_met_id] = new_met
+                new_metabolites[new_met_id] = new_met
+                removed_metabolites.append(met)
+                for other in met._reaction:
+                    other_stoichiometry = stoichiometry.get(other.id)
+                    if other_stoichiometry is not None:
+                        other_stoichiometry.pop(met_id, None)
+            else:
+                target_ids.add(new_met_id)
+            compartments[new_met_id] = target_compartment
+            new_stoichiometry[new_met_id] = coeff
+        planned_reactions.append((rxn, new_stoichiometry))
+
+    for met_id in target_ids:
+        if met_id not in new_metabolites:
+            metabolites[met_id].compartment = target_compartment
+    new_reactions = []
+    for rxn, new_stoichiometry in planned_reactions:
+        new_reaction = cobra.Reaction(
+            id=rxn.id,
+            name=rxn.name,
+            lower_bound=rxn.lower_bound,
+            upper_bound=rxn.upper_bound,
+            subsystem=rxn.subsystem,
+        )
+        new_reaction.gene_reaction_rule = rxn.gene_reaction_rule
+        new_reaction.add_metabolites(
+            {metabolites[met_id]: coeff for met_id, coeff in new_stoichiometry.items()}
+        )
+        new_reactions.append(new_reaction)
+    return list(new_metabolites.values()), removed_metabolites, new_reactions
+
+
+def collapse_compartments(
+    model: Model, allowed_compartments: set, target_compartment: str = "c"
+) -> None:
+    """Move reactions involving unwanted compartments to a target compartment.
+
+    Produces exactly the same model as moving metabolites one at a time (see
+    GEM.move_reactions_to_cytoplasm), but the new reaction/metabolite layout is
+    first planned on a sparse ID mapping of the stoichiometry and then applied
+    to the model in a few bulk operations.
+
+    Args:
+        model (Model): cobra model.
+        allowed_compartments (set): compartments that are kept.
+        target_compartment (str, optional): compartment into which metabolites
+            are merged. Defaults to "c".
+    """
+    candidates = [
+        rxn
+        for rxn in model.reactions
+        if not _get_compartments(rxn).issubset(allowed_compartments)
+    ]
+    new_metabolites, removed_metabolites, new_reactions = _plan_collapse(
+        model, candidates, target_compartment, allowed_compartments
+    )
+    model.add_metabolites(new_metabolites)
+    remove_metabolites(model, removed_metabolites)
+    remove_reactions(
+        model,
+        [model.reactions.get_by_id(rxn.id) for rxn in new_reactions],
+        remove_orphans=True,
+    )
+    model.add_reactions(new_reactions)
+
+
+def _push_variable_bounds(
+    model: Model, variables: list, lower_bounds: list, upper_bounds: list
+) -> None:
+    """Set bounds of solver variables, in a single update where supported.
+
+    Interfaces that implement batched bound changes (e.g., cplex, gurobi)
+    receive all bounds in one Model.update. Others (e.g., glpk) have no batch
+    call, so bounds are set one column at a time, without cobra's overhead.
+    """
+    solver = model.solver
+    batched = (
+        type(solver)._set_variable_bounds_on_problem
+        is not optlang.interface.Model._set_variable_bounds_on_problem
+    )
+    if batched:
+        for variable, lb, ub in zip(variables, lower_bounds, upper_bounds):
+            # Only queues the change, applied by the update below
+            optlang.interface.Variable.set_bounds(variable, lb, ub)
+        solver.update()
+    else:
+        for variable, lb, ub in zip(variables, lower_bounds, upper_bounds):
+            variable.set_bounds(lb, ub)
+
+
+def _apply_bounds(
+    model: Model,
+    reactions: list[Reaction],
+    lower_bounds: np.ndarray,
+    upper_bounds: np.ndarray,
+) -> None:
+    """Set (validated) reaction bounds and the bounds of their variables."""
+    if not reactions:
+        return
+    for rxn, lb, ub in zip(reactions, lower_bounds.tolist(), upper_bounds.tolist()):
+        rxn._lower_bound = lb
+        rxn._upper_bound = ub
+    # Bounds of forward and reverse variables, as in Reaction.update_variable_bounds
+    forward_lb = np.where(lower_bounds > 0, lower_bounds, 0.0)
+    forward_ub = np.where(upper_bounds < 0, 0.0, upper_bounds)
+    reverse_lb = np.where(upper_bounds < 0, -upper_bounds, 0.0)
+    reverse_ub = np.where(lower_bounds > 0, 0.0, -lower_bounds)
+    variables = model.variables
+    _push_variable_bounds(
+        model,
+        [variables[rxn.id] for rxn in reactions]
+        + [variables[rxn.reverse_id] for rxn in reactions],
+        [
+            None if np.isinf(bound) else bound
+            for bound in np.concatenate([forward_lb, reverse_lb]).tolist()
+        ],
+        [
+            None if np.isinf(bound) else bound
+            for bound in np.concatenate([forward_ub, reverse_ub]).tolist()
+        ],
+    )
+
+
+def set_bounds(
+    model: Model,
+    bounds: Mapping[str, tuple[float, float]] | Sequence[str | Reaction],
+    lower_bounds: ArrayLike = None,
+    upper_bounds: ArrayLike = None,
+) -> list[Reaction]:
+    """Set the bounds of several reactions at once.
+
+    Bounds are given either as a mapping of reaction IDs to (lower, upper)
+    bounds, or as a sequence of reactions (or IDs) together with arrays (or
+    scalars) of lower and upper bounds. All bounds are validated together
+    before any is set, and only reactions whose bounds actually change are
+    updated, with all variable bounds pushed to the solver in one go. Within
+    a model context, the previous bounds are restored on exit.
+
+    Args:
+        model (Model): cobra model.
+        bounds (Mapping[str, tuple[float, float]] | Sequence[str | Reaction]):
+            reaction IDs and their new (lower, upper) bounds, or reactions
+            (or reaction IDs) whose bounds are given in lower_bounds and
+            upper_bounds.
+        lower_bounds (ArrayLike, optional): new lower bounds of the reactions,
+            array or scalar. Defaults to None (lower bounds unchanged).
+        upper_bounds (ArrayLike, optional): new upper bounds of the reactions,
+            array or scalar. Defaults to None (upper bounds unchanged).
+
+    Raises:
+        KeyError: if any reaction is not in the model.
+        ValueError: if any lower bound is larger than its upper bound, or any
+            bound is NaN.
+
+    Returns:
+        list[Reaction]: reactions whose bounds changed.
+    """
+    if isinstance(bounds, Mapping):
+        rxn_ids = list(bounds)
+        new_bounds = np.array(list(bounds.values()), dtype=float).reshape(-1, 2)
+        lower_bounds, upper_bounds = new_bounds[:, 0], new_bounds[:, 1]
+    else:
+        rxn_ids = [getattr(rxn, "id", rxn) for rxn in bounds]
+    missing = [rxn_id for rxn_id in rxn_ids if rxn_id not in model.reactions]
+    if missing:
+        raise KeyError(f"Reactions not found in model: {', '.join(missing)}")
+    reactions = [model.reactions.get_by_id(rxn_id) for rxn_id in rxn_ids]
+
+    old_lower = np.array([rxn.lower_bound for rxn in reactions], dtype=float)
+    old_upper = np.array([rxn.upper_bound for rxn in reactions], dtype=float)
+    new_lower, new_upper = (
+        old if new is None else np.broadcast_to(np.asarray(new, dtype=float), old.shape)
+        for old, new in ((old_lower, lower_bounds), (old_upper, upper_bounds))
+    )
+    invalid = np.isnan(new_lower) | np.isnan(new_upper) | (new_lower > new_upper)
+    if invalid.any():
+        raise ValueError(
+            "Lower bound larger than upper bound, or NaN bound, in reactions: "
+            + ", ".join(np.asarray(rxn_ids, dtype=object)[invalid])
+        )
+
+    changed = np.flatnonzero((new_lower != old_lower) | (new_upper != old_upper))
+    changed_rxns = [reactions[j] for j in changed]
+    context = cobra.util.get_context(model)
+    if context:
+        context(
+            partial(
+                _apply_bounds,
+                model,
+                changed_rxns,
+                old_lower[changed],
+                old_upper[changed],
+            )
+        )
+    _apply_bounds(model, changed_rxns, new_lower[changed], new_upper[changed])
+    return changed_rxns
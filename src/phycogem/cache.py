@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from phycogem.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from cobra import Model
+
+cobra = lazy_import("cobra")
+optlang = lazy_import("optlang")
+
+
+def hash_file(file_path: Path, block_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 hash of a file's content.
+
+    Args:
+        file_path (Path): path to file.
+        block_size (int, optional): bytes read per iteration. Defaults to 1 MiB.
+
+    Returns:
+        str: hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _get_version_tag() -> str:
+    """Short hash of the cobra and optlang versions models are pickled with."""
+    versions = f"cobra={cobra.__version__};optlang={optlang.__version__}"
+    return hashlib.sha256(versions.encode()).hexdigest()[:8]
+
+
+class ModelCache:
+    """On-disk cache of parsed cobra models keyed by SBML content hash.
+
+    Models are stored as zlib-compressed pickles, so loading a cached model
+    skips XML parsing altogether. Since entries are keyed by the hash of the
+    SBML file, a modified file never hits a stale entry. Entry names also
+    carry a tag of the cobra and optlang versions, so that upgrading either
+    never unpickles models written by another version. The cache is bounded
+    in size: least recently used entries are evicted first.
+    """
+
+    suffix = ".model.pkl.z"
+
+    def __init__(self, cache_dir: Path, max_size: int = 2 * 1024**3):
+        """
+        Args:
+            cache_dir (Path): directory where cached models are stored.
+            max_size (int, optional): maximum total size of the cache in bytes.
+                Defaults to 2 GiB.
+        """
+        self._cache_dir = Path(cache_dir)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._max_size = max_size
+
+    @property
+    def cache_dir(self) -> Path:
+        """Return cache directory."""
+        return self._cache_dir
+
+    def _entry_path(self, key: str) -> Path:
+        return self._cache_dir / f"{key}.{_get_version_tag()}{self.suffix}"
+
+    def _entries(self) -> list[Path]:
+        return list(self._cache_dir.glob(f"*{self.suffix}"))
+
+    def __contains__(self, key: str) -> bool:
+        return self._entry_path(key).is_file()
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    @property
+    def size(self) -> int:
+        """Return total size of cached entries in bytes."""
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def get(self, key: str) -> Model | None:
+        """Retrieve model from cache.
+
+        Args:
+            key (str): content hash of the SBML file.
+
+        Returns:
+            Model: cobra model, or None if not cached.
+        """
+        entry = self._entry_path(key)
+        try:
+            with open(entry, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            model = pickle.loads(zlib.decompress(data))
+        except Exception:
+            # Corrupt or incompatible entries are treated as cache misses
+            entry.unlink(missing_ok=True)
+            return None
+        os.utime(entry)
+        return model
+
+    def put(self, key: str, model: Model) -> None:
+        """Store model in cache and evict old entries if needed.
+
+        Args:
+            key (str): content hash of the SBML file.
+            model (Model): cobra model to store.
+        """
+        data = zlib.compress(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        entry = self._entry_path(key)
+        tmp_entry = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        with open(tmp_entry, "wb") as f:
+            f.write(data)
+        os.replace(tmp_entry, entry)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until cache fits within max_size."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda x: x[0]):
+            if total_size <= self._max_size:
+                break
+            entry.unlink(missing_ok=True)
+            total_size -= size
+
+    def remove(self, key: str) -> None:
+        """Remove an entry from cache, if present.
+
+        Args:
+            key (str): content hash of the SBML file.
+        """
+        self._entry_path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        for entry in self._entries():
+            entry.unlink(missing_ok=True)
+
+    def load_model(self, model_file: Path) -> Model:
+        """Load model from cache, parsing the SBML file only on a cache miss.
+
+        Args:
+            model_file (Path): path to SBML file.
+
+        Returns:
+            Model: cobra model.
+        """
+        key = hash_file(model_file)
+        model = self.get(key)
+        if model is None:
+            model = cobra.io.read_sbml_model(str(model_file))
+            self.put(key, model)
+        return model
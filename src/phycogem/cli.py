@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+# Commands import the modules they need when run, so that the CLI starts (and
+# prints help) without importing cobra, optlang, pandas or matplotlib.
+
+
+def _compound_db(args: argparse.Namespace) -> None:
+    from phycogem.compounds import CompoundDB
+
+    compound_db = CompoundDB.build(
+        args.db_file,
+        bigg_metabolites=args.bigg_metabolites,
+        mnx_compounds=args.mnx_compounds,
+        inorganic=args.inorganic,
+        overwrite=args.overwrite,
+    )
+    print(f"{len(compound_db)} compounds in {args.db_file}")
+
+
+def _curate(args: argparse.Namespace) -> None:
+    import json
+    from contextlib import ExitStack
+
+    import phycogem.profiling as profiling
+    from phycogem.batch import run_batch
+
+    with open(args.steps) as f:
+        steps = json.load(f)
+    with ExitStack() as stack:
+        if args.profile:
+            stack.enter_context(
+                profiling.profile(
+                    trace_file=args.output_dir / "profile.json",
+                    summary_file=args.output_dir / "profile.tsv",
+                    trace_dir=args.output_dir / "traces",
+                )
+            )
+        manifest = run_batch(
+            args.model_dir,
+            steps,
+            args.output_dir,
+            processes=args.processes,
+            pattern=args.pattern,
+            verbose=True,
+        )
+    print(manifest.groupby("status").size().to_string())
+
+
+def _community(args: argparse.Namespace) -> None:
+    from phycogem.reconstruction import GEM
+
+    members = {model_file.stem: GEM(model_file) for model_file in args.model_files}
+    community = GEM.from_community(
+        members, shared_compartment=args.shared_compartment, model_id=args.model_id
+    )
+    community.write(args.output_file)
+
+
+def _grow(args: argparse.Namespace) -> None:
+    from phycogem.samples import grow_samples
+
+    growth = grow_samples(
+        args.taxonomy,
+        args.output_file,
+        tradeoffs=args.tradeoffs,
+        medium_id=args.medium,
+        media_db=args.media_db,
+        cutoff=args.cutoff,
+        cache_dir=args.cache_dir,
+        processes=args.processes,
+    )
+    if args.growth_file is not None:
+        growth.to_csv(args.growth_file, sep="\t", index=False)
+    print(f"{growth['community'].nunique()} samples grown")
+
+
+def _interactions(args: argparse.Namespace) -> None:
+    from phycogem.interactions import screen_interactions
+
+    interactions = screen_interactions(
+        args.model_files,
+        medium_id=args.medium,
+        media_db=args.media_db,
+        cache_dir=args.cache_dir,
+        processes=args.processes,
+        output_file=args.output_file,
+    )
+    print(f"{len(interactions)} interactions written to {args.output_file}")
+
+
+def _memote_summary(args: argparse.Namespace) -> None:
+    from phycogem.quality import summarize_reports
+
+    summary = summarize_reports(
+        args.report_dir,
+        tests=args.tests,
+        processes=args.processes,
+        pattern=args.pattern,
+    )
+    summary.to_csv(args.output_file, sep="\t", index=False)
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the phycogem command.
+
+    Returns:
+        argparse.ArgumentParser: parser with one subcommand per workflow.
+    """
+    parser = argparse.ArgumentParser(
+        prog="phycogem",
+        description="Reconstruct and analyze phycosphere community GEMs.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    curate = subparsers.add_parser(
+        "curate",
+        help="apply a sequence of curation steps to a directory of models",
+        description="Apply a sequence of GEM curation steps to a directory of models.",
+    )
+    curate.add_argument("steps", type=Path, help="JSON file with a list of steps")
+    curate.add_argument("model_dir", type=Path)
+    curate.add_argument("output_dir", type=Path)
+    curate.add_argument("--processes", type=int, default=1)
+    curate.add_argument("--pattern", default="*.xml")
+    curate.add_argument(
+        "--profile",
+        action="store_true",
+        help="write a Chrome trace (profile.json) and a summary of GEM calls "
+        "(profile.tsv) to the output directory",
+    )
+    curate.set_defaults(func=_curate)
+
+    compound_db = subparsers.add_parser(
+        "compound-db",
+        help="build the compound database used for annotation",
+        description="Merge compound names, formulae, charges and inorganic "
+        "compounds into an indexed SQLite database. The database is only rebuilt "
+        "if the source files changed.",
+    )
+    compound_db.add_argument("db_file", type=Path, help="output SQLite file")
+    compound_db.add_argument(
+        "--bigg-metabolites", type=Path, help="BiGG metabolites JSON file"
+    )
+    compound_db.add_argument(
+        "--mnx-compounds", type=Path, help="TSV file with formula and charge"
+    )
+    compound_db.add_argument(
+        "--inorganic", type=Path, help="text file with IDs of inorganic compounds"
+    )
+    compound_db.add_argument("--overwrite", action="store_true")
+    compound_db.set_defaults(func=_compound_db)
+
+    community = subparsers.add_parser(
+        "community",
+        help="merge models into a compartmentalized community model",
+        description="Merge models into a compartmentalized community model. "
+        "Members are identified by their file names without extension.",
+    )
+    community.add_argument("model_files", type=Path, nargs="+")
+    community.add_argument("-o", "--output-file", type=Path, required=True)
+    community.add_argument("--shared-compartment", default="e")
+    community.add_argument("--model-id", default="community")
+    community.set_defaults(func=_community)
+
+    grow = subparsers.add_parser(
+        "grow",
+        help="build and grow the community of every sample of a taxonomy table",
+        description="Build and grow the community of every sample of a "
+        "MICOM-style taxonomy table (sample_id, id, abundance and file columns) "
+        "for each tradeoff value, and write donor/receiver/compound exchanges.",
+    )
+    grow.add_argument("taxonomy", type=Path, help="taxonomy CSV file")
+    grow.add_argument("-o", "--output-file", type=Path, required=True)
+    grow.add_argument("--growth-file", type=Path, help="output TSV of growth rates")
+    grow.add_argument("--tradeoffs", type=float, nargs="+", default=[0.5])
+    grow.add_argument("--medium", help="medium ID in the media database")
+    grow.add_argument("--media-db", type=Path)
+    grow.add_argument("--cutoff", type=float, default=1e-2)
+    grow.add_argument(
+        "--cache-dir", type=Path, help="directory where parsed models are cached"
+    )
+    grow.add_argument("--processes", type=int, default=1)
+    grow.set_defaults(func=_grow)
+
+    interactions = subparsers.add_parser(
+        "interactions",
+        help="screen metabolic exchanges among pairs of models",
+        description="Screen metabolic exchanges among all pairs of models.",
+    )
+    interactions.add_argument("model_files", type=Path, nargs="+")
+    interactions.add_argument("-o", "--output-file", type=Path, required=True)
+    interactions.add_argument("--medium", help="medium ID in the media database")
+    interactions.add_argument("--media-db", type=Path)
+    interactions.add_argument(
+        "--cache-dir", type=Path, help="directory where profiles are cached"
+    )
+    interactions.add_argument("--processes", type=int, default=1)
+    interactions.set_defaults(func=_interactions)
+
+    memote_summary = subparsers.add_parser(
+        "memote-summary",
+        help="collect test results of a directory of memote reports",
+        description="Collect test results of a directory of memote JSON reports.",
+    )
+    memote_summary.add_argument("report_dir", type=Path)
+    memote_summary.add_argument("-o", "--output-file", type=Path, required=True)
+    memote_summary.add_argument(
+        "--tests", nargs="+", help="IDs of tests to collect (default: all)"
+    )
+    memote_summary.add_argument("--processes", type=int, default=1)
+    memote_summary.add_argument("--pattern", default="*.json")
+    memote_summary.set_defaults(func=_memote_summary)
+    return parser
+
+
+def main(argv: list[str] = None) -> None:
+    """Run the phycogem command.
+
+    Args:
+        argv (list[str], optional): command line arguments. Defaults to None
+            (sys.argv).
+    """
+    args = get_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import ast
+from typing import TYPE_CHECKING
+
+from phycogem.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from cobra import Gene, Metabolite, Model, Reaction
+
+cobra = lazy_import("cobra")
+sparse = lazy_import("scipy.sparse")
+
+
+def _is_shared_exchange(reaction: Reaction, shared_compartment: str) -> bool:
+    return reaction.boundary and all(
+        met.compartment == shared_compartment for met in reaction._metabolites
+    )
+
+
+def _get_variable_bounds(
+    lower_bound: float, upper_bound: float
+) -> tuple[tuple[float, float], tuple[float, float]]:
+    """Bounds of forward and reverse variables, as set by cobra."""
+    if lower_bound > 0:
+        return (lower_bound, upper_bound), (0, 0)
+    if upper_bound < 0:
+        return (0, 0), (-upper_bound, -lower_bound)
+    return (0, upper_bound), (0, -lower_bound)
+
+
+def merge_models(
+    members: dict[str, Model],
+    shared_compartment: str = "e",
+    abundances: dict[str, float] = None,
+    model_id: str = "community",
+    balanced_growth: bool = True,
+) -> Model:
+    """Merge member models into a compartmentalized community model.
+
+    Metabolites in the shared compartment, and exchange reactions of these
+    metabolites, form a common extracellular pool. All other metabolites,
+    compartments, reactions and genes get the member ID as suffix. Each
+    member's objective produces a biomass metabolite (in compartment
+    "community"), which is consumed in proportion to the member's abundance by
+    the community growth reaction, the objective of the community.
+
+    If growth is not balanced, members grow at independent rates, as in
+    MICOM: fluxes of members into the shared pool are weighted by their
+    abundances, and a growth reaction of each member turns its biomass into
+    community biomass in proportion to its abundance. Community growth is
+    then the abundance-weighted sum of member growth rates.
+
+    The community stoichiometry is assembled as a block-sparse matrix of the
+    member matrices, and then pushed to the solver in bulk: one call to add
+    all variables and constraints, and one coefficient update per constraint.
+
+    Args:
+        members (dict[str, Model]): member IDs and models.
+        shared_compartment (str, optional): compartment of the common pool.
+            Defaults to "e".
+        abundances (dict[str, float], optional): relative abundances of
+            members. Defaults to None (equal abundances).
+        model_id (str, optional): ID of community model. Defaults to
+            "community".
+        balanced_growth (bool, optional): all members grow at the rate of the
+            community. Defaults to True.
+
+    Returns:
+        Model: community model.
+    """
+    if abundances is None:
+        abundances = {member_id: 1 / len(members) for member_id in members}
+    community = cobra.Model(model_id)
+    compartments, metabolites, met_rows = {}, [], {}
+    reactions, gprs, genes, shared_exchanges = [], [], [], set()
+    rows, cols, coefficients = [], [], []
+
+    for member_id, model in members.items():
+        suffix = f"_{member_id}"
+        for comp_id, comp_name in model.compartments.items():
+            if comp_id == shared_compartment:
+                compartments[comp_id] = comp_name
+            else:
+                compartments[comp_id + suffix] = f"{comp_name or comp_id} ({member_id})"
+
+        member_rows = {}
+        for met in model.metabolites:
+            if met.compartment == shared_compartment:
+                new_id, compartment = met.id, met.compartment
+            elif met.compartment is None:
+                new_id, compartment = met.id + suffix, None
+            else:
+                new_id, compartment = met.id + suffix, met.compartment + suffix
+            if new_id not in met_rows:
+                new_met = cobra.Metabolite(
+                    new_id,
+                    formula=met.formula,
+                    name=met.name,
+                    charge=met.charge,
+                    compartment=compartment,
+                )
+                new_met.annotation = met.annotation.copy()
+                met_rows[new_id] = len(metabolites)
+                metabolites.append(new_met)
+            member_rows[met] = met_rows[new_id]
+        biomass = cobra.Metabolite(
+            f"biomass{suffix}", name=f"{member_id} biomass", compartment="community"
+        )
+        biomass_row = met_rows[biomass.id] = len(metabolites)
+        metabolites.append(biomass)
+
+        objective = cobra.util.linear_reaction_coefficients(model)
+        for rxn in model.reactions:
+            if _is_shared_exchange(rxn, shared_compartment):
+                if rxn.id in shared_exchanges:
+                    continue
+                shared_exchanges.add(rxn.id)
+                new_id = rxn.id
+            else:
+                new_id = rxn.id + suffix
+            col = len(reactions)
+            for met, coefficient in rxn._metabolites.items():
+                if not balanced_growth and new_id != rxn.id:
+                    if met.compartment == shared_compartment:
+                        coefficient *= abundances[member_id]
+                rows.append(member_rows[met])
+                cols.append(col)
+                coefficients.append(coefficient)
+            if rxn in objective:
+                rows.append(biomass_row)
+                cols.append(col)
+                coefficients.append(objective[rxn])
+            new_rxn = cobra.Reaction(
+                new_id,
+                name=rxn.name,
+                subsystem=rxn.subsystem,
+                lower_bound=rxn.lower_bound,
+                upper_bound=rxn.upper_bound,
+            )
+            reactions.append(new_rxn)
+            if rxn.gpr.body is None:
+                gprs.append(cobra.core.gene.GPR())
+                continue
+            gpr = rxn.gpr.copy()
+            for node in ast.walk(gpr):
+                if isinstance(node, ast.Name):
+                    node.id += suffix
+            gprs.append(gpr)
+        genes.extend(
+            cobra.Gene(gene.id + suffix, name=gene.name) for gene in model.genes
+        )
+
+    compartments["community"] = "Community"
+    if not balanced_growth:
+        community_biomass_row = len(metabolites)
+        metabolites.append(
+            cobra.Metabolite(
+                "biomass", name="Community biomass", compartment="community"
+            )
+        )
+        for member_id in members:
+            member_growth = cobra.Reaction(
+                f"growth_{member_id}", name=f"{member_id} growth", lower_bound=0
+            )
+            rows += [met_rows[f"biomass_{member_id}"], community_biomass_row]
+            cols += [len(reactions)] * 2
+            coefficients += [-1, abundances[member_id]]
+            reactions.append(member_growth)
+            gprs.append(member_growth.gpr)
+    growth = cobra.Reaction("community_growth", name="Community growth", lower_bound=0)
+    if balanced_growth:
+        for member_id in members:
+            rows.append(met_rows[f"biomass_{member_id}"])
+            cols.append(len(reactions))
+            coefficients.append(-abundances[member_id])
+    else:
+        rows.append(community_biomass_row)
+        cols.append(len(reactions))
+        coefficients.append(-1)
+    reactions.append(growth)
+    gprs.append(growth.gpr)
+
+    stoichiometry = sparse.coo_matrix(
+        (coefficients, (rows, cols)),
+        shape=(len(metabolites), len(reactions)),
+    )
+    _push_to_model(community, metabolites, reactions, gprs, genes, stoichiometry)
+    community.compartments = compartments
+    community.objective = growth
+    return community
+
+
+def _push_to_model(
+    model: Model,
+    metabolites: list[Metabolite],
+    reactions: list[Reaction],
+    gprs: list,
+    genes: list[Gene],
+    stoichiometry: sparse.coo_matrix,
+) -> None:
+    """Add metabolites, reactions and genes to an empty model in bulk."""
+    by_reaction = stoichiometry.tocsc()
+    for j, rxn in enumerate(reactions):
+        start, end = by_reaction.indptr[j], by_reaction.indptr[j + 1]
+        rxn._metabolites = {
+            metabolites[i]: float(coefficient)
+            for i, coefficient in zip(
+                by_reaction.indices[start:end], by_reaction.data[start:end]
+            )
+        }
+        for met in rxn._metabolites:
+            met._reaction.add(rxn)
+        rxn._model = model
+
+    model.add_metabolites(metabolites)
+    for gene in genes:
+        gene._model = model
+    model.genes += genes
+    model.reactions += reactions
+    variables = []
+    for rxn in reactions:
+        (forward_lb, forward_ub), (reverse_lb, reverse_ub) = _get_variable_bounds(
+            rxn.lower_bound, rxn.upper_bound
+        )
+        variables.append(model.problem.Variable(rxn.id, lb=forward_lb, ub=forward_ub))
+        variables.append(
+            model.problem.Variable(rxn.reverse_id, lb=reverse_lb, ub=reverse_ub)
+        )
+    model.add_cons_vars(variables)
+    model.solver.update()
+
+    by_metabolite = stoichiometry.tocsr()
+    constraints = model.solver.constraints
+    for i, met in enumerate(metabolites):
+        start, end = by_metabolite.indptr[i], by_metabolite.indptr[i + 1]
+        terms = {}
+        for j, coefficient in zip(
+            by_metabolite.indices[start:end], by_metabolite.data[start:end]
+        ):
+            terms[variables[2 * j]] = coefficient
+            terms[variables[2 * j + 1]] = -coefficient
+        constraints[met.id].set_linear_coefficients(terms)
+
+    for rxn, gpr in zip(reactions, gprs):
+        rxn._gpr = gpr
+        rxn.update_genes_from_gpr()
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from cobra import Metabolite
+
+import phycogem.reconstruction_helpers as helpers
+
+
+class ElementMatrix:
+    """Memoized metabolite x element count matrix.
+
+    Rows are indexed by metabolite ID and columns by chemical element. Formulas
+    are parsed only once: calling update again only re-parses metabolites
+    whose formula changed since the last call (e.g. after compound annotation).
+    """
+
+    def __init__(self):
+        self._met_index = {}
+        self._formulas = []
+        self._elements = {}
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+        self._has_formula = np.zeros(0, dtype=bool)
+
+    @property
+    def elements(self) -> list[str]:
+        """Return chemical elements in column order."""
+        return list(self._elements)
+
+    @property
+    def metabolite_ids(self) -> list[str]:
+        """Return metabolite IDs in row order."""
+        return list(self._met_index)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Return metabolite x element count matrix."""
+        return self._counts[: len(self._met_index), : len(self._elements)]
+
+    def _reserve(self, n_rows: int, n_columns: int) -> None:
+        rows, columns = self._counts.shape
+        if n_rows <= rows and n_columns <= columns:
+            return
+        new_rows = max(n_rows, 2 * rows) if n_rows > rows else rows
+        new_columns = max(n_columns, 2 * columns) if n_columns > columns else columns
+        counts = np.zeros((new_rows, new_columns), dtype=np.int64)
+        counts[:rows, :columns] = self._counts
+        has_formula = np.zeros(new_rows, dtype=bool)
+        has_formula[:rows] = self._has_formula
+        self._counts, self._has_formula = counts, has_formula
+
+    def _set_row(self, row: int, formula: str | None) -> None:
+        self._counts[row, :] = 0
+        self._has_formula[row] = formula is not None
+        if formula is None:
+            return
+        chemical_elements = helpers.extract_chemical_elements(formula)
+        new_elements = [e for e in chemical_elements if e not in self._elements]
+        if new_elements:
+            self._reserve(
+                self._counts.shape[0], len(self._elements) + len(new_elements)
+            )
+            for element in new_elements:
+                self._elements[element] = len(self._elements)
+        for element, count in chemical_elements.items():
+            self._counts[row, self._elements[element]] = count
+
+    def update(self, metabolites: Iterable[Metabolite]) -> None:
+        """Add new metabolites and refresh rows whose formula changed.
+
+        Args:
+            metabolites (Iterable[Metabolite]): cobra metabolites.
+        """
+        for met in metabolites:
+            row = self._met_index.get(met.id)
+            if row is None:
+                row = len(self._met_index)
+                self._reserve(row + 1, len(self._elements))
+                self._met_index[met.id] = row
+                self._formulas.append(met.formula)
+                self._set_row(row, met.formula)
+            elif self._formulas[row] != met.formula:
+                self._formulas[row] = met.formula
+                self._set_row(row, met.formula)
+
+    def rows(self, met_ids: Iterable[str]) -> np.ndarray:
+        """Get row indices of metabolites.
+
+        Args:
+            met_ids (Iterable[str]): metabolite IDs.
+
+        Returns:
+            np.ndarray: row indices.
+        """
+        return np.fromiter(
+            (self._met_index[met_id] for met_id in met_ids), dtype=np.int64
+        )
+
+    def _column(self, element: str, rows: np.ndarray) -> np.ndarray:
+        if element not in self._elements:
+            return np.zeros(len(rows), dtype=np.int64)
+        return self._counts[rows, self._elements[element]]
+
+    def _matches(self, rows: np.ndarray, composition: dict) -> np.ndarray:
+        counts = self.counts[rows]
+        mask = (counts != 0).sum(axis=1) == len(composition)
+        for element, count in composition.items():
+            mask &= self._column(element, rows) == count
+        return mask
+
+    def has_formula(self, rows: np.ndarray) -> np.ndarray:
+        """Return mask of metabolites with a defined chemical formula."""
+        return self._has_formula[rows]
+
+    def contains(self, element: str, rows: np.ndarray) -> np.ndarray:
+        """Return mask of metabolites containing a chemical element."""
+        return self._column(element, rows) > 0
+
+    def is_co2(self, rows: np.ndarray) -> np.ndarray:
+        """Return mask of metabolites with CO2 composition."""
+        return self._matches(rows, {"C": 1, "O": 2})
+
+    def is_hco3(self, rows: np.ndarray) -> np.ndarray:
+        """Return mask of metabolites with HCO3- composition."""
+        return self._matches(rows, {"C": 1, "H": 1, "O": 3})
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+from phycogem.cache import hash_file
+from phycogem.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+COMPOUND_COLUMNS = ["name", "formula", "charge", "inorganic"]
+
+_SCHEMA = """
+CREATE TABLE compounds (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    formula TEXT,
+    charge REAL,
+    inorganic INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE sources (kind TEXT PRIMARY KEY, sha256 TEXT NOT NULL);
+"""
+
+
+def _get_source_hashes(sources: dict[str, Path]) -> dict[str, str]:
+    return {kind: hash_file(path) for kind, path in sources.items() if path is not None}
+
+
+def _to_nullable(column: pd.Series) -> pd.Series:
+    return column.astype(object).where(column.notna(), None)
+
+
+class CompoundDB:
+    """Indexed on-disk knowledge base of compounds, stored as SQLite.
+
+    Merges compound names (BiGG metabolites JSON), formulae and charges (MNX
+    compounds TSV) and the list of inorganic compounds into a single table
+    indexed by compound ID, i.e., metabolite ID without compartment suffix.
+    Lookups are batched: query IDs are joined with the table in one SQL
+    query, instead of one lookup per compound.
+    """
+
+    def __init__(self, db_file: Path):
+        """
+        Args:
+            db_file (Path): path to SQLite file, see CompoundDB.build.
+        """
+        self._db_file = Path(db_file)
+        if not self._db_file.is_file():
+            raise FileNotFoundError(f"Compound database {db_file} not found.")
+        self._connection = None
+
+    def __getstate__(self) -> dict:
+        return {"_db_file": self._db_file, "_connection": None}
+
+    @property
+    def db_file(self) -> Path:
+        """Return path to SQLite file."""
+        return self._db_file
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Return (read-only) connection to the database."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                f"{self._db_file.resolve().as_uri()}?mode=ro", uri=True
+            )
+        return self._connection
+
+    @classmethod
+    def build(
+        cls,
+        db_file: Path,
+        bigg_metabolites: Path = None,
+        mnx_compounds: Path = None,
+        inorganic: Path = None,
+        overwrite: bool = False,
+    ) -> CompoundDB:
+        """Build the database from source files, unless already built.
+
+        The hashes of the source files are stored in the database, so that an
+        existing database is reused as long as its sources are unchanged.
+
+        Args:
+            db_file (Path): path to output SQLite file.
+            bigg_metabolites (Path, optional): BiGG metabolites JSON file, with
+                names of compounds. Defaults to None.
+            mnx_compounds (Path, optional): TSV file with formula and charge
+                of compounds, indexed by compound ID. Defaults to None.
+            inorganic (Path, optional): text file with IDs of inorganic
+                compounds, one per line. Defaults to None.
+            overwrite (bool, optional): rebuild even if the sources are
+                unchanged. Defaults to False.
+
+        Returns:
+            CompoundDB: compound database.
+        """
+        db_file = Path(db_file)
+        source_hashes = _get_source_hashes(
+            {"bigg": bigg_metabolites, "mnx": mnx_compounds, "inorganic": inorganic}
+        )
+        if not overwrite and db_file.is_file():
+            compound_db = cls(db_file)
+            if compound_db.source_hashes == source_hashes:
+                return compound_db
+            compound_db.close()
+
+        tmp_file = db_file.with_name(f"{db_file.name}.{os.getpid()}.tmp")
+        tmp_file.unlink(missing_ok=True)
+        connection = sqlite3.connect(tmp_file)
+        try:
+            with connection:
+                connection.executescript(_SCHEMA)
+                if bigg_metabolites is not None:
+                    with open(bigg_metabolites) as f:
+                        entries = json.load(f)["results"]
+                    connection.executemany(
+                        "INSERT INTO compounds (id, name) VALUES (?, ?) "
+                        "ON CONFLICT (id) DO UPDATE SET name = excluded.name",
+                        ((entry["bigg_id"], entry["name"]) for entry in entries),
+                    )
+                if mnx_compounds is not None:
+                    table = pd.read_csv(mnx_compounds, sep="\t", index_col=0)
+                    table = table[~table.index.duplicated()]
+                    connection.executemany(
+                        "INSERT INTO compounds (id, formula, charge) VALUES (?, ?, ?) "
+                        "ON CONFLICT (id) DO UPDATE SET "
+                        "formula = excluded.formula, charge = excluded.charge",
+                        zip(
+                            table.index.astype(str),
+                            _to_nullable(table["formula"]),
+                            _to_nullable(table["charge"].astype(float)),
+                        ),
+                    )
+                if inorganic is not None:
+                    with open(inorganic) as f:
+                        compound_ids = [line.strip() for line in f if line.strip()]
+                    connection.executemany(
+                        "INSERT INTO compounds (id, inorganic) VALUES (?, 1) "
+                        "ON CONFLICT (id) DO UPDATE SET inorganic = 1",
+                        ((compound_id,) for compound_id in compound_ids),
+                    )
+                connection.executemany(
+                    "INSERT INTO sources VALUES (?, ?)", source_hashes.items()
+                )
+        finally:
+            connection.close()
+        os.replace(tmp_file, db_file)
+        return cls(db_file)
+
+    @property
+    def source_hashes(self) -> dict[str, str]:
+        """Return SHA-256 hashes of the source files, by kind of source."""
+        return dict(self.connection.execute("SELECT kind, sha256 FROM sources"))
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM compounds").fetchone()[0]
+
+    def lookup(self, compound_ids: list[str]) -> pd.DataFrame:
+        """Look up compounds by ID.
+
+        Args:
+            compound_ids (list[str]): compound IDs (without compartment).
+
+        Returns:
+            pd.DataFrame: name, formula, charge and inorganic (bool) of the
+                compounds found, indexed by compound ID, in query order.
+        """
+        connection = self.connection
+        connection.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS query "
+            "(position INTEGER PRIMARY KEY, id TEXT)"
+        )
+        try:
+            connection.executemany(
+                "INSERT INTO query VALUES (?, ?)",
+                enumerate(dict.fromkeys(map(str, compound_ids))),
+            )
+            rows = connection.execute(
+                "SELECT query.id, name, formula, charge, inorganic "
+                "FROM query JOIN compounds ON compounds.id = query.id "
+                "ORDER BY position"
+            ).fetchall()
+        finally:
+            connection.execute("DELETE FROM query")
+        table = pd.DataFrame(rows, columns=["id"] + COMPOUND_COLUMNS).set_index("id")
+        table["inorganic"] = table["inorganic"].astype(bool)
+        return table
+
+    def get_names(self, compound_ids: list[str]) -> dict[str, str]:
+        """Get names of compounds.
+
+        Args:
+            compound_ids (list[str]): compound IDs (without compartment).
+
+        Returns:
+            dict[str, str]: names of the compounds found, keyed by ID.
+        """
+        names = self.lookup(compound_ids)["name"].dropna()
+        return names.to_dict()
+
+
+def read_annotations(
+    cpd_annotations: Path | CompoundDB, compound_ids: list[str]
+) -> pd.DataFrame:
+    """Read formula and charge of compounds.
+
+    Args:
+        cpd_annotations (Path | CompoundDB): compound database, or TSV file
+            with formula and charge columns, indexed by compound ID.
+        compound_ids (list[str]): compound IDs (without compartment).
+
+    Returns:
+        pd.DataFrame: formula and charge of the annotated compounds, indexed
+            by (unique) compound ID.
+    """
+    if isinstance(cpd_annotations, CompoundDB):
+        table = cpd_annotations.lookup(compound_ids)
+        table = table[table["formula"].notna()]
+    else:
+        table = pd.read_csv(cpd_annotations, sep="\t", index_col=0)
+        table = table[~table.index.duplicated()]
+    return table[["formula", "charge"]]
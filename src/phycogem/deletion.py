@@ -0,0 +1,446 @@
+from __future__ import annotations
+
+import ast
+from itertools import combinations_with_replacement
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+import phycogem.bulk as bulk
+from phycogem.flux_analysis import get_fluxes
+from phycogem.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from cobra import Model, Reaction
+
+cobra = lazy_import("cobra")
+pd = lazy_import("pandas")
+sparse = lazy_import("scipy.sparse")
+
+_worker_model = None
+
+
+def _init_worker(model: Model) -> None:
+    """Store model in a global variable of the worker process."""
+    global _worker_model
+    _worker_model = model
+
+
+class CompiledGPR:
+    """Gene-protein-reaction rules of a model, compiled into a boolean circuit.
+
+    Every GPR is parsed once into nodes shared among all reactions: genes,
+    followed by AND/OR nodes sorted by depth. Each depth level is stored as a
+    sparse nodes x children matrix, so that the rules of all reactions are
+    evaluated for a whole batch of knockouts with one sparse product per
+    level, instead of evaluating each rule for each knockout.
+    """
+
+    def __init__(self, reactions: list[Reaction], gene_ids: list[str] = ()):
+        """
+        Args:
+            reactions (list[Reaction]): cobra reactions.
+            gene_ids (list[str], optional): IDs of genes, in the order of the
+                gene columns. Genes found only in the rules are appended.
+                Defaults to ().
+        """
+        self._gene_index = {gene_id: i for i, gene_id in enumerate(gene_ids)}
+        self._reaction_ids = [rxn.id for rxn in reactions]
+        nodes, self._node_index = [], {}
+
+        def compile_node(node: ast.AST) -> tuple[str, int]:
+            if isinstance(node, ast.Expression):
+                return compile_node(node.body)
+            if isinstance(node, ast.Name):
+                return "gene", self._gene_index.setdefault(
+                    node.id, len(self._gene_index)
+                )
+            if isinstance(node, ast.BoolOp) and isinstance(node.op, (ast.And, ast.Or)):
+                children = frozenset(compile_node(value) for value in node.values)
+                key = (type(node.op).__name__, children)
+                if key not in self._node_index:
+                    self._node_index[key] = len(nodes)
+                    nodes.append(key)
+                return "node", self._node_index[key]
+            raise TypeError(f"Unsupported GPR element: {ast.dump(node)}")
+
+        roots = [
+            None if rxn.gpr.body is None else compile_node(rxn.gpr.body)
+            for rxn in reactions
+        ]
+        self._gene_ids = list(self._gene_index)
+        self._compile_levels(nodes)
+        self._reaction_columns = np.array(
+            [-1 if root is None else self._get_column(*root) for root in roots],
+            dtype=np.int64,
+        )
+
+    @classmethod
+    def from_model(cls, model: Model) -> CompiledGPR:
+        """Compile the GPRs of all reactions of a model.
+
+        Args:
+            model (Model): cobra model.
+
+        Returns:
+            CompiledGPR: compiled GPRs, with genes in model order.
+        """
+        return cls(model.reactions, [gene.id for gene in model.genes])
+
+    def _compile_levels(self, nodes: list[tuple[str, frozenset]]) -> None:
+        """Sort AND/OR nodes by depth and build one sparse matrix per level."""
+        depths = [0] * len(nodes)
+        for k, (_, children) in enumerate(nodes):
+            # Children are always compiled before their parents
+            depths[k] = 1 + max(
+                (depths[i] for kind, i in children if kind == "node"), default=0
+            )
+        order = sorted(range(len(nodes)), key=depths.__getitem__)
+        n_genes = len(self._gene_ids)
+        self._node_columns = np.empty(len(nodes), dtype=np.int64)
+        self._node_columns[order] = n_genes + np.arange(len(nodes))
+
+        self._levels = []
+        start = n_genes
+        for depth in sorted(set(depths)):
+            level = [k for k in order if depths[k] == depth]
+            rows, cols = [], []
+            for j, k in enumerate(level):
+                for kind, i in nodes[k][1]:
+                    rows.append(self._get_column(kind, i))
+                    cols.append(j)
+            children = sparse.csc_matrix(
+                (np.ones(len(rows)), (rows, cols)), shape=(start, len(level))
+            )
+            is_and = np.array([nodes[k][0] == "And" for k in level], dtype=bool)
+            self._levels.append((children, is_and))
+            start += len(level)
+        self._n_columns = start
+
+    def _get_column(self, kind: str, i: int) -> int:
+        return i if kind == "gene" else self._node_columns[i]
+
+    @property
+    def gene_ids(self) -> list[str]:
+        """Return IDs of genes, in column order."""
+        return self._gene_ids
+
+    @property
+    def reaction_ids(self) -> list[str]:
+        """Return IDs of reactions, in column order."""
+        return self._reaction_ids
+
+    def get_gene_indices(self, gene_ids: list[str]) -> np.ndarray:
+        """Return column indices of genes.
+
+        Args:
+            gene_ids (list[str]): gene IDs.
+
+        Returns:
+            np.ndarray: column indices.
+        """
+        return np.array([self._gene_index[gene_id] for gene_id in gene_ids], dtype=int)
+
+    def evaluate(self, gene_states: np.ndarray) -> np.ndarray:
+        """Evaluate the GPRs of all reactions for a batch of gene states.
+
+        Args:
+            gene_states (np.ndarray): knockouts x genes boolean array, False
+                for knocked-out genes.
+
+        Returns:
+            np.ndarray: knockouts x reactions boolean array, False for
+                reactions disabled by the knockout. Reactions without GPR
+                are never disabled.
+        """
+        gene_states = np.asarray(gene_states, dtype=bool)
+        values = np.empty((gene_states.shape[0], self._n_columns), dtype=float)
+        values[:, : len(self._gene_ids)] = gene_states
+        start = len(self._gene_ids)
+        for children, is_and in self._levels:
+            n_true = (children.T @ values[:, :start].T).T
+            n_children = np.diff(children.indptr)
+            values[:, start : start + len(is_and)] = np.where(
+                is_and, n_true == n_children, n_true > 0
+            )
+            start += len(is_and)
+        active = values[:, self._reaction_columns] > 0
+        active[:, self._reaction_columns < 0] = True
+        return active
+
+    def knock_out(self, knockouts: list[tuple[int, ...]]) -> np.ndarray:
+        """Find reactions disabled by each set of knocked-out genes.
+
+        Args:
+            knockouts (list[tuple[int, ...]]): sets of gene column indices.
+
+        Returns:
+            np.ndarray: knockouts x reactions boolean array, True for
+                disabled reactions.
+        """
+        gene_states = np.ones((len(knockouts), len(self._gene_ids)), dtype=bool)
+        for k, genes in enumerate(knockouts):
+            gene_states[k, list(genes)] = False
+        return ~self.evaluate(gene_states)
+
+
+def growth_of(
+    model: Model, reaction_sets: list[list[str]], support_ids: list[str] = ()
+) -> tuple[np.ndarray, np.ndarray]:
+    """Optimize model with each set of reactions disabled in turn.
+
+    Sets are solved sequentially on the same solver instance, so that each
+    solve is warm-started from the basis of the previous one. Bounds are
+    restored to their original values after each solve.
+
+    Args:
+        model (Model): cobra model.
+        reaction_sets (list[list[str]]): IDs of reactions disabled together.
+        support_ids (list[str], optional): IDs of reactions whose flux
+            support is returned. Defaults to ().
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: objective value for each set, NaN if
+            infeasible, and sets x support_ids boolean array, True for
+            reactions carrying flux in the solution.
+    """
+    support_reactions = [model.reactions.get_by_id(rxn_id) for rxn_id in support_ids]
+    growth = np.full(len(reaction_sets), np.nan)
+    support = np.zeros((len(reaction_sets), len(support_reactions)), dtype=bool)
+    for i, rxn_ids in enumerate(reaction_sets):
+        reactions = [model.reactions.get_by_id(rxn_id) for rxn_id in rxn_ids]
+        lower_bounds = [rxn.lower_bound for rxn in reactions]
+        upper_bounds = [rxn.upper_bound for rxn in reactions]
+        bulk.set_bounds(model, reactions, lower_bounds=0, upper_bounds=0)
+        try:
+            growth[i] = model.slim_optimize(error_value=np.nan)
+            if not np.isnan(growth[i]):
+                support[i] = np.abs(get_fluxes(support_reactions)) > model.tolerance
+        finally:
+            bulk.set_bounds(model, reactions, lower_bounds, upper_bounds)
+    return growth, support
+
+
+def _growth_worker(args: tuple) -> tuple[int, np.ndarray, np.ndarray]:
+    chunk_id, reaction_sets, support_ids = args
+    return chunk_id, *growth_of(_worker_model, reaction_sets, support_ids)
+
+
+def _solve(
+    model: Model,
+    reaction_sets: list[list[str]],
+    support_ids: list[str],
+    processes: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Run growth_of, splitting reaction sets among worker processes."""
+    processes = max(1, min(processes, len(reaction_sets)))
+    if processes == 1:
+        return growth_of(model, reaction_sets, support_ids)
+    chunk_size = -(-len(reaction_sets) // (4 * processes))
+    chunks = [
+        reaction_sets[i : i + chunk_size]
+        for i in range(0, len(reaction_sets), chunk_size)
+    ]
+    chunk_results = [None] * len(chunks)
+    with cobra.util.ProcessPool(
+        processes, initializer=_init_worker, initargs=(model,)
+    ) as pool:
+        for chunk_id, *chunk_result in pool.imap_unordered(
+            _growth_worker,
+            [(chunk_id, chunk, support_ids) for chunk_id, chunk in enumerate(chunks)],
+        ):
+            chunk_results[chunk_id] = chunk_result
+    growth, support = zip(*chunk_results)
+    return np.concatenate(growth), np.vstack(support)
+
+
+def _screen(
+    model: Model,
+    gprs: CompiledGPR,
+    knockouts: list[tuple[int, ...]],
+    parents: np.ndarray,
+    parent_growth: np.ndarray,
+    parent_support: np.ndarray,
+    processes: int,
+    chunk_size: int,
+    support: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute objective values of knockouts, reusing solutions of parents.
+
+    A parent is a knockout of a subset of the genes, e.g., the wild type. If
+    no reaction disabled by the knockout carries flux in the solution of one
+    of its parents, that solution stays optimal and no LP is solved. Other
+    knockouts disabling the same reactions share a single LP.
+
+    Args:
+        parents (np.ndarray): knockouts x parents array of indices of the
+            parent solutions of each knockout.
+        parent_growth (np.ndarray): objective values of parent solutions.
+        parent_support (np.ndarray): parent solutions x reactions boolean
+            array, True for reactions carrying flux.
+        support (bool, optional): return flux support of the solution of each
+            knockout. Defaults to False.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: objective value for each knockout and,
+            if support, knockouts x reactions flux support.
+    """
+    reactions = model.reactions.get_by_any(gprs.reaction_ids)
+    can_carry_flux = np.array(
+        [rxn.lower_bound != 0 or rxn.upper_bound != 0 for rxn in reactions]
+    )
+    rxn_ids = np.asarray(gprs.reaction_ids, dtype=object)
+    solution = np.empty(len(knockouts), dtype=np.int64)
+    reaction_sets, set_index = [], {}
+    for start in range(0, len(knockouts), chunk_size):
+        stop = min(start + chunk_size, len(knockouts))
+        disabled = gprs.knock_out(knockouts[start:stop]) & can_carry_flux
+        # Solutions of parents are indexed first, then those of new LPs
+        pending = np.ones(stop - start, dtype=bool)
+        for column in parents[start:stop].T:
+            kept = pending & ~(disabled & parent_support[column]).any(axis=1)
+            solution[start:stop][kept] = column[kept]
+            pending &= ~kept
+        for k in np.flatnonzero(pending):
+            key = np.packbits(disabled[k]).tobytes()
+            if key not in set_index:
+                set_index[key] = len(reaction_sets)
+                reaction_sets.append(list(rxn_ids[disabled[k]]))
+            solution[start + k] = len(parent_growth) + set_index[key]
+
+    lp_growth, lp_support = _solve(
+        model, reaction_sets, gprs.reaction_ids if support else [], processes
+    )
+    growth = np.concatenate([parent_growth, lp_growth])[solution]
+    if not support:
+        return growth, None
+    return growth, np.vstack([parent_support, lp_support])[solution]
+
+
+def screen_knockouts(
+    model: Model,
+    knockouts: list[tuple[str, ...]],
+    processes: int = 1,
+    gprs: CompiledGPR = None,
+    chunk_size: int = 1024,
+) -> np.ndarray:
+    """Compute the objective value of the model for each set of gene knockouts.
+
+    Knockouts are mapped to disabled reactions in batches, with the compiled
+    GPRs. An LP is only solved for knockouts disabling a reaction that
+    carries flux in the wild-type solution, since the wild-type optimum is
+    kept otherwise. Knockouts of several genes are first checked in the same
+    way against the solutions of their single-gene deletions, and
+    knockouts disabling the same reactions share a single LP. Remaining LPs
+    are split among worker processes.
+
+    Args:
+        model (Model): cobra model.
+        knockouts (list[tuple[str, ...]]): sets of IDs of genes knocked out
+            together.
+        processes (int, optional): number of worker processes. Defaults to 1.
+        gprs (CompiledGPR, optional): compiled GPRs of the model. Defaults to
+            None (compiled from the model).
+        chunk_size (int, optional): number of knockouts evaluated together.
+            Defaults to 1024.
+
+    Returns:
+        np.ndarray: objective value for each knockout, NaN if infeasible.
+    """
+    if gprs is None:
+        gprs = CompiledGPR.from_model(model)
+    wild_type = model.slim_optimize(error_value=np.nan)
+    if np.isnan(wild_type):
+        return np.full(len(knockouts), np.nan)
+    reactions = model.reactions.get_by_any(gprs.reaction_ids)
+    parent_growth = np.array([wild_type])
+    parent_support = (np.abs(get_fluxes(reactions)) > model.tolerance)[np.newaxis]
+
+    knockouts = [tuple(gprs.get_gene_indices(gene_ids)) for gene_ids in knockouts]
+    genes = sorted({gene for genes in knockouts if len(genes) > 1 for gene in genes})
+    if genes:
+        single_growth, single_support = _screen(
+            model,
+            gprs,
+            [(gene,) for gene in genes],
+            np.zeros((len(genes), 1), dtype=np.int64),
+            parent_growth,
+            parent_support,
+            processes,
+            chunk_size,
+            support=True,
+        )
+        parent_growth = np.concatenate([parent_growth, single_growth])
+        parent_support = np.vstack([parent_support, single_support])
+
+    # Parents of each knockout: the wild type and its single-gene deletions
+    single_index = {gene: 1 + i for i, gene in enumerate(genes)}
+    max_genes = max((len(genes) for genes in knockouts), default=0)
+    parents = np.zeros((len(knockouts), 1 + max_genes), dtype=np.int64)
+    for k, genes in enumerate(knockouts):
+        if len(genes) > 1:
+            parents[k, 1 : 1 + len(genes)] = [single_index[gene] for gene in genes]
+    growth, _ = _screen(
+        model,
+        gprs,
+        knockouts,
+        parents,
+        parent_growth,
+        parent_support,
+        processes,
+        chunk_size,
+    )
+    return growth
+
+
+def single_gene_deletion(
+    model: Model, gene_ids: list[str] = None, processes: int = 1
+) -> pd.Series:
+    """Compute the objective value of the model after deleting each gene.
+
+    Args:
+        model (Model): cobra model.
+        gene_ids (list[str], optional): IDs of genes to delete. Defaults to
+            None (all genes).
+        processes (int, optional): number of worker processes. Defaults to 1.
+
+    Returns:
+        pd.Series: objective value indexed by gene ID, NaN if infeasible.
+    """
+    if gene_ids is None:
+        gene_ids = [gene.id for gene in model.genes]
+    growth = screen_knockouts(
+        model, [(gene_id,) for gene_id in gene_ids], processes=processes
+    )
+    return pd.Series(growth, index=pd.Index(gene_ids, name="gene"), name="growth")
+
+
+def double_gene_deletion(
+    model: Model, gene_ids: list[str] = None, processes: int = 1
+) -> pd.DataFrame:
+    """Compute the objective value of the model after deleting each gene pair.
+
+    Args:
+        model (Model): cobra model.
+        gene_ids (list[str], optional): IDs of genes to delete. Defaults to
+            None (all genes).
+        processes (int, optional): number of worker processes. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: symmetric genes x genes matrix of objective values,
+            NaN if infeasible. The diagonal holds single deletions.
+    """
+    if gene_ids is None:
+        gene_ids = [gene.id for gene in model.genes]
+    pairs = list(combinations_with_replacement(range(len(gene_ids)), 2))
+    growth = screen_knockouts(
+        model,
+        [(gene_ids[i], gene_ids[j]) for i, j in pairs],
+        processes=processes,
+    )
+    matrix = np.empty((len(gene_ids), len(gene_ids)))
+    rows, cols = np.array(pairs, dtype=int).reshape(-1, 2).T
+    matrix[rows, cols] = growth
+    matrix[cols, rows] = growth
+    index = pd.Index(gene_ids, name="gene")
+    return pd.DataFrame(matrix, index=index, columns=index)
@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from phycogem.lazy import lazy_import
+from phycogem.stoichiometry import StoichiometricMatrix
+
+if TYPE_CHECKING:
+    from cobra import Model, Reaction
+    from scipy import sparse
+
+cobra = lazy_import("cobra")
+optlang = lazy_import("optlang")
+pd = lazy_import("pandas")
+
+_worker_model = None
+
+
+def _init_worker(model: Model) -> None:
+    """Store model in a global variable of the worker process."""
+    global _worker_model
+    _worker_model = model
+
+
+def get_fluxes(reactions: list[Reaction]) -> np.ndarray:
+    """Read net fluxes of reactions from the last solver call.
+
+    Reads solver primals directly, which avoids building a cobra Solution.
+
+    Args:
+        reactions (list[Reaction]): cobra reactions.
+
+    Returns:
+        np.ndarray: net fluxes.
+    """
+    return np.fromiter(
+        (
+            rxn.forward_variable.primal - rxn.reverse_variable.primal
+            for rxn in reactions
+        ),
+        dtype=float,
+        count=len(reactions),
+    )
+
+
+def scan_points(
+    model: Model,
+    reaction_ids: list[str],
+    values: np.ndarray,
+    flux_ids: list[str],
+    bound: str = "lower_bound",
+) -> np.ndarray:
+    """Optimize model for each point of a grid of bound assignments.
+
+    Points are solved sequentially on the same solver instance, so that each
+    solve is warm-started from the basis of the previous one. Bounds are
+    restored to their original values afterwards.
+
+    Args:
+        model (Model): cobra model.
+        reaction_ids (list[str]): IDs of reactions whose bound is set.
+        values (np.ndarray): points x reactions array of bound values.
+        flux_ids (list[str]): IDs of reactions whose flux is retrieved.
+        bound (str, optional): either "lower_bound" or "upper_bound".
+            Defaults to "lower_bound".
+
+    Returns:
+        np.ndarray: points x (1 + len(flux_ids)) array with objective values
+            followed by fluxes. Infeasible points are filled with NaN.
+    """
+    reactions = [model.reactions.get_by_id(rxn_id) for rxn_id in reaction_ids]
+    flux_reactions = [model.reactions.get_by_id(rxn_id) for rxn_id in flux_ids]
+    original_bounds = [rxn.bounds for rxn in reactions]
+    results = np.full((values.shape[0], 1 + len(flux_reactions)), np.nan)
+    try:
+        for i, point in enumerate(values):
+            for rxn, value in zip(reactions, point):
+                setattr(rxn, bound, value)
+            objective_value = model.slim_optimize(error_value=np.nan)
+            if np.isnan(objective_value):
+                continue
+            results[i, 0] = objective_value
+            results[i, 1:] = get_fluxes(flux_reactions)
+    finally:
+        for rxn, bounds in zip(reactions, original_bounds):
+            rxn.bounds = bounds
+    return results
+
+
+def _scan_worker(args: tuple) -> tuple[int, np.ndarray]:
+    chunk_id, reaction_ids, values, flux_ids, bound = args
+    return chunk_id, scan_points(_worker_model, reaction_ids, values, flux_ids, bound)
+
+
+def scan(
+    model: Model,
+    grid: pd.DataFrame,
+    flux_ids: list[str] = None,
+    bound: str = "lower_bound",
+    processes: int = 1,
+) -> pd.DataFrame:
+    """Optimize model over a grid of bound assignments.
+
+    Args:
+        model (Model): cobra model.
+        grid (pd.DataFrame): points x reactions table of bound values, columns
+            are reaction IDs.
+        flux_ids (list[str], optional): IDs of reactions whose flux is
+            retrieved. Defaults to None, only objective values are returned.
+        bound (str, optional): either "lower_bound" or "upper_bound".
+            Defaults to "lower_bound".
+        processes (int, optional): number of processes among which grid points
+            are split. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: objective value and selected fluxes indexed by grid point.
+    """
+    if bound not in ("lower_bound", "upper_bound"):
+        raise ValueError("bound must be either 'lower_bound' or 'upper_bound'.")
+    flux_ids = [] if flux_ids is None else list(flux_ids)
+    reaction_ids = list(grid.columns)
+    values = grid.to_numpy(dtype=float)
+    processes = max(1, min(processes, len(values)))
+    if processes == 1:
+        results = scan_points(model, reaction_ids, values, flux_ids, bound)
+    else:
+        chunks = np.array_split(values, processes)
+        tasks = [
+            (i, reaction_ids, chunk, flux_ids, bound) for i, chunk in enumerate(chunks)
+        ]
+        chunk_results = [None] * len(chunks)
+        with cobra.util.ProcessPool(
+            processes, initializer=_init_worker, initargs=(model,)
+        ) as pool:
+            for chunk_id, chunk_result in pool.imap_unordered(_scan_worker, tasks):
+                chunk_results[chunk_id] = chunk_result
+        results = np.vstack(chunk_results)
+    if len(reaction_ids) == 1:
+        index = pd.Index(grid.iloc[:, 0], name=reaction_ids[0])
+    else:
+        index = pd.MultiIndex.from_frame(grid)
+    return pd.DataFrame(results, index=index, columns=["objective"] + flux_ids)
+
+
+def _prepare_fva(model: Model, fraction_of_optimum: float) -> None:
+    """Constrain the objective to a fraction of its optimum and set it to zero.
+
+    Args:
+        model (Model): cobra model, modified in place.
+        fraction_of_optimum (float): fraction of the optimum the original
+            objective must attain.
+    """
+    model.slim_optimize(
+        error_value=None,
+        message="There is no optimal solution for the chosen objective!",
+    )
+    optimum = fraction_of_optimum * model.solver.objective.value
+    if model.solver.objective.direction == "max":
+        old_objective = model.problem.Variable("fva_old_objective", lb=optimum)
+    else:
+        old_objective = model.problem.Variable("fva_old_objective", ub=optimum)
+    old_objective_constraint = model.problem.Constraint(
+        model.solver.objective.expression - old_objective,
+        lb=0,
+        ub=0,
+        name="fva_old_objective_constraint",
+    )
+    model.add_cons_vars([old_objective, old_objective_constraint])
+    model.objective = optlang.symbolics.Zero
+
+
+def flux_ranges_of(model: Model, reaction_ids: list[str]) -> np.ndarray:
+    """Compute minimum and maximum flux of reactions in a prepared model.
+
+    Args:
+        model (Model): cobra model with a zero objective (see _prepare_fva).
+        reaction_ids (list[str]): reaction IDs.
+
+    Returns:
+        np.ndarray: reactions x 2 array of minimum and maximum fluxes.
+            Failed solves are filled with NaN.
+    """
+    reactions = [model.reactions.get_by_id(rxn_id) for rxn_id in reaction_ids]
+    flux_ranges = np.full((len(reactions), 2), np.nan)
+    for column, direction in enumerate(("min", "max")):
+        model.solver.objective.direction = direction
+        for i, rxn in enumerate(reactions):
+            model.solver.objective.set_linear_coefficients(
+                {rxn.forward_variable: 1, rxn.reverse_variable: -1}
+            )
+            flux_ranges[i, column] = model.slim_optimize(error_value=np.nan)
+            model.solver.objective.set_linear_coefficients(
+                {rxn.forward_variable: 0, rxn.reverse_variable: 0}
+            )
+    return flux_ranges
+
+
+def _init_fva_worker(model: Model, fraction_of_optimum: float) -> None:
+    _init_worker(model)
+    _prepare_fva(_worker_model, fraction_of_optimum)
+
+
+def _fva_worker(args: tuple) -> tuple[int, list[str], np.ndarray, float]:
+    chunk_id, reaction_ids = args
+    start = time.perf_counter()
+    flux_ranges = flux_ranges_of(_worker_model, reaction_ids)
+    return chunk_id, reaction_ids, flux_ranges, time.perf_counter() - start
+
+
+def get_model_fingerprint(model: Model) -> str:
+    """Hash reactions, stoichiometry, bounds and objective of a model.
+
+    Args:
+        model (Model): cobra model.
+
+    Returns:
+        str: hex digest, equal for models with the same constraints.
+    """
+    digest = hashlib.sha256(model.solver.objective.direction.encode())
+    for rxn in model.reactions:
+        stoichiometry = sorted(
+            (met.id, coefficient) for met, coefficient in rxn.metabolites.items()
+        )
+        digest.update(
+            repr(
+                (
+                    rxn.id,
+                    stoichiometry,
+                    rxn.lower_bound,
+                    rxn.upper_bound,
+                    rxn.objective_coefficient,
+                )
+            ).encode()
+        )
+    return digest.hexdigest()
+
+
+def _get_fva_metadata_file(checkpoint: Path) -> Path:
+    checkpoint = Path(checkpoint)
+    return checkpoint.with_name(f"{checkpoint.name}.json")
+
+
+def _read_fva_checkpoint(checkpoint: Path, metadata: dict) -> pd.DataFrame:
+    """Read finished flux ranges, checking they were computed with the same
+    model and settings.
+    """
+    if checkpoint is None or not Path(checkpoint).is_file():
+        return pd.DataFrame(columns=["minimum", "maximum"], dtype=float)
+    metadata_file = _get_fva_metadata_file(checkpoint)
+    previous_metadata = None
+    if metadata_file.is_file():
+        with open(metadata_file, "r") as f:
+            previous_metadata = json.load(f)
+    if previous_metadata != metadata:
+        raise ValueError(
+            f"Checkpoint {checkpoint} was created with a different model or "
+            "settings."
+        )
+    return pd.read_csv(checkpoint, sep="\t", index_col=0)
+
+
+def flux_variability(
+    model: Model,
+    reaction_ids: list[str] = None,
+    fraction_of_optimum: float = 1.0,
+    processes: int = 1,
+    chunk_size: int = 100,
+    checkpoint: Path = None,
+    verbose: bool = False,
+) -> pd.DataFrame:
+    """Run flux variability analysis in chunks of reactions.
+
+    Finished chunks are appended to a checkpoint file, if given. Rerunning with
+    the same checkpoint file only computes reactions that are not yet in it,
+    so an interrupted analysis can be resumed. The model fingerprint and
+    fraction_of_optimum are stored next to the checkpoint (as
+    <checkpoint>.json), and resuming with a different model or fraction
+    raises a ValueError.
+
+    Args:
+        model (Model): cobra model.
+        reaction_ids (list[str], optional): IDs of reactions to analyze.
+            Defaults to None (all reactions).
+        fraction_of_optimum (float, optional): fraction of the optimum the
+            objective must attain. Defaults to 1.0.
+        processes (int, optional): number of worker processes. Defaults to 1.
+        chunk_size (int, optional): number of reactions per chunk.
+            Defaults to 100.
+        checkpoint (Path, optional): tsv file storing finished chunks.
+            Defaults to None.
+        verbose (bool, optional): print progress and chunk timings.
+            Defaults to False.
+
+    Returns:
+        pd.DataFrame: minimum and maximum flux of each reaction.
+    """
+    if reaction_ids is None:
+        reaction_ids = [rxn.id for rxn in model.reactions]
+    metadata = {
+        "fraction_of_optimum": fraction_of_optimum,
+        "model": get_model_fingerprint(model),
+    }
+    finished = _read_fva_checkpoint(checkpoint, metadata)
+    pending_ids = [rxn_id for rxn_id in reaction_ids if rxn_id not in finished.index]
+    chunks = [
+        pending_ids[i : i + chunk_size] for i in range(0, len(pending_ids), chunk_size)
+    ]
+    if verbose and len(finished) > 0:
+        print(f"Resuming from checkpoint: {len(finished)} reactions already done.")
+
+    results = [finished]
+    write_header = checkpoint is not None and not Path(checkpoint).is_file()
+    if write_header:
+        with open(_get_fva_metadata_file(checkpoint), "w") as f:
+            json.dump(metadata, f)
+
+    def store_chunk(chunk_id, chunk_ids, flux_ranges, seconds, n_done):
+        nonlocal write_header
+        chunk_result = pd.DataFrame(
+            flux_ranges, index=pd.Index(chunk_ids), columns=["minimum", "maximum"]
+        )
+        results.append(chunk_result)
+        if checkpoint is not None:
+            chunk_result.to_csv(checkpoint, sep="\t", mode="a", header=write_header)
+            write_header = False
+        if verbose:
+            print(
+                f"Chunk {chunk_id + 1} ({len(chunk_ids)} reactions) done "
+                f"in {seconds:.2f} s [{n_done}/{len(chunks)}]"
+            )
+
+    processes = max(1, min(processes, len(chunks)))
+    tasks = list(enumerate(chunks))
+    if processes == 1:
+        with model:
+            _prepare_fva(model, fraction_of_optimum)
+            for n_done, (chunk_id, chunk_ids) in enumerate(tasks, start=1):
+                start = time.perf_counter()
+                flux_ranges = flux_ranges_of(model, chunk_ids)
+                seconds = time.perf_counter() - start
+                store_chunk(chunk_id, chunk_ids, flux_ranges, seconds, n_done)
+    else:
+        with cobra.util.ProcessPool(
+            processes,
+            initializer=_init_fva_worker,
+            initargs=(model, fraction_of_optimum),
+        ) as pool:
+            for n_done, chunk_result in enumerate(
+                pool.imap_unordered(_fva_worker, tasks), start=1
+            ):
+                store_chunk(*chunk_result, n_done)
+
+    flux_ranges = pd.concat(results)
+    flux_ranges.index.name = None
+    return flux_ranges.loc[reaction_ids]
+
+
+def find_dead_end_reactions(
+    model: Model, stoichiometry: sparse.csr_matrix = None
+) -> np.ndarray:
+    """Find reactions blocked by network topology and flux bounds alone.
+
+    A steady-state metabolite that can only be produced (or only consumed) by
+    the reactions that are not yet blocked forces all of them to carry zero
+    flux. Such reactions are removed iteratively until no dead-end metabolite
+    remains, using sparse matrix products over the stoichiometric matrix.
+
+    Args:
+        model (Model): cobra model.
+        stoichiometry (sparse.csr_matrix, optional): stoichiometric matrix of
+            the model, e.g. GEM.stoichiometry.matrix. Defaults to None (built
+            from the model).
+
+    Returns:
+        np.ndarray: boolean mask of blocked reactions, in model order.
+    """
+    if stoichiometry is None:
+        stoichiometry = StoichiometricMatrix.from_model(model).matrix
+    producing = (stoichiometry > 0).astype(np.int64)
+    consuming = (stoichiometry < 0).astype(np.int64)
+    involved = producing + consuming
+    lower_bounds = np.array([rxn.lower_bound for rxn in model.reactions])
+    upper_bounds = np.array([rxn.upper_bound for rxn in model.reactions])
+    steady_state = np.array(
+        [
+            model.constraints[met.id].lb == 0 and model.constraints[met.id].ub == 0
+            for met in model.metabolites
+        ]
+    )
+    blocked = (lower_bounds == 0) & (upper_bounds == 0)
+    while True:
+        forward = ((upper_bounds > 0) & ~blocked).astype(np.int64)
+        reverse = ((lower_bounds < 0) & ~blocked).astype(np.int64)
+        n_producers = producing @ forward + consuming @ reverse
+        n_consumers = consuming @ forward + producing @ reverse
+        dead_ends = steady_state & ((n_producers == 0) | (n_consumers == 0))
+        newly_blocked = (involved.T @ dead_ends.astype(np.int64) > 0) & ~blocked
+        if not newly_blocked.any():
+            return blocked
+        blocked |= newly_blocked
+
+
+def _find_flux_carrying(
+    model: Model, candidates: list[Reaction], zero_cutoff: float, epsilon: float
+) -> set[str]:
+    """Find candidate reactions able to carry flux with few batched LPs.
+
+    Following FASTCC, each LP maximizes the number of candidate reactions
+    carrying a flux of at least epsilon in a given direction. Reactions found
+    to carry flux are dropped from the next LP, until no new ones are found.
+    Both flux directions are explored.
+
+    Args:
+        model (Model): cobra model with a zero objective.
+        candidates (list[Reaction]): reactions to check.
+        zero_cutoff (float): flux below which a reaction is considered blocked.
+        epsilon (float): flux threshold rewarded in the LP objective.
+
+    Returns:
+        set[str]: IDs of reactions found to carry flux.
+    """
+    flux_carrying = set()
+    for sign in (1, -1):
+        pending = [
+            rxn
+            for rxn in candidates
+            if rxn.id not in flux_carrying
+            and (rxn.upper_bound > 0 if sign > 0 else rxn.lower_bound < 0)
+        ]
+        if not pending:
+            continue
+        with model:
+            rewards = {
+                rxn.id: model.problem.Variable(
+                    f"fastcc_z_{rxn.id}", lb=None, ub=epsilon
+                )
+                for rxn in pending
+            }
+            constraints = [
+                model.problem.Constraint(
+                    sign * rxn.flux_expression - rewards[rxn.id],
+                    lb=0,
+                    name=f"fastcc_c_{rxn.id}",
+                )
+                for rxn in pending
+            ]
+            model.add_cons_vars(list(rewards.values()) + constraints)
+            model.solver.objective.direction = "max"
+            while pending:
+                model.solver.objective.set_linear_coefficients(
+                    {rewards[rxn.id]: 1 for rxn in pending}
+                )
+                model.slim_optimize()
+                if model.solver.status != "optimal":
+                    break
+                found = [
+                    rxn
+                    for rxn, flux in zip(pending, get_fluxes(pending))
+                    if abs(flux) >= zero_cutoff
+                ]
+                if not found:
+                    break
+                flux_carrying.update(rxn.id for rxn in found)
+                model.solver.objective.set_linear_coefficients(
+                    {rewards[rxn.id]: 0 for rxn in found}
+                )
+                pending = [rxn for rxn in pending if rxn.id not in flux_carrying]
+            model.solver.objective.set_linear_coefficients(
+                {variable: 0 for variable in rewards.values()}
+            )
+    return flux_carrying
+
+
+def find_blocked_reactions(
+    model: Model, zero_cutoff: float = None, stoichiometry: sparse.csr_matrix = None
+) -> list[str]:
+    """Find reactions that cannot carry flux.
+
+    Returns the same reactions as cobra's find_blocked_reactions, but with far
+    fewer LPs: dead-end reactions are first removed with a sparse topology
+    pass, and the remaining candidates are checked with batched FASTCC-style
+    LPs. Only reactions that remain unresolved are checked one by one.
+
+    Args:
+        model (Model): cobra model.
+        zero_cutoff (float, optional): flux below which a reaction is
+            considered blocked. Defaults to None (model tolerance).
+        stoichiometry (sparse.csr_matrix, optional): stoichiometric matrix of
+            the model. Defaults to None (built from the model).
+
+    Returns:
+        list[str]: IDs of blocked reactions, in model order.
+    """
+    if zero_cutoff is None:
+        zero_cutoff = model.tolerance
+    dead_ends = find_dead_end_reactions(model, stoichiometry)
+    candidates = [rxn for rxn, dead in zip(model.reactions, dead_ends) if not dead]
+    with model:
+        _prepare_fva(model, 0.0)
+        flux_carrying = {
+            rxn.id
+            for rxn, flux in zip(candidates, get_fluxes(candidates))
+            if abs(flux) >= zero_cutoff
+        }
+        candidates = [rxn for rxn in candidates if rxn.id not in flux_carrying]
+        flux_carrying |= _find_flux_carrying(
+            model, candidates, zero_cutoff, epsilon=max(1e-3, 10 * zero_cutoff)
+        )
+        candidates = [rxn for rxn in candidates if rxn.id not in flux_carrying]
+        flux_ranges = flux_ranges_of(model, [rxn.id for rxn in candidates])
+    blocked = {
+        rxn.id
+        for rxn, flux_range in zip(candidates, flux_ranges)
+        if np.abs(flux_range).max() < zero_cutoff
+    }
+    return [
+        rxn.id
+        for rxn, dead in zip(model.reactions, dead_ends)
+        if dead or rxn.id in blocked
+    ]
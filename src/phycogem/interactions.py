@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from phycogem.cache import ModelCache, hash_file
+from phycogem.lazy import lazy_import
+from phycogem.media import load_media_db
+from phycogem.reconstruction import GEM
+
+if TYPE_CHECKING:
+    from cobra import Reaction
+
+cobra = lazy_import("cobra")
+pd = lazy_import("pandas")
+
+INTERACTION_COLUMNS = ["community", "medium", "receiver", "donor", "compound", "uptake"]
+
+
+def _get_exchange_compounds(gem: GEM) -> dict[str, Reaction]:
+    """Return exchange reactions of single metabolites, keyed by metabolite ID."""
+    return {
+        next(iter(rxn.metabolites)).id: rxn
+        for rxn in gem.model.exchanges
+        if len(rxn.metabolites) == 1
+    }
+
+
+def _get_direction(rxn: Reaction) -> int:
+    """Return sign of secretion flux of an exchange reaction."""
+    return 1 if rxn.reactants else -1
+
+
+def _get_max_uptake(rxn: Reaction) -> float:
+    return -rxn.lower_bound if rxn.reactants else rxn.upper_bound
+
+
+def _get_max_secretion(rxn: Reaction) -> float:
+    return rxn.upper_bound if rxn.reactants else -rxn.lower_bound
+
+
+def get_exchange_profile(
+    gem: GEM, fraction_of_optimum: float = 0.1, tolerance: float = 1e-6
+) -> dict:
+    """Compute which compounds a model takes up from and secretes to the medium.
+
+    Compounds in the medium are read from the exchange bounds, without solving.
+    Secretion is checked by maximizing each exchange while growing at least at
+    a fraction of the optimum. Exchanges whose bounds forbid secretion are not
+    solved, nor are exchanges already found secreting in a previous solution.
+
+    Args:
+        gem (GEM): GEM with its medium set.
+        fraction_of_optimum (float, optional): minimum growth, as a fraction
+            of the optimum. Defaults to 0.1.
+        tolerance (float, optional): minimum flux regarded as non-zero.
+            Defaults to 1e-6.
+
+    Returns:
+        dict: growth (optimal growth), exchanges (compound IDs), medium
+            (compounds that can be taken up) and secretion (compounds that can
+            be secreted).
+    """
+    model = gem.model
+    compounds = _get_exchange_compounds(gem)
+    profile = {
+        "growth": model.slim_optimize(error_value=np.nan),
+        "exchanges": sorted(compounds),
+        "medium": sorted(
+            met_id
+            for met_id, rxn in compounds.items()
+            if _get_max_uptake(rxn) > tolerance
+        ),
+        "secretion": [],
+    }
+    if np.isnan(profile["growth"]):
+        return profile
+
+    secreted = set()
+    with model:
+        cobra.util.solver.fix_objective_as_constraint(
+            model, bound=fraction_of_optimum * profile["growth"]
+        )
+        for met_id, rxn in compounds.items():
+            if met_id in secreted or _get_max_secretion(rxn) <= tolerance:
+                continue
+            model.objective = {rxn: _get_direction(rxn)}
+            if np.isnan(model.slim_optimize(error_value=np.nan)):
+                continue
+            secreted.update(
+                other_id
+                for other_id, other in compounds.items()
+                if _get_direction(other)
+                * (other.forward_variable.primal - other.reverse_variable.primal)
+                > tolerance
+            )
+    profile["secretion"] = sorted(secreted)
+    return profile
+
+
+def get_uptake_rates(
+    gem: GEM,
+    compound_ids: list[str],
+    minimum_growth: float = 0.0,
+    uptake_flux: float = 10.0,
+    tolerance: float = 1e-6,
+) -> dict[str, float]:
+    """Compute maximum uptake rates of compounds absent from the medium.
+
+    Each compound is made available, one at a time, and its uptake is
+    maximized while growing at least at a minimum rate.
+
+    Args:
+        gem (GEM): GEM with its medium set.
+        compound_ids (list[str]): IDs of exchanged compounds.
+        minimum_growth (float, optional): minimum growth. Defaults to 0.
+        uptake_flux (float, optional): uptake bound of the compound. Defaults
+            to 10.
+        tolerance (float, optional): minimum flux regarded as non-zero.
+            Defaults to 1e-6.
+
+    Returns:
+        dict[str, float]: uptake rates of the compounds that can be taken up.
+    """
+    model = gem.model
+    compounds = _get_exchange_compounds(gem)
+    uptake_rates = {}
+    with model:
+        cobra.util.solver.fix_objective_as_constraint(model, bound=minimum_growth)
+        for met_id in compound_ids:
+            rxn = compounds.get(met_id)
+            if rxn is None:
+                continue
+            bounds = rxn.bounds
+            if rxn.reactants:
+                rxn.lower_bound = -uptake_flux
+            else:
+                rxn.upper_bound = uptake_flux
+            model.objective = {rxn: -_get_direction(rxn)}
+            uptake = model.slim_optimize(error_value=np.nan)
+            rxn.bounds = bounds
+            if uptake > tolerance:
+                uptake_rates[met_id] = uptake
+    return uptake_rates
+
+
+def _get_signature(**kwargs) -> str:
+    text = json.dumps(kwargs, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class _ProfileStore:
+    """JSON files with exchange profiles, keyed by SBML hash and settings."""
+
+    def __init__(self, cache_dir: Path = None):
+        self._cache_dir = None if cache_dir is None else Path(cache_dir)
+        if self._cache_dir is not None:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_path(self, model_file: Path, signature: str) -> Path | None:
+        if self._cache_dir is None:
+            return None
+        return self._cache_dir / f"{hash_file(model_file)}_{signature}.json"
+
+    @staticmethod
+    def read(path: Path | None) -> dict | None:
+        if path is None or not path.is_file():
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            return None
+
+    @staticmethod
+    def write(path: Path | None, profile: dict) -> None:
+        if path is None:
+            return
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(profile, f)
+        os.replace(tmp_path, path)
+
+
+def _load_gem(model_file: Path, medium_id: str, media_db: Path, cache_dir: Path) -> GEM:
+    cache = None if cache_dir is None else ModelCache(Path(cache_dir) / "models")
+    gem = GEM(model_file, cache=cache)
+    if medium_id is not None:
+        gem.set_medium(medium_id, load_media_db(str(media_db)))
+    return gem
+
+
+def _profile_worker(args: tuple) -> tuple[str, dict]:
+    model_file, medium_id, media_db, cache_dir, signature, settings = args
+    store = _ProfileStore(cache_dir)
+    path = store.get_path(model_file, signature)
+    profile = store.read(path)
+    if profile is None:
+        gem = _load_gem(model_file, medium_id, media_db, cache_dir)
+        profile = get_exchange_profile(gem, **settings)
+        profile["uptake"] = {}
+        store.write(path, profile)
+    return Path(model_file).stem, profile
+
+
+def _uptake_worker(args: tuple) -> tuple[str, dict]:
+    (
+        model_file,
+        profile,
+        compound_ids,
+        medium_id,
+        media_db,
+        cache_dir,
+        signature,
+        settings,
+    ) = args
+    missing = [met_id for met_id in compound_ids if met_id not in profile["uptake"]]
+    if missing:
+        gem = _load_gem(model_file, medium_id, media_db, cache_dir)
+        growth = profile["growth"]
+        minimum_growth = (
+            0.0 if np.isnan(growth) else settings["fraction_of_optimum"] * growth
+        )
+        uptake_rates = get_uptake_rates(
+            gem,
+            missing,
+            minimum_growth=minimum_growth,
+            uptake_flux=settings["uptake_flux"],
+            tolerance=settings["tolerance"],
+        )
+        profile["uptake"].update(
+            {met_id: uptake_rates.get(met_id, 0.0) for met_id in missing}
+        )
+        store = _ProfileStore(cache_dir)
+        store.write(store.get_path(model_file, signature), profile)
+    return Path(model_file).stem, profile["uptake"]
+
+
+def _map(worker, args: list, processes: int) -> list:
+    if processes > 1 and len(args) > 1:
+        with cobra.util.ProcessPool(min(processes, len(args))) as pool:
+            return list(pool.imap_unordered(worker, args))
+    return [worker(arg) for arg in args]
+
+
+def screen_interactions(
+    model_files: list[Path],
+    medium_id: str = None,
+    media_db: Path = None,
+    cache_dir: Path = None,
+    processes: int = 1,
+    fraction_of_optimum: float = 0.1,
+    uptake_flux: float = 10.0,
+    tolerance: float = 1e-6,
+    output_file: Path = None,
+) -> pd.DataFrame:
+    """Screen metabolic exchanges among all pairs of models.
+
+    First, the exchange profile of each model in the medium is computed (see
+    get_exchange_profile). A compound is then a candidate exchange from a donor
+    to a receiver if the donor secretes it and the receiver has an exchange
+    for it but does not find it in the medium. Since candidates only depend on
+    profiles, LPs are only solved for the receiver uptake of candidate
+    compounds, once per receiver and compound (see get_uptake_rates).
+
+    Profiles and uptake rates are stored in cache_dir, keyed by the SBML
+    content hash and screening settings, so that screening a sample that
+    shares models with previous ones only solves the new models.
+
+    Args:
+        model_files (list[Path]): paths to SBML model files. Models are
+            identified by their file names without extension.
+        medium_id (str, optional): medium ID. Defaults to None (use the models'
+            current exchange bounds).
+        media_db (Path, optional): path to media database TSV file. Defaults
+            to None.
+        cache_dir (Path, optional): directory where profiles (and parsed
+            models) are cached. Defaults to None (no caching).
+        processes (int, optional): number of parallel processes. Defaults to 1.
+        fraction_of_optimum (float, optional): minimum growth of donors and
+            receivers, as a fraction of their optimum. Defaults to 0.1.
+        uptake_flux (float, optional): uptake bound of candidate compounds
+            in receivers. Defaults to 10.
+        tolerance (float, optional): minimum flux regarded as non-zero.
+            Defaults to 1e-6.
+        output_file (Path, optional): path to output TSV file. Defaults to None.
+
+    Returns:
+        pd.DataFrame: one row per donor, receiver and compound, with columns
+            community, medium, receiver, donor, compound and uptake (maximum
+            uptake rate of the receiver), as in smetana's detailed output.
+    """
+    if medium_id is not None and media_db is None:
+        raise ValueError("A media database is required to set the medium.")
+    medium = None if medium_id is None else load_media_db(str(media_db))[medium_id]
+    settings = {"fraction_of_optimum": fraction_of_optimum, "tolerance": tolerance}
+    signature = _get_signature(medium=medium, uptake_flux=uptake_flux, **settings)
+    model_files = {Path(model_file).stem: model_file for model_file in model_files}
+
+    profiles = dict(
+        _map(
+            _profile_worker,
+            [
+                (model_file, medium_id, media_db, cache_dir, signature, settings)
+                for model_file in model_files.values()
+            ],
+            processes,
+        )
+    )
+
+    secretors = {}
+    for model_id, profile in profiles.items():
+        for met_id in profile["secretion"]:
+            secretors.setdefault(met_id, []).append(model_id)
+    uptake_args = []
+    for model_id, profile in profiles.items():
+        medium_compounds = set(profile["medium"])
+        candidates = [
+            met_id
+            for met_id in profile["exchanges"]
+            if met_id in secretors
+            and met_id not in medium_compounds
+            and any(donor_id != model_id for donor_id in secretors[met_id])
+        ]
+        if candidates:
+            uptake_args.append(
+                (
+                    model_files[model_id],
+                    profile,
+                    candidates,
+                    medium_id,
+                    media_db,
+                    cache_dir,
+                    signature,
+                    {**settings, "uptake_flux": uptake_flux},
+                )
+            )
+    uptake_rates = dict(_map(_uptake_worker, uptake_args, processes))
+
+    rows = [
+        ("all", medium_id, receiver_id, donor_id, met_id, uptake)
+        for receiver_id in sorted(uptake_rates)
+        for met_id, uptake in sorted(uptake_rates[receiver_id].items())
+        if uptake > tolerance
+        for donor_id in sorted(secretors[met_id])
+        if donor_id != receiver_id
+    ]
+    interactions = pd.DataFrame(rows, columns=INTERACTION_COLUMNS)
+    if output_file is not None:
+        interactions.to_csv(output_file, sep="\t", index=False)
+    return interactions
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+
+class _LazyModule(ModuleType):
+    """Stand-in for a module, imported on first attribute access."""
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self.__name__)
+        # Later lookups of copied attributes skip __getattr__ altogether
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import a module on first attribute access.
+
+    The returned stand-in is not registered in sys.modules, so the module is
+    imported through the regular import system when first used, and is never
+    loaded just because a phycogem module was imported. Heavy dependencies
+    are imported this way to keep importing phycogem modules fast.
+
+    Args:
+        name (str): absolute module name.
+
+    Returns:
+        ModuleType: module, or a stand-in importing it on first use.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    # Only the top-level package is looked up: finding a submodule's spec
+    # would import its parent packages.
+    top_level_name = name.partition(".")[0]
+    if importlib.util.find_spec(top_level_name) is None:
+        raise ModuleNotFoundError(
+            f"No module named '{top_level_name}'", name=top_level_name
+        )
+    return _LazyModule(name)
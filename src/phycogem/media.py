@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
+
+from phycogem.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from cobra import Model
+
+pd = lazy_import("pandas")
+
+
+class MediaDB:
+    """In-memory media database indexed by medium ID.
+
+    The media TSV file (columns: medium, description, compound, name) is read
+    once. Exchange reactions of a medium are resolved against each model the
+    first time they are requested and then cached, so switching among media
+    costs a dictionary lookup. A model's cache entry is dropped when its number
+    of reactions changes, call clear_cache after other structural edits.
+    """
+
+    def __init__(self, media_db: Path, exchange_flux: float = 1000):
+        """
+        Args:
+            media_db (Path): path to media database TSV file.
+            exchange_flux (float, optional): uptake bound of medium compounds.
+                Defaults to 1000.
+        """
+        media = pd.read_csv(media_db, sep="\t")
+        self._media = {
+            medium_id: {
+                f"EX_{species}_e": exchange_flux for species in compounds.compound
+            }
+            for medium_id, compounds in media.groupby("medium", sort=False)
+        }
+        self._descriptions = (
+            media.drop_duplicates("medium").set_index("medium").description.to_dict()
+        )
+        self._model_cache = WeakKeyDictionary()
+
+    @property
+    def medium_ids(self) -> list[str]:
+        """Return IDs of media in database."""
+        return list(self._media)
+
+    def __contains__(self, medium_id: str) -> bool:
+        return medium_id in self._media
+
+    def __len__(self) -> int:
+        return len(self._media)
+
+    def __getitem__(self, medium_id: str) -> dict:
+        return dict(self._get_medium(medium_id))
+
+    def _get_medium(self, medium_id: str) -> dict:
+        if medium_id not in self._media:
+            raise ValueError(f"Medium {medium_id} not found in media database.")
+        return self._media[medium_id]
+
+    def get_description(self, medium_id: str) -> str:
+        """Return description of a medium."""
+        self._get_medium(medium_id)
+        return self._descriptions[medium_id]
+
+    def _get_model_entry(self, model: Model) -> dict:
+        entry = self._model_cache.get(model)
+        if entry is None or entry["n_reactions"] != len(model.reactions):
+            entry = {
+                "n_reactions": len(model.reactions),
+                "exchanges": {rxn.id for rxn in model.exchanges},
+                "media": {},
+            }
+            self._model_cache[model] = entry
+        return entry
+
+    def get_exchanges(self, model: Model) -> set[str]:
+        """Return (cached) IDs of exchange reactions of a model.
+
+        Args:
+            model (Model): cobra model.
+
+        Returns:
+            set[str]: exchange reaction IDs.
+        """
+        return self._get_model_entry(model)["exchanges"]
+
+    def get_model_medium(self, model: Model, medium_id: str) -> dict:
+        """Return medium restricted to the exchange reactions of a model.
+
+        Args:
+            model (Model): cobra model.
+            medium_id (str): medium ID.
+
+        Returns:
+            dict: exchange reaction IDs and uptake bounds.
+        """
+        entry = self._get_model_entry(model)
+        if medium_id not in entry["media"]:
+            entry["media"][medium_id] = {
+                rxn_id: flux
+                for rxn_id, flux in self._get_medium(medium_id).items()
+                if rxn_id in entry["exchanges"]
+            }
+        return dict(entry["media"][medium_id])
+
+    def clear_cache(self, model: Model = None) -> None:
+        """Drop cached exchange resolution of a model, or of all models.
+
+        Args:
+            model (Model, optional): cobra model. Defaults to None (all models).
+        """
+        if model is None:
+            self._model_cache.clear()
+        else:
+            self._model_cache.pop(model, None)
+
+
+@lru_cache(maxsize=None)
+def load_media_db(media_db: str) -> MediaDB:
+    """Load a media database once per process.
+
+    Batch workflows call this for every model they process, so the TSV file
+    is parsed a single time and exchange caches are shared among models.
+
+    Args:
+        media_db (str): path to media database TSV file.
+
+    Returns:
+        MediaDB: media database.
+    """
+    return MediaDB(media_db)
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from phycogem.cache import ModelCache
+from phycogem.lazy import lazy_import
+from phycogem.reconstruction import GEM
+
+cobra = lazy_import("cobra")
+optlang = lazy_import("optlang")
+pd = lazy_import("pandas")
+
+TRACE_DIR_VARIABLE = "PHYCOGEM_PROFILE_DIR"
+SUMMARY_COLUMNS = [
+    "calls",
+    "seconds",
+    "lp_solves",
+    "solver_seconds",
+    "io_seconds",
+    "reactions_added",
+    "reactions_removed",
+    "metabolites_added",
+    "metabolites_removed",
+]
+
+_profiler = None
+_originals = []
+
+
+class Profiler:
+    """Collect trace events of GEM method calls.
+
+    Each call records its wall time, the number of LP solves and the time
+    spent in the solver and in model I/O (SBML files and model cache) during
+    the call, and the reactions and metabolites it added or removed. Counts
+    of nested calls are also included in the calls that contain them.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.events = []
+        self._stack = []
+
+    @staticmethod
+    def _get_ids(model) -> tuple[set, set]:
+        if model is None:
+            return set(), set()
+        return set(model.reactions._dict), set(model.metabolites._dict)
+
+    @contextmanager
+    def record(self, name: str, model=None, get_model=None) -> Iterator[None]:
+        """Record a call as a trace event.
+
+        Args:
+            name (str): event name.
+            model (Model, optional): model before the call. Defaults to None.
+            get_model (Callable, optional): function returning the model
+                after the call. Defaults to None (same model).
+        """
+        frame = {"lp_solves": 0, "solver_seconds": 0.0, "io_seconds": 0.0}
+        rxns_before, mets_before = self._get_ids(model)
+        self._stack.append(frame)
+        timestamp = time.time_ns() // 1000
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._stack.pop()
+            model_after = model if get_model is None else get_model()
+            rxns_after, mets_after = self._get_ids(model_after)
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": "GEM",
+                    "ph": "X",
+                    "ts": timestamp,
+                    "dur": seconds * 1e6,
+                    "pid": self.pid,
+                    "tid": 0,
+                    "args": {
+                        **frame,
+                        "reactions_added": len(rxns_after - rxns_before),
+                        "reactions_removed": len(rxns_before - rxns_after),
+                        "metabolites_added": len(mets_after - mets_before),
+                        "metabolites_removed": len(mets_before - mets_after),
+                    },
+                }
+            )
+
+    def add_time(self, counter: str, seconds: float, solves: int = 0) -> None:
+        """Add time (and LP solves) to the counters of all open calls."""
+        for frame in self._stack:
+            frame[counter] += seconds
+            frame["lp_solves"] += solves
+
+    def to_chrome_trace(self, output_file: Path, trace_dir: Path = None) -> None:
+        """Write events as Chrome trace-event JSON (chrome://tracing, Perfetto).
+
+        Args:
+            output_file (Path): output JSON file.
+            trace_dir (Path, optional): directory with traces of worker
+                processes, to be merged. Defaults to None.
+        """
+        events = self.events + read_worker_traces(trace_dir)
+        with open(output_file, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, trace_dir: Path = None) -> pd.DataFrame:
+        """Summarize events per method.
+
+        Args:
+            trace_dir (Path, optional): directory with traces of worker
+                processes, to be included. Defaults to None.
+
+        Returns:
+            pd.DataFrame: one row per method, sorted by total time.
+        """
+        return summarize_events(self.events + read_worker_traces(trace_dir))
+
+
+def summarize_events(events: list[dict]) -> pd.DataFrame:
+    """Summarize trace events per method.
+
+    Args:
+        events (list[dict]): trace events.
+
+    Returns:
+        pd.DataFrame: calls, total time and counters of each method, sorted by
+            total time.
+    """
+    table = pd.DataFrame(
+        [
+            {"method": event["name"], "seconds": event["dur"] / 1e6, **event["args"]}
+            for event in events
+        ],
+        columns=["method"] + SUMMARY_COLUMNS[1:],
+    )
+    summary = table.groupby("method").agg(
+        calls=("seconds", "size"), **{col: (col, "sum") for col in SUMMARY_COLUMNS[1:]}
+    )
+    return summary.sort_values("seconds", ascending=False)
+
+
+def read_worker_traces(trace_dir: Path = None) -> list[dict]:
+    """Read trace events written by worker processes.
+
+    Args:
+        trace_dir (Path, optional): trace directory. Defaults to None.
+
+    Returns:
+        list[dict]: trace events.
+    """
+    if trace_dir is None:
+        return []
+    events = []
+    for trace_file in sorted(Path(trace_dir).glob("worker-*.json")):
+        with open(trace_file) as f:
+            events.extend(json.load(f))
+    return events
+
+
+def _get_model(obj):
+    return obj._model if isinstance(obj, GEM) and hasattr(obj, "_model") else None
+
+
+def _wrap_method(name: str, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _profiler
+        if profiler is None or profiler.pid != os.getpid():
+            return func(*args, **kwargs)
+        owner = args[0] if args else None
+        result = None
+
+        def get_model():
+            return _get_model(owner) or _get_model(result)
+
+        with profiler.record(f"GEM.{name}", _get_model(owner), get_model):
+            result = func(*args, **kwargs)
+        return result
+
+    return wrapper
+
+
+def _wrap_timer(func, counter: str, solves: int = 0):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _profiler
+        if profiler is None or not profiler._stack:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.add_time(counter, time.perf_counter() - start, solves)
+
+    return wrapper
+
+
+def _patch(owner, name: str, value) -> None:
+    _originals.append((owner, name, owner.__dict__[name]))
+    setattr(owner, name, value)
+
+
+def _instrument() -> None:
+    """Wrap GEM methods, LP solves and model I/O functions."""
+    for name, attr in list(vars(GEM).items()):
+        if name.startswith("_") and name != "__init__":
+            continue
+        if isinstance(attr, classmethod):
+            _patch(GEM, name, classmethod(_wrap_method(name, attr.__func__)))
+        elif callable(attr):
+            _patch(GEM, name, _wrap_method(name, attr))
+    _patch(
+        optlang.interface.Model,
+        "optimize",
+        _wrap_timer(optlang.interface.Model.optimize, "solver_seconds", solves=1),
+    )
+    for name in ("read_sbml_model", "write_sbml_model"):
+        _patch(cobra.io, name, _wrap_timer(getattr(cobra.io, name), "io_seconds"))
+    for name in ("get", "put"):
+        _patch(ModelCache, name, _wrap_timer(getattr(ModelCache, name), "io_seconds"))
+
+
+def _restore() -> None:
+    while _originals:
+        owner, name, value = _originals.pop()
+        setattr(owner, name, value)
+
+
+def enable(trace_dir: Path = None) -> Profiler:
+    """Start profiling GEM workflows in this process.
+
+    GEM methods, LP solves and model I/O are only wrapped while profiling is
+    enabled, so there is no overhead otherwise.
+
+    Args:
+        trace_dir (Path, optional): directory where worker processes write
+            their traces (see worker_profile). It is passed to workers through
+            the PHYCOGEM_PROFILE_DIR environment variable. Defaults to None.
+
+    Returns:
+        Profiler: active profiler.
+    """
+    global _profiler
+    if _profiler is None or _profiler.pid != os.getpid():
+        if not _originals:
+            _instrument()
+        _profiler = Profiler()
+    if trace_dir is not None:
+        Path(trace_dir).mkdir(parents=True, exist_ok=True)
+        os.environ[TRACE_DIR_VARIABLE] = str(trace_dir)
+    return _profiler
+
+
+def disable() -> Profiler | None:
+    """Stop profiling and remove the instrumentation.
+
+    Returns:
+        Profiler | None: the profiler that was active, if any.
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    _restore()
+    os.environ.pop(TRACE_DIR_VARIABLE, None)
+    return profiler
+
+
+@contextmanager
+def profile(
+    trace_file: Path = None, summary_file: Path = None, trace_dir: Path = None
+) -> Iterator[Profiler]:
+    """Profile GEM workflows within a context.
+
+    Args:
+        trace_file (Path, optional): output Chrome trace JSON file. Defaults
+            to None.
+        summary_file (Path, optional): output TSV file with the summary
+            table. Defaults to None.
+        trace_dir (Path, optional): directory where worker processes write
+            their traces, merged into the outputs. Defaults to None.
+
+    Yields:
+        Profiler: active profiler.
+    """
+    profiler = enable(trace_dir)
+    try:
+        yield profiler
+    finally:
+        disable()
+        if trace_file is not None:
+            profiler.to_chrome_trace(trace_file, trace_dir)
+        if summary_file is not None:
+            profiler.summary(trace_dir).to_csv(summary_file, sep="\t")
+
+
+@contextmanager
+def worker_profile() -> Iterator[None]:
+    """Profile a task run by a worker process, if profiling was enabled.
+
+    Within a worker process (i.e., when the PHYCOGEM_PROFILE_DIR variable is
+    set by the parent process), events of the task are written to a trace
+    file in that directory. Otherwise, this does nothing.
+    """
+    trace_dir = os.environ.get(TRACE_DIR_VARIABLE)
+    if trace_dir is None or (_profiler is not None and _profiler.pid == os.getpid()):
+        yield
+        return
+    profiler = enable()
+    try:
+        yield
+    finally:
+        trace_file = Path(trace_dir) / f"worker-{os.getpid()}-{uuid.uuid4().hex}.json"
+        with open(trace_file, "w") as f:
+            json.dump(profiler.events, f)
+        profiler.events = []
@@ -1,18 +1,277 @@
 from __future__ import annotations
 from pathlib import Path
+import gzip
 import json
+import re
+from typing import IO, Iterator
+
+from phycogem.lazy import lazy_import
+
+cobra = lazy_import("cobra")
+pd = lazy_import("pandas")
+
+_SKIPPABLE = re.compile(r'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+_STRING_END = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[\s,\]}]")
+
+
+class _JSONStream:
+    """Pull parser over a JSON text stream.
+
+    Values can be skipped without being parsed, so that only the ones that
+    are read are held in memory, besides a chunk of text.
+    """
+
+    def __init__(self, handle: IO[str], chunk_size: int = 1 << 20):
+        self._handle = handle
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._mark = None
+        self._captured = None
+
+    def _read_chunk(self) -> bool:
+        chunk = self._handle.read(self._chunk_size)
+        if self._captured is not None:
+            self._captured.append(self._buffer[self._mark : self._pos])
+            self._mark = 0
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return bool(chunk)
+
+    def _peek(self) -> str:
+        """Skip whitespace and return next character ('' at end of stream)."""
+        while True:
+            while (
+                self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n"
+            ):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_chunk():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Invalid JSON: expected '{char}'")
+        self._pos += 1
+
+    def _search(self, pattern: re.Pattern) -> re.Match | None:
+        """Search pattern from current position, reading chunks as needed."""
+        while True:
+            match = pattern.search(self._buffer, self._pos)
+            if match is not None:
+                return match
+            self._pos = len(self._buffer)
+            if not self._read_chunk():
+                return None
+
+    def _skip_string(self) -> None:
+        self._pos += 1
+        while True:
+            match = self._search(_STRING_END)
+            if match is None:
+                raise ValueError("Invalid JSON: unterminated string")
+            if match.group() == '"':
+                self._pos = match.end()
+                return
+            if match.end() < len(self._buffer):
+                self._pos = match.end() + 1
+            else:
+                self._pos = match.start()
+                if not self._read_chunk():
+                    raise ValueError("Invalid JSON: unterminated string")
+
+    def skip_value(self) -> None:
+        """Move past the value at the current position without parsing it."""
+        char = self._peek()
+        if char == '"':
+            self._skip_string()
+        elif char in ("{", "["):
+            depth = 0
+            while True:
+                self._pos = _SKIPPABLE.match(self._buffer, self._pos).end()
+                if self._pos == len(self._buffer):
+                    if not self._read_chunk():
+                        raise ValueError("Invalid JSON: unterminated object or array")
+                    continue
+                token = self._buffer[self._pos]
+                if token == '"':
+                    self._skip_string()
+                    continue
+                self._pos += 1
+                depth += 1 if token in "{[" else -1
+                if depth == 0:
+                    return
+        elif char:
+            match = self._search(_SCALAR_END)
+            self._pos = match.start() if match is not None else len(self._buffer)
+        else:
+            raise ValueError("Invalid JSON: unexpected end of stream")
+
+    def read_value(self) -> object:
+        """Parse and return the value at the current position."""
+        self._peek()
+        self._mark, self._captured = self._pos, []
+        self.skip_value()
+        text = "".join(self._captured) + self._buffer[self._mark : self._pos]
+        self._mark, self._captured = None, None
+        return json.loads(text)
+
+    def iter_object(self) -> Iterator[str]:
+        """Iterate over the keys of the object at the current position.
+
+        The value of each key must be read or skipped before the next key.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self._expect(":")
+            yield key
+            char = self._peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError("Invalid JSON: expected ',' or '}'")
+
+
+def _open_report(report: Path) -> IO[str]:
+    if Path(report).suffix == ".gz":
+        return gzip.open(report, "rt", encoding="utf-8")
+    return open(report, "r", encoding="utf-8")
+
+
+def read_memote_tests(
+    report: Path, tests: list[str] = None, chunk_size: int = 1 << 20
+) -> dict:
+    """Extract test sections from a memote JSON report.
+
+    The report is parsed incrementally: only the requested test sections are
+    built, and reading stops as soon as all of them have been found.
+
+    Args:
+        report (Path): path to memote JSON report (may be gzip-compressed).
+        tests (list[str], optional): IDs of tests to extract. Defaults to None
+            (all tests).
+        chunk_size (int, optional): characters read at a time. Defaults to 2**20.
+
+    Returns:
+        dict: test IDs and their sections.
+    """
+    selected = None if tests is None else set(tests)
+    sections = {}
+    with _open_report(report) as handle:
+        stream = _JSONStream(handle, chunk_size)
+        for key in stream.iter_object():
+            if key != "tests":
+                stream.skip_value()
+                continue
+            for test_id in stream.iter_object():
+                if selected is not None and test_id not in selected:
+                    stream.skip_value()
+                    continue
+                sections[test_id] = stream.read_value()
+                if selected is not None and len(sections) == len(selected):
+                    return sections
+            return sections
+    return sections
+
+
+def _get_model_name(report: Path) -> str:
+    name = Path(report).name
+    for suffix in (".gz", ".json"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    return name
+
+
+def _summarize_report(report: Path, tests: list[str] = None) -> list[dict]:
+    model = _get_model_name(report)
+    rows = []
+    for test_id, section in read_memote_tests(report, tests).items():
+        result, metric = section.get("result"), section.get("metric")
+        if isinstance(result, dict):
+            results = result.items()
+        else:
+            results = [(None, result)]
+        for parameter, parameter_result in results:
+            rows.append(
+                {
+                    "model": model,
+                    "test": test_id,
+                    "parameter": parameter,
+                    "title": section.get("title"),
+                    "result": parameter_result,
+                    "metric": (
+                        metric.get(parameter) if isinstance(metric, dict) else metric
+                    ),
+                }
+            )
+    return rows
+
+
+def _summarize_report_worker(args: tuple) -> list[dict]:
+    return _summarize_report(*args)
+
+
+def summarize_reports(
+    report_dir: Path,
+    tests: list[str] = None,
+    processes: int = 1,
+    pattern: str = "*.json",
+) -> pd.DataFrame:
+    """Collect memote test results of a directory of reports.
+
+    Reports are parsed incrementally (see read_memote_tests) and in parallel.
+    Parametrized tests yield one row per parameter.
+
+    Args:
+        report_dir (Path): directory containing memote JSON reports.
+        tests (list[str], optional): IDs of tests to collect. Defaults to None
+            (all tests).
+        processes (int, optional): number of parallel processes. Defaults to 1.
+        pattern (str, optional): glob pattern of report files. Defaults to
+            "*.json".
+
+    Returns:
+        pd.DataFrame: one row per model and test, with columns model, test,
+            parameter, title, result and metric.
+    """
+    reports = sorted(Path(report_dir).glob(pattern))
+    args = [(report, tests) for report in reports]
+    if processes > 1 and len(reports) > 1:
+        with cobra.util.ProcessPool(min(processes, len(reports))) as pool:
+            report_rows = list(pool.imap(_summarize_report_worker, args))
+    else:
+        report_rows = [_summarize_report_worker(arg) for arg in args]
+    return pd.DataFrame(
+        [row for rows in report_rows for row in rows],
+        columns=["model", "test", "parameter", "title", "result", "metric"],
+    )
 
 
 class Memote:
     """Class to run memote tests on a model."""
 
-    def __init__(self, report: Path):
-        with open(report, "r") as f:
-            self._report = json.load(f)
+    def __init__(
+        self, report: Path, tests: list[str] = ("test_find_duplicated_reactions",)
+    ):
+        """
+        Args:
+            report (Path): path to memote JSON report.
+            tests (list[str], optional): IDs of tests to extract from the
+                report, None to extract all of them. Defaults to
+                ("test_find_duplicated_reactions",).
+        """
+        self._report = {"tests": read_memote_tests(report, tests)}
 
     @property
     def report(self) -> dict:
-        """Return memote report as dictionary."""
+        """Return extracted memote report sections as dictionary."""
         return self._report
 
     def get_duplicated_reactions(self) -> list[list]:
@@ -1,18 +1,106 @@
 from __future__ import annotations
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
-import cobra
-from cobra import Reaction, Model
+import numpy as np
 
-import phycogem.reconstruction_helpers as helpers
+import phycogem.bulk as bulk
+import phycogem.deletion as deletion
+import phycogem.flux_analysis as flux_analysis
+import phycogem.universe as universe
+from phycogem.cache import ModelCache, hash_file
+from phycogem.community import merge_models
+from phycogem.composition import ElementMatrix
+from phycogem.compounds import CompoundDB
+from phycogem.lazy import lazy_import
+from phycogem.media import MediaDB
+from phycogem.sampling import CHRRSampler, FluxSampleStore, sample_to_disk
+from phycogem.stoichiometry import StoichiometricMatrix
+
+if TYPE_CHECKING:
+    from cobra import Model, Reaction
+
+cobra = lazy_import("cobra")
+pd = lazy_import("pandas")
 
 
 class GEM:
     """Store and manipulate a genome-scale metabolic self._model."""
 
-    def __init__(self, model: Path):
-        self._model = cobra.io.read_sbml_model(model)
+    def __init__(self, model: Path, cache: ModelCache = None):
+        """
+        Args:
+            model (Path): path to SBML model file.
+            cache (ModelCache, optional): on-disk model cache. If given, the
+                parsed model is retrieved from (or stored in) the cache, so that
+                unchanged SBML files are only parsed once. Defaults to None.
+        """
+        if cache is not None:
+            self._model = cache.load_model(model)
+        else:
+            self._model = cobra.io.read_sbml_model(model)
+        self._element_matrix = ElementMatrix()
+        self._stoichiometry = None
+
+    @classmethod
+    def from_model(cls, model: Model) -> GEM:
+        """Create GEM from a cobra model object, without copying it.
+
+        Args:
+            model (Model): cobra model.
+
+        Returns:
+            GEM: GEM wrapping the model.
+        """
+        gem = cls.__new__(cls)
+        gem._model = model
+        gem._element_matrix = ElementMatrix()
+        gem._stoichiometry = None
+        return gem
+
+    @classmethod
+    def from_community(
+        cls,
+        members: list[GEM] | dict[str, GEM],
+        shared_compartment: str = "e",
+        abundances: dict[str, float] = None,
+        model_id: str = "community",
+        balanced_growth: bool = True,
+    ) -> GEM:
+        """Build a compartmentalized community model from member GEMs.
+
+        Members share a common pool of metabolites (and their exchanges) in
+        the shared compartment, see community.merge_models.
+
+        Args:
+            members (list[GEM] | dict[str, GEM]): member GEMs, identified by
+                their model IDs, or a dictionary of member IDs and GEMs.
+            shared_compartment (str, optional): compartment of the common pool.
+                Defaults to "e".
+            abundances (dict[str, float], optional): relative abundances of
+                members. Defaults to None (equal abundances).
+            model_id (str, optional): ID of community model. Defaults to
+                "community".
+            balanced_growth (bool, optional): all members grow at the rate
+                of the community. If False, members grow at independent rates,
+                as in MICOM. Defaults to True.
+
+        Returns:
+            GEM: community GEM.
+        """
+        if not isinstance(members, dict):
+            member_ids = [gem.model.id for gem in members]
+            if len(set(member_ids)) < len(member_ids):
+                raise ValueError("Member model IDs must be unique.")
+            members = dict(zip(member_ids, members))
+        community = merge_models(
+            {member_id: gem.model for member_id, gem in members.items()},
+            shared_compartment=shared_compartment,
+            abundances=abundances,
+            model_id=model_id,
+            balanced_growth=balanced_growth,
+        )
+        return cls.from_model(community)
 
     def _repr_html_(self):
         return self._model._repr_html_()
@@ -22,9 +110,63 @@ class GEM:
         """Return cobrapy model object."""
         return self._model
 
-    def write(self, output_path: Path) -> None:
-        """Write model to file."""
-        cobra.io.write_sbml_model(self._model, output_path)
+    @property
+    def stoichiometry(self) -> StoichiometricMatrix:
+        """Return (cached) sparse stoichiometric matrix of the model.
+
+        The matrix, with its reaction and metabolite IDs and flux bounds, is
+        built on first access and then kept up to date by the GEM methods that
+        modify the model. After modifying self.model directly, call
+        clear_stoichiometry_cache.
+        """
+        if self._stoichiometry is None or self._stoichiometry.shape != (
+            len(self._model.metabolites),
+            len(self._model.reactions),
+        ):
+            self._stoichiometry = StoichiometricMatrix.from_model(self._model)
+        return self._stoichiometry
+
+    def clear_stoichiometry_cache(self) -> None:
+        """Drop cached stoichiometric matrix, to be rebuilt on next access."""
+        self._stoichiometry = None
+
+    def _remove_from_stoichiometry(self, reaction_ids: list[str]) -> None:
+        if self._stoichiometry is None:
+            return
+        removed_mets = [
+            met_id
+            for met_id in self._stoichiometry.metabolite_ids
+            if met_id not in self._model.metabolites
+        ]
+        self._stoichiometry.remove(reaction_ids, removed_mets)
+
+    def _add_to_stoichiometry(
+        self, reactions: list[Reaction], metabolites: list = ()
+    ) -> None:
+        if self._stoichiometry is not None:
+            self._stoichiometry.add(reactions, metabolites)
+
+    def _update_stoichiometry_bounds(self, reactions: list[Reaction]) -> None:
+        if self._stoichiometry is None:
+            return
+        self._stoichiometry.update_bounds(reactions)
+        context = cobra.util.get_context(self._model)
+        if context:
+            # The context only restores the bounds of the cobra reactions
+            context(self.clear_stoichiometry_cache)
+
+    def write(self, output_path: Path, cache: ModelCache = None) -> None:
+        """Write model to file.
+
+        Args:
+            output_path (Path): path to output SBML file.
+            cache (ModelCache, optional): if given, store the written model in
+                the cache, so that loading it later skips SBML parsing.
+                Defaults to None.
+        """
+        cobra.io.write_sbml_model(self._model, str(output_path))
+        if cache is not None:
+            cache.put(hash_file(output_path), self._model)
 
     def remove_shuttle_reactions(
         self, allowed_compartments: set = {"c", "e", "p"}
@@ -47,65 +189,38 @@ class GEM:
         self._model.remove_reactions(
             shuttle_rxns_in_unwanted_compartments, remove_orphans=True
         )
+        self._remove_from_stoichiometry(
+            [rxn.id for rxn in shuttle_rxns_in_unwanted_compartments]
+        )
 
     def move_reactions_to_cytoplasm(
         self, allowed_compartments: set = {"c", "e", "p"}
     ) -> None:
         """
         Update the metabolites of a reaction to include a new set of metabolites
+
+        The new layout is planned on the model's stoichiometry and applied in
+        a few bulk operations (see bulk.collapse_compartments).
+
         Args:
             reaction (Reaction): _description_
             allowed_compartments (set, optional): _description_. Defaults to {"c", "e", "p"}.
         """
-        reactions_to_add = []
-        reactions_to_remove = []
-        for reaction in self._model.reactions:
-            if not reaction.compartments.issubset(allowed_compartments):
-
-                new_metabolites = {}
-                for metabolite, stoich in reaction.metabolites.items():
-                    new_met_id = metabolite.id[:-1] + "c"
-                    new_metabolite = (
-                        self._model.metabolites.get_by_id(new_met_id)
-                        if new_met_id in self._model.metabolites
-                        else metabolite.copy()
-                    )
-                    new_metabolite.compartment = "c"
-                    new_metabolite.id = new_met_id
-                    if new_met_id not in self._model.metabolites:
-                        self._model.add_metabolites([new_metabolite])
-                        self._model.remove_metabolites([metabolite])
-                    new_metabolites[new_metabolite] = stoich
-
-                new_reaction = Reaction(
-                    id=reaction.id,
-                    name=reaction.name,
-                    lower_bound=reaction.lower_bound,
-                    upper_bound=reaction.upper_bound,
-                    subsystem=reaction.subsystem,
-                )
-                new_reaction.gene_reaction_rule = reaction.gene_reaction_rule
-                new_reaction.add_metabolites(new_metabolites)
-                reactions_to_add.append(new_reaction)
-                reactions_to_remove.append(reaction)
+        bulk.collapse_compartments(self._model, allowed_compartments)
+        self.clear_stoichiometry_cache()
 
-        self._model.remove_reactions(reactions_to_remove, remove_orphans=True)
-        self._model.add_reactions(reactions_to_add)
-
-    def annotate_compounds(self, cpd_annotations: Path) -> None:
+    def annotate_compounds(self, cpd_annotations: Path | CompoundDB) -> None:
         """
         Annotate compounds in model: chemical formulae and charge
 
+        Metabolite IDs (without compartment) are joined with the annotations
+        in a single batch lookup.
+
         Args:
-            model (Model): _description_
-            cpd_annotations (Path): _description_
+            cpd_annotations (Path | CompoundDB): compound database, or TSV file
+                with formula and charge of compounds.
         """
-        cpd_db = pd.read_csv(cpd_annotations, sep="\t", index_col=0)
-        for met in self._model.metabolites:
-            met_id = helpers.remove_compartment(met.id)
-            if met_id in cpd_db.index:
-                met.formula = cpd_db.loc[met_id, "formula"]
-                met.charge = cpd_db.loc[met_id, "charge"]
+        universe.annotate_metabolites(self._model.metabolites, cpd_annotations)
 
     def prepare_for_carveme(self, output_reaction_file: Path) -> None:
         """
@@ -118,22 +233,80 @@ class GEM:
             if not met.compartment.startswith("C_"):
                 met.compartment = f"C_{met.compartment}"
 
-        data = []
-        for rxn in self._model.reactions:
-            data.append(
-                [
-                    "iML1515",
-                    rxn.id,
-                    rxn.lower_bound,
-                    rxn.upper_bound,
-                    rxn.subsystem,
-                    rxn.gene_reaction_rule,
-                ]
-            )
-        df = pd.DataFrame(
-            data, columns=["model", "reaction", "lb", "ub", "subsystem", "gpr"]
+        universe.write_reaction_table(self._model, output_reaction_file)
+
+    def curate_universe(
+        self,
+        cpd_annotations: Path | CompoundDB,
+        output_reaction_file: Path,
+        allowed_compartments: set = {"c", "e", "p"},
+    ) -> None:
+        """
+        Prepare a universal model for the CarveMe universe curation pipeline.
+
+        Fuses remove_shuttle_reactions, move_reactions_to_cytoplasm,
+        annotate_compounds and prepare_for_carveme into a single planned pass
+        over the model's stoichiometry, see universe.curate_universe.
+
+        Args:
+            cpd_annotations (Path | CompoundDB): compound database, or TSV
+                file with formula and charge of compounds.
+            output_reaction_file (Path): output CSV file with the reaction table.
+            allowed_compartments (set, optional): compartments that are kept.
+                Defaults to {"c", "e", "p"}.
+        """
+        universe.curate_universe(
+            self._model,
+            allowed_compartments,
+            cpd_annotations,
+            output_reaction_file,
+            stoichiometry=self.stoichiometry,
+        )
+        self.clear_stoichiometry_cache()
+
+    def set_bounds(
+        self,
+        bounds: dict[str, tuple[float, float]] | list[str | Reaction],
+        lower_bounds: np.ndarray | float = None,
+        upper_bounds: np.ndarray | float = None,
+    ) -> None:
+        """Set the bounds of several reactions at once.
+
+        All bounds are validated before any is set, and the solver is updated
+        in one go (see bulk.set_bounds). Within a model context, the previous
+        bounds are restored on exit, and the cached stoichiometric matrix is
+        rebuilt on its next access.
+
+        Args:
+            bounds (dict[str, tuple[float, float]] | list[str | Reaction]):
+                reaction IDs and their new (lower, upper) bounds, or reactions
+                (or reaction IDs) whose bounds are given in lower_bounds and
+                upper_bounds.
+            lower_bounds (np.ndarray | float, optional): new lower bounds, in
+                the order of the reactions. Defaults to None (unchanged).
+            upper_bounds (np.ndarray | float, optional): new upper bounds, in
+                the order of the reactions. Defaults to None (unchanged).
+        """
+        changed_rxns = bulk.set_bounds(
+            self._model, bounds, lower_bounds=lower_bounds, upper_bounds=upper_bounds
+        )
+        self._update_stoichiometry_bounds(changed_rxns)
+
+    def _set_lower_bounds(
+        self, reactions: list[Reaction], lower_bounds: np.ndarray | float
+    ) -> None:
+        """Set lower bounds, raising upper bounds that fall below them.
+
+        Exchange helpers keep the behavior of cobra's former lower_bound
+        setter, so that e.g. closing an exchange with a forced uptake (negative
+        upper bound) blocks it instead of failing validation.
+        """
+        reactions = list(reactions)
+        lower_bounds = np.broadcast_to(
+            np.asarray(lower_bounds, dtype=float), len(reactions)
         )
-        df.to_csv(output_reaction_file, index=False)
+        upper_bounds = np.maximum([rxn.upper_bound for rxn in reactions], lower_bounds)
+        self.set_bounds(reactions, lower_bounds=lower_bounds, upper_bounds=upper_bounds)
 
     def open_exchanges(self) -> None:
         """
@@ -145,8 +318,7 @@ class GEM:
         Returns:
             Model: a cobra model object with all exchanges open
         """
-        for exchange in self._model.exchanges:
-            exchange.lower_bound = -1000
+        self._set_lower_bounds(self._model.exchanges, -1000)
 
     def close_exchanges(self) -> None:
         """
@@ -155,9 +327,8 @@ class GEM:
         Args:
             model (Model): _description_
         """
-        for rxn in self._model.reactions:
-            if rxn.id.startswith("EX_"):
-                rxn.lower_bound = 0
+        exchanges = [rxn for rxn in self._model.reactions if rxn.id.startswith("EX_")]
+        self._set_lower_bounds(exchanges, 0)
 
     def remove_duplicated_reactions(self, duplicated_reactions: list[list]) -> None:
         """Remove duplicated reactions from model
@@ -167,6 +338,20 @@ class GEM:
         """
         reactions_to_remove = [rxn_pair[0] for rxn_pair in duplicated_reactions]
         self._model.remove_reactions(reactions_to_remove, remove_orphans=True)
+        self._remove_from_stoichiometry(
+            [getattr(rxn, "id", rxn) for rxn in reactions_to_remove]
+        )
+
+    def _get_exchange_composition(self) -> tuple[list[Reaction], np.ndarray]:
+        """
+        Get exchange reactions and the element matrix rows of their metabolites.
+        Only formulas that changed since the previous call are parsed again.
+        """
+        exchanges = list(self._model.exchanges)
+        exchange_mets = [next(iter(rxn.metabolites)) for rxn in exchanges]
+        self._element_matrix.update(exchange_mets)
+        rows = self._element_matrix.rows(met.id for met in exchange_mets)
+        return exchanges, rows
 
     def get_organic_exchanges(self) -> list[str]:
         """
@@ -174,18 +359,15 @@ class GEM:
         Returns:
             list. List of exchange IDs.
         """
-        organic_exchanges = []
-        for rxn in self._model.exchanges:
-            met = [met for met in rxn.metabolites][0]
-            if met.formula is not None:
-                chemical_elements = helpers.extract_chemical_elements(met.formula)
-                if (
-                    (not helpers.is_co2(chemical_elements))
-                    and (not helpers.is_hco3(chemical_elements))
-                    and ("C" in chemical_elements)
-                ):
-                    organic_exchanges.append(rxn.id)
-        return organic_exchanges
+        exchanges, rows = self._get_exchange_composition()
+        elements = self._element_matrix
+        is_organic = (
+            elements.has_formula(rows)
+            & ~elements.is_co2(rows)
+            & ~elements.is_hco3(rows)
+            & elements.contains("C", rows)
+        )
+        return [rxn.id for rxn, organic in zip(exchanges, is_organic) if organic]
 
     def get_inorganic_exchanges(self) -> list[str]:
         """
@@ -193,18 +375,14 @@ class GEM:
         Returns:
             list. List of exchange IDs.
         """
-        inorganic_exchanges = []
-        for rxn in self._model.exchanges:
-            met = [met for met in rxn.metabolites][0]
-            if met.formula is not None:
-                chemical_elements = helpers.extract_chemical_elements(met.formula)
-                if (
-                    (helpers.is_co2(chemical_elements))
-                    or (helpers.is_hco3(chemical_elements))
-                    or ("C" not in chemical_elements)
-                ):
-                    inorganic_exchanges.append(rxn.id)
-        return inorganic_exchanges
+        exchanges, rows = self._get_exchange_composition()
+        elements = self._element_matrix
+        is_inorganic = elements.has_formula(rows) & (
+            elements.is_co2(rows)
+            | elements.is_hco3(rows)
+            | ~elements.contains("C", rows)
+        )
+        return [rxn.id for rxn, inorganic in zip(exchanges, is_inorganic) if inorganic]
 
     def open_inorganic_exchanges(
         self,
@@ -222,19 +400,24 @@ class GEM:
             include: list, optional, List of exchange IDs to be opened besides
             inorganic ones. Default is None.
         """
-        for rxn in self._model.exchanges:
-            if include is not None and rxn.id in include:
-                rxn.lower_bound = lower_bound
-                rxn.upper_bound = upper_bound
-            else:
-                met = [met for met in rxn.metabolites][0]
-                if met.formula is not None:
-                    chemical_elements = helpers.extract_chemical_elements(met.formula)
-                    if "C" not in chemical_elements:
-                        rxn.lower_bound = lower_bound
-                        rxn.upper_bound = upper_bound
-                    else:
-                        rxn.lower_bound = 0
+        exchanges, rows = self._get_exchange_composition()
+        has_formula = self._element_matrix.has_formula(rows)
+        is_included = np.array(
+            [include is not None and rxn.id in include for rxn in exchanges], dtype=bool
+        )
+        is_opened = is_included | (
+            has_formula & ~self._element_matrix.contains("C", rows)
+        )
+        is_updated = is_opened | has_formula
+        self.set_bounds(
+            [rxn for rxn, updated in zip(exchanges, is_updated) if updated],
+            lower_bounds=np.where(is_opened, lower_bound, 0)[is_updated],
+            upper_bounds=np.where(
+                is_opened,
+                upper_bound,
+                np.maximum([rxn.upper_bound for rxn in exchanges], 0),
+            )[is_updated],
+        )
 
     def add_external_metabolite(self, met_id: str) -> None:
         """
@@ -251,6 +434,7 @@ class GEM:
         met_to_add.id = met_id[:-2] + "_e"
         met_to_add.compartment = "e"
         self._model.add_metabolites([met_to_add])
+        self._add_to_stoichiometry([], [met_to_add])
 
     def add_transport_reaction(
         self,
@@ -272,7 +456,7 @@ class GEM:
         met = self._model.metabolites.get_by_id(met_i)
         met_to_add = self._model.metabolites.get_by_id(met_j)
         rxn_id = f"TR_{met.id}_to_{met_to_add.id}"
-        rxn = Reaction(rxn_id)
+        rxn = cobra.Reaction(rxn_id)
         rxn.name = f"Transport of {met.id} to {met_to_add.id}"
         rxn.add_metabolites({met: -1, met_to_add: 1})
         rxn.lower_bound = lower_bound
@@ -280,6 +464,7 @@ class GEM:
         rxn.subsystem = "Transport"
         rxn.gene_reaction_rule = "Spontaenous"
         self._model.add_reactions([rxn])
+        self._add_to_stoichiometry([rxn])
 
     def add_exchanges_for_metabolites(self, met_ids: list[str]) -> None:
         """
@@ -295,40 +480,78 @@ class GEM:
             if met_id in self._model.metabolites:
                 met = self._model.metabolites.get_by_id(met_id)
                 if met.compartment != "e":
-                    model = self.add_external_metabolite(model, met_id)
-                    model = self.add_transport_reaction(model, met.id, met_to_add.id)
+                    self.add_external_metabolite(met_id)
+                    met_to_add = self._model.metabolites.get_by_id(met_id[:-2] + "_e")
+                    self.add_transport_reaction(met.id, met_to_add.id)
                 else:
                     met_to_add = met
-                self._model.add_boundary(met_to_add, type="exchange")
+                exchange = self._model.add_boundary(met_to_add, type="exchange")
+                self._add_to_stoichiometry([exchange])
             else:
                 print(f"Metabolite {met_id} not found in self._model.")
 
     def set_medium(
-        self, medium_id: str, media_db: Path, energy_source: tuple[str, float] = None
+        self,
+        medium_id: str,
+        media_db: Path | MediaDB,
+        energy_source: tuple[str, float] = None,
     ) -> None:
         """
         Set the medium for a model.
 
+        Exchanges named EX_* are closed, and then the medium is applied as in
+        cobra's Model.medium, with all bounds updated in a single pass. Pass a
+        MediaDB object to avoid re-reading the media database and re-resolving
+        the model's exchanges on every call.
+
         Args:
             medium_id (str): _description_
-            media_db (Path): _description_
+            media_db (Path | MediaDB): _description_
             energy_source (tuple[str, float]): _description_
         """
-        self.close_exchanges()
-        medium_dict = {
-            rxn_id: flux
-            for rxn_id, flux in helpers.get_medium_dict_from_media_db(
-                media_db, medium_id
-            ).items()
-            if rxn_id in self._model.exchanges
-        }
+        if not isinstance(media_db, MediaDB):
+            media_db = MediaDB(media_db)
+        medium_dict = media_db.get_model_medium(self._model, medium_id)
+        exchanges = media_db.get_exchanges(self._model)
 
         if energy_source is not None:
-            if energy_source[0] in self._model.exchanges:
+            if energy_source[0] in exchanges:
                 medium_dict[energy_source[0]] = energy_source[1]
             else:
                 print(f"Carbon source {energy_source[0]} not found in model.")
-        self._model.medium = medium_dict
+
+        bounds = {
+            rxn.id: [
+                0 if rxn.id.startswith("EX_") else rxn.lower_bound,
+                rxn.upper_bound,
+            ]
+            for rxn in self._model.reactions
+            if rxn.id.startswith("EX_") or rxn.id in exchanges or rxn.id in medium_dict
+        }
+
+        def set_active_bound(rxn_id: str, bound: float) -> None:
+            rxn = self._model.reactions.get_by_id(rxn_id)
+            if rxn.reactants:
+                bounds[rxn_id][0] = -bound
+            elif rxn.products:
+                bounds[rxn_id][1] = bound
+
+        for rxn_id, flux in medium_dict.items():
+            set_active_bound(rxn_id, flux)
+        for rxn_id in exchanges.difference(medium_dict):
+            rxn = self._model.reactions.get_by_id(rxn_id)
+            lower_bound, upper_bound = bounds[rxn_id]
+            is_export = rxn.reactants and not rxn.products
+            set_active_bound(
+                rxn_id, min(0.0, -lower_bound if is_export else upper_bound)
+            )
+        # Upper bounds below the new lower bounds are raised (see _set_lower_bounds)
+        self.set_bounds(
+            {
+                rxn_id: (lower_bound, max(lower_bound, upper_bound))
+                for rxn_id, (lower_bound, upper_bound) in bounds.items()
+            }
+        )
 
     def rescale_fluxes(self, maximum_flux: float = 1000.0) -> None:
         """
@@ -338,57 +561,221 @@ class GEM:
             model (Model): _description_
             max_flux (float, optional): _description_. Defaults to 1000.0.
         """
-        max_abs_flux = max(
-            [abs(rxn.upper_bound) for rxn in self._model.reactions]
-            + [abs(rxn.lower_bound) for rxn in self._model.reactions]
+        reactions = self._model.reactions
+        lower_bounds = np.array([rxn.lower_bound for rxn in reactions], dtype=float)
+        upper_bounds = np.array([rxn.upper_bound for rxn in reactions], dtype=float)
+        max_abs_flux = max(np.abs(lower_bounds).max(), np.abs(upper_bounds).max())
+        self.set_bounds(
+            reactions,
+            lower_bounds=maximum_flux * (lower_bounds / max_abs_flux),
+            upper_bounds=maximum_flux * (upper_bounds / max_abs_flux),
         )
-        for rxn in self._model.reactions:
-            rxn.upper_bound = maximum_flux * (rxn.upper_bound / max_abs_flux)
-            rxn.lower_bound = maximum_flux * (rxn.lower_bound / max_abs_flux)
 
     def remove_blocked_reactions(self) -> None:
         """
         Remove blocked reactions from a self._model.
 
-        Args:
-            model (Model): _description_
+        Blocked reactions are found with a sparse dead-end pass followed by
+        batched LPs, see flux_analysis.find_blocked_reactions.
         """
-        self._model.optimize()
-        blocked_rxns = cobra.flux_analysis.variability.find_blocked_reactions(
-            self._model
+        blocked_rxns = flux_analysis.find_blocked_reactions(
+            self._model, stoichiometry=self.stoichiometry.matrix
         )
         self._model.remove_reactions(blocked_rxns, remove_orphans=True)
+        self._remove_from_stoichiometry(blocked_rxns)
 
-    def compute_flux_ranges(self) -> pd.DataFrame:
+    def scan(
+        self,
+        grid: dict | pd.DataFrame,
+        reaction_ids: list[str] = None,
+        bound: str = "lower_bound",
+        processes: int = 1,
+    ) -> pd.DataFrame:
         """
-        Compute flux ranges for all reactions in a self._model.
+        Optimize the model over a grid of reaction bound assignments.
+
+        Solves reuse the solver basis between grid points and only read the
+        requested fluxes, instead of building a full Solution for each point.
 
         Args:
-            model (Model): _description_
+            grid (dict | pd.DataFrame): dictionary of reaction IDs to equally
+                sized arrays of bound values, or DataFrame with reaction IDs as
+                columns. Each row (position) defines a grid point.
+            reaction_ids (list[str], optional): IDs of reactions whose flux is
+                returned. Defaults to None (only objective values).
+            bound (str, optional): bound to be set, either "lower_bound" or
+                "upper_bound". Defaults to "lower_bound".
+            processes (int, optional): number of processes among which the
+                grid is split. Defaults to 1.
+
+        Returns:
+            pd.DataFrame: objective value and fluxes, indexed by grid point.
+        """
+        grid = pd.DataFrame(grid)
+        return flux_analysis.scan(
+            self._model,
+            grid,
+            flux_ids=reaction_ids,
+            bound=bound,
+            processes=processes,
+        )
+
+    def compute_flux_ranges(
+        self,
+        reaction_ids: list[str] = None,
+        fraction_of_optimum: float = 1.0,
+        processes: int = 1,
+        chunk_size: int = 100,
+        checkpoint: Path = None,
+        verbose: bool = False,
+    ) -> pd.DataFrame:
         """
-        self._model.optimize()
-        flux_ranges = cobra.flux_analysis.variability.flux_variability_analysis(
-            self._model
+        Compute flux ranges (flux variability analysis) of reactions.
+
+        Reactions are processed in chunks across a process pool. If a checkpoint
+        file is given, finished chunks are written to it and a rerun resumes
+        from the reactions that are still missing. Resuming with a different
+        model or fraction_of_optimum raises a ValueError.
+
+        Args:
+            reaction_ids (list[str], optional): IDs of reactions to analyze.
+                Defaults to None (all reactions).
+            fraction_of_optimum (float, optional): fraction of the optimum the
+                objective must attain. Defaults to 1.0.
+            processes (int, optional): number of worker processes. Defaults to 1.
+            chunk_size (int, optional): number of reactions per chunk.
+                Defaults to 100.
+            checkpoint (Path, optional): tsv file storing finished chunks.
+                Defaults to None.
+            verbose (bool, optional): print progress and chunk timings.
+                Defaults to False.
+
+        Returns:
+            pd.DataFrame: minimum and maximum flux of each reaction.
+        """
+        return flux_analysis.flux_variability(
+            self._model,
+            reaction_ids=reaction_ids,
+            fraction_of_optimum=fraction_of_optimum,
+            processes=processes,
+            chunk_size=chunk_size,
+            checkpoint=checkpoint,
+            verbose=verbose,
         )
-        return flux_ranges
 
-    def sample_flux_space(
-        self, n_samples: int = 1000, n_processes: int = None
+    def single_gene_deletion(
+        self, gene_ids: list[str] = None, processes: int = 1
+    ) -> pd.Series:
+        """
+        Compute the objective value after deleting each gene.
+
+        GPRs are compiled once and evaluated for all deletions together (see
+        deletion.CompiledGPR). LPs are only solved for deletions disabling a
+        reaction that carries flux in the wild-type solution.
+
+        Args:
+            gene_ids (list[str], optional): IDs of genes to delete. Defaults
+                to None (all genes).
+            processes (int, optional): number of worker processes. Defaults
+                to 1.
+
+        Returns:
+            pd.Series: objective value indexed by gene ID, NaN if infeasible.
+        """
+        return deletion.single_gene_deletion(
+            self._model, gene_ids=gene_ids, processes=processes
+        )
+
+    def double_gene_deletion(
+        self, gene_ids: list[str] = None, processes: int = 1
     ) -> pd.DataFrame:
+        """
+        Compute the objective value after deleting each pair of genes.
+
+        Pairs disabling the same reactions share a single LP, and pairs
+        disabling no flux-carrying reaction keep the wild-type optimum.
+
+        Args:
+            gene_ids (list[str], optional): IDs of genes to delete. Defaults
+                to None (all genes).
+            processes (int, optional): number of worker processes. Defaults
+                to 1.
+
+        Returns:
+            pd.DataFrame: symmetric genes x genes matrix of objective values,
+                with single deletions in the diagonal.
+        """
+        return deletion.double_gene_deletion(
+            self._model, gene_ids=gene_ids, processes=processes
+        )
+
+    def sample_flux_space(
+        self,
+        n_samples: int = 1000,
+        n_processes: int = None,
+        method: str = "achr",
+        output_dir: Path = None,
+        batch_size: int = 1000,
+        thinning: int = 100,
+        dtype: str = "float64",
+        seed: int = None,
+    ) -> pd.DataFrame | FluxSampleStore:
         """
         Sample the flux space of a self._model.
 
+        If output_dir is given, samples are streamed to disk in batches of
+        batch_size, so that memory usage does not grow with n_samples, and a
+        rerun with the same output_dir resumes after the last finished batch.
+
         Args:
-            model (Model): _description_
-            n_samples (int, optional): _description_. Defaults to 1000.
+            n_samples (int, optional): number of samples. Defaults to 1000.
+            n_processes (int, optional): number of processes. Defaults to 2.
+            method (str, optional): sampling engine, "achr", "optgp" or "chrr"
+                (vectorized coordinate hit-and-run with rounding, parallel
+                across chains). Defaults to "achr".
+            output_dir (Path, optional): directory of the on-disk sample store.
+                Defaults to None (samples are returned in memory).
+            batch_size (int, optional): samples per batch when streaming to
+                disk. Defaults to 1000.
+            thinning (int, optional): thinning factor. Defaults to 100.
+            dtype (str, optional): dtype of samples stored on disk, e.g.
+                "float32". Defaults to "float64".
+            seed (int, optional): random seed. Defaults to None.
 
         Returns:
-            DataFrame: _description_
+            DataFrame | FluxSampleStore: flux samples, or on-disk sample store
+                if output_dir is given.
         """
         if n_processes is None:
             n_processes = 2
         self._model.optimize()
+        if output_dir is not None:
+            return sample_to_disk(
+                self._model,
+                output_dir,
+                n_samples,
+                batch_size=batch_size,
+                method=method,
+                thinning=thinning,
+                processes=n_processes,
+                dtype=dtype,
+                seed=seed,
+            )
+        if method == "chrr":
+            sampler = CHRRSampler(
+                self._model,
+                thinning=thinning,
+                processes=n_processes,
+                seed=seed,
+                stoichiometry=self.stoichiometry.matrix,
+            )
+            return sampler.sample(n_samples)
         flux_samples = cobra.sampling.sample(
-            self._model, n_samples, method="achr", processes=n_processes
+            self._model,
+            n_samples,
+            method=method,
+            thinning=thinning,
+            processes=n_processes,
+            seed=seed,
         )
         return flux_samples
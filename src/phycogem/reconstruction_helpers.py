@@ -1,8 +1,13 @@
+from __future__ import annotations
 import re
 import json
+from functools import lru_cache
 from pathlib import Path
 
-import pandas as pd
+from phycogem.compounds import CompoundDB
+from phycogem.lazy import lazy_import
+
+pd = lazy_import("pandas")
 
 
 def remove_compartment(met_id: str) -> str:
@@ -65,29 +70,51 @@ def get_medium_dict_from_media_db(media_db: Path, medium_id: str) -> dict:
     }
 
 
+@lru_cache(maxsize=8)
+def _read_metabolite_names(BIGG_metabolites_json: str, mtime_ns: int) -> dict:
+    with open(BIGG_metabolites_json, "r") as f:
+        met_data = json.load(f)
+    return {entry["bigg_id"]: entry["name"] for entry in met_data["results"]}
+
+
 def get_dict_of_metabolite_ids(BIGG_metabolites_json: Path) -> dict:
     """
     Get a dictionary of metabolite IDs and names from the BIGG metabolites JSON file.
+    The file is only parsed again if it has been modified since the last call.
+
     Args:
         BIGG_metabolites_json (Path): _description_
 
     Returns:
         dict: _description_
     """
-    with open(BIGG_metabolites_json, "r") as f:
-        met_data = json.load(f)
-    met_names = {}
-    for entry in met_data["results"]:
-        met_names[entry["bigg_id"]] = entry["name"]
-    return met_names
+    path = Path(BIGG_metabolites_json)
+    return dict(_read_metabolite_names(str(path.resolve()), path.stat().st_mtime_ns))
+
+
+def assign_names_to_met_ids(
+    met_names: dict | CompoundDB, met_ids: list[str]
+) -> list[str]:
+    """
+    Assign names to metabolite IDs, e.g., of exchange reactions, in a single
+    batch lookup.
+
+    Args:
+        met_names (dict | CompoundDB): dictionary of metabolite IDs and names,
+            or compound database.
+        met_ids (list[str]): metabolite IDs.
+
+    Returns:
+        list[str]: names, or the stripped metabolite ID if no name is found.
+    """
+    compound_ids = [met_id.split("_")[1] for met_id in met_ids]
+    if isinstance(met_names, CompoundDB):
+        met_names = met_names.get_names(compound_ids)
+    return [met_names.get(compound_id, compound_id) for compound_id in compound_ids]
 
 
-def assign_name_to_met_id(met_names: dict, met_id: str) -> str:
+def assign_name_to_met_id(met_names: dict | CompoundDB, met_id: str) -> str:
     """
     Assign a name to a metabolite ID.
     """
-    met_id = met_id.split("_")[1]
-    if met_id in met_names:
-        return met_names[met_id]
-    else:
-        return met_id
+    return assign_names_to_met_ids(met_names, [met_id])[0]
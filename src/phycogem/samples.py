@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import csv
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+import phycogem.bulk as bulk
+from phycogem.cache import ModelCache
+from phycogem.community import _is_shared_exchange
+from phycogem.flux_analysis import get_fluxes
+from phycogem.lazy import lazy_import
+from phycogem.media import load_media_db
+from phycogem.reconstruction import GEM
+from phycogem.stoichiometry import StoichiometricMatrix
+
+if TYPE_CHECKING:
+    from cobra import Model
+
+cobra = lazy_import("cobra")
+pd = lazy_import("pandas")
+sparse = lazy_import("scipy.sparse")
+
+TAXONOMY_COLUMNS = ["sample_id", "id", "abundance", "file"]
+GROWTH_COLUMNS = [
+    "community",
+    "medium",
+    "tradeoff",
+    "member",
+    "abundance",
+    "growth_rate",
+    "community_growth",
+]
+EXCHANGE_COLUMNS = [
+    "community",
+    "medium",
+    "tradeoff",
+    "receiver",
+    "donor",
+    "compound",
+    "flux",
+]
+
+
+def read_taxonomy(
+    taxonomy: Path | pd.DataFrame, cutoff: float = 1e-2
+) -> dict[str, dict[str, tuple[Path, float]]]:
+    """Read the members of each sample from a MICOM-style taxonomy table.
+
+    Members below the abundance cutoff are dropped, and abundances of the
+    remaining members are normalized to sum to one in each sample.
+
+    Args:
+        taxonomy (Path | pd.DataFrame): table (or CSV file) with columns
+            sample_id, id (member ID), abundance and file (SBML model file).
+            Relative model paths are taken from the directory of the CSV file.
+        cutoff (float, optional): minimum relative abundance of members.
+            Defaults to 1e-2.
+
+    Returns:
+        dict[str, dict[str, tuple[Path, float]]]: model file and abundance of
+            members, keyed by member ID, for each sample.
+    """
+    base_dir = Path()
+    if not isinstance(taxonomy, pd.DataFrame):
+        base_dir = Path(taxonomy).parent
+        taxonomy = pd.read_csv(taxonomy)
+    missing = set(TAXONOMY_COLUMNS).difference(taxonomy.columns)
+    if missing:
+        raise ValueError(f"Missing taxonomy columns: {', '.join(sorted(missing))}")
+    taxonomy = taxonomy.assign(
+        abundance=taxonomy["abundance"]
+        / taxonomy.groupby("sample_id")["abundance"].transform("sum")
+    )
+    taxonomy = taxonomy[taxonomy["abundance"] >= cutoff]
+    samples = {}
+    for sample_id, table in taxonomy.groupby("sample_id", sort=False):
+        abundances = table["abundance"] / table["abundance"].sum()
+        samples[str(sample_id)] = {
+            str(member_id): (base_dir / model_file, abundance)
+            for member_id, model_file, abundance in zip(
+                table["id"], table["file"], abundances
+            )
+        }
+    return samples
+
+
+@lru_cache(maxsize=32)
+def _load_member(model_file: Path, mtime_ns: int, cache_dir: Path) -> GEM:
+    """Load (and keep) member GEMs, shared by the samples of a process."""
+    cache = None if cache_dir is None else ModelCache(Path(cache_dir) / "models")
+    return GEM(model_file, cache=cache)
+
+
+def _get_member_reactions(members: dict[str, GEM], shared_compartment: str) -> dict:
+    """Map IDs of community reactions to the member they belong to."""
+    return {
+        f"{rxn.id}_{member_id}": member_id
+        for member_id, gem in members.items()
+        for rxn in gem.model.reactions
+        if not _is_shared_exchange(rxn, shared_compartment)
+    }
+
+
+class _TradeoffLP:
+    """Community growth tradeoff, solved as an LP.
+
+    As in MICOM's cooperative tradeoff, community growth is fixed to a
+    fraction (tradeoff) of its maximum and distributed among members. MICOM
+    does so by minimizing the sum of squared member growth rates, a QP that
+    GLPK cannot solve. Here, the minimum member growth rate is maximized
+    instead. All tradeoff values are solved on the same solver instance, so
+    that each LP is warm-started from the basis of the previous one.
+    """
+
+    def __init__(self, model: Model, member_ids: list[str]):
+        self._model = model
+        self._community_growth = model.reactions.get_by_id("community_growth")
+        self._member_growth = [
+            model.reactions.get_by_id(f"growth_{member_id}") for member_id in member_ids
+        ]
+        self.optimum = model.slim_optimize(error_value=np.nan)
+        self._min_growth = model.problem.Variable("tradeoff_min_growth", lb=0)
+        model.add_cons_vars(
+            [self._min_growth]
+            + [
+                model.problem.Constraint(
+                    rxn.flux_expression - self._min_growth,
+                    lb=0,
+                    name=f"tradeoff_{rxn.id}",
+                )
+                for rxn in self._member_growth
+            ]
+        )
+        model.objective = model.problem.Objective(self._min_growth, direction="max")
+
+    def solve(self, tradeoff: float) -> np.ndarray | None:
+        """Solve for a tradeoff value.
+
+        Returns:
+            np.ndarray | None: net fluxes of the model reactions, or None if
+                no solution is found.
+        """
+        model = self._model
+        community_growth = tradeoff * self.optimum
+        bulk.set_bounds(
+            model,
+            [self._community_growth],
+            lower_bounds=max(0.0, community_growth - model.tolerance),
+            upper_bounds=community_growth,
+        )
+        if np.isnan(model.slim_optimize(error_value=np.nan)):
+            return None
+        return get_fluxes(model.reactions)
+
+
+def _get_exchange_rows(
+    net_production: np.ndarray,
+    compound_ids: list[str],
+    member_ids: list[str],
+    prefix: tuple,
+    tolerance: float,
+) -> list[tuple]:
+    """Pair donors and receivers of each shared compound."""
+    rows = []
+    for i in np.flatnonzero(
+        (net_production > tolerance).any(axis=1)
+        & (net_production < -tolerance).any(axis=1)
+    ):
+        donors = np.flatnonzero(net_production[i] > tolerance)
+        receivers = np.flatnonzero(net_production[i] < -tolerance)
+        rows.extend(
+            (
+                *prefix,
+                member_ids[receiver],
+                member_ids[donor],
+                compound_ids[i],
+                min(net_production[i, donor], -net_production[i, receiver]),
+            )
+            for receiver in receivers
+            for donor in donors
+        )
+    return rows
+
+
+def grow_sample(
+    sample_id: str,
+    members: dict[str, tuple[Path, float]],
+    tradeoffs: list[float] = (0.5,),
+    medium_id: str = None,
+    media_db: Path = None,
+    cache_dir: Path = None,
+    shared_compartment: str = "e",
+    tolerance: float = 1e-6,
+) -> tuple[list[tuple], list[tuple]]:
+    """Build the community of a sample and grow it for each tradeoff value.
+
+    Args:
+        sample_id (str): sample ID, used as community ID.
+        members (dict[str, tuple[Path, float]]): model file and abundance of
+            members, keyed by member ID (see read_taxonomy).
+        tradeoffs (list[float], optional): fractions of the maximum community
+            growth. Defaults to (0.5,).
+        medium_id (str, optional): medium ID. Defaults to None (use the
+            exchange bounds of the members).
+        media_db (Path, optional): path to media database TSV file. Defaults
+            to None.
+        cache_dir (Path, optional): directory where parsed models are cached.
+            Defaults to None.
+        shared_compartment (str, optional): compartment of the common pool.
+            Defaults to "e".
+        tolerance (float, optional): minimum flux regarded as non-zero.
+            Defaults to 1e-6.
+
+    Returns:
+        tuple[list[tuple], list[tuple]]: rows of the growth table (see
+            GROWTH_COLUMNS) and of the exchange table (see EXCHANGE_COLUMNS).
+    """
+    member_gems = {}
+    for member_id, (model_file, _) in members.items():
+        model_file = Path(model_file)
+        member_gems[member_id] = _load_member(
+            model_file, model_file.stat().st_mtime_ns, cache_dir
+        )
+    abundances = {member_id: abundance for member_id, (_, abundance) in members.items()}
+    community = GEM.from_community(
+        member_gems,
+        shared_compartment=shared_compartment,
+        abundances=abundances,
+        model_id=sample_id,
+        balanced_growth=False,
+    )
+    if medium_id is not None:
+        community.set_medium(medium_id, load_media_db(str(media_db)))
+    model = community.model
+
+    member_ids = list(members)
+    member_reactions = _get_member_reactions(member_gems, shared_compartment)
+    member_index = {member_id: k for k, member_id in enumerate(member_ids)}
+    columns = [
+        (j, member_index[member_reactions[rxn.id]])
+        for j, rxn in enumerate(model.reactions)
+        if rxn.id in member_reactions
+    ]
+    # Reactions x members matrix, to sum member fluxes into the shared pool
+    membership = sparse.csc_matrix(
+        (np.ones(len(columns)), tuple(zip(*columns))),
+        shape=(len(model.reactions), len(member_ids)),
+    )
+    stoichiometry = StoichiometricMatrix.from_model(model)
+    shared = np.array(
+        [met.compartment == shared_compartment for met in model.metabolites]
+    )
+    shared_matrix = stoichiometry.matrix[shared]
+    compound_ids = list(stoichiometry.metabolite_ids[shared])
+
+    tradeoff_lp = _TradeoffLP(model, member_ids)
+    growth_rows, exchange_rows = [], []
+    for tradeoff in sorted(tradeoffs, reverse=True):
+        prefix = (sample_id, medium_id, tradeoff)
+        fluxes = None if np.isnan(tradeoff_lp.optimum) else tradeoff_lp.solve(tradeoff)
+        if fluxes is None:
+            growth_rows.extend(
+                (*prefix, member_id, abundances[member_id], np.nan, np.nan)
+                for member_id in member_ids
+            )
+            continue
+        community_growth = fluxes[model.reactions.index("community_growth")]
+        growth_rows.extend(
+            (
+                *prefix,
+                member_id,
+                abundances[member_id],
+                fluxes[model.reactions.index(f"growth_{member_id}")],
+                community_growth,
+            )
+            for member_id in member_ids
+        )
+        net_production = shared_matrix @ membership.multiply(fluxes[:, np.newaxis])
+        exchange_rows.extend(
+            _get_exchange_rows(
+                net_production.toarray(),
+                compound_ids,
+                member_ids,
+                prefix,
+                tolerance,
+            )
+        )
+    return growth_rows, exchange_rows
+
+
+def _grow_worker(args: tuple) -> tuple[str, list[tuple], list[tuple]]:
+    sample_id, members, kwargs = args
+    return sample_id, *grow_sample(sample_id, members, **kwargs)
+
+
+def _imap(worker, args: list, processes: int):
+    """Yield results of worker as they finish, in a process pool if needed."""
+    if processes > 1 and len(args) > 1:
+        with cobra.util.ProcessPool(min(processes, len(args))) as pool:
+            yield from pool.imap_unordered(worker, args)
+    else:
+        yield from map(worker, args)
+
+
+def grow_samples(
+    taxonomy: Path | pd.DataFrame,
+    output_file: Path,
+    tradeoffs: list[float] = (0.5,),
+    medium_id: str = None,
+    media_db: Path = None,
+    cutoff: float = 1e-2,
+    cache_dir: Path = None,
+    processes: int = 1,
+    shared_compartment: str = "e",
+    tolerance: float = 1e-6,
+) -> pd.DataFrame:
+    """Build and grow the community of every sample of a taxonomy table.
+
+    Follows MICOM's build and grow workflows: members of each sample (see
+    read_taxonomy) are merged into a community in which they grow at
+    independent rates (see community.merge_models), and the community is
+    grown for each tradeoff value (see _TradeoffLP). Samples are split among
+    worker processes. Member models are parsed once per process and kept in
+    memory, and also cached on disk if cache_dir is given, so that samples
+    sharing members do not parse them again.
+
+    Exchanges are streamed to the output file as samples finish, one row per
+    tradeoff, donor, receiver and shared compound, with the smaller of the
+    donor secretion and receiver uptake fluxes, as consumed by
+    visualization.get_graph_object_from_smetana_table.
+
+    Args:
+        taxonomy (Path | pd.DataFrame): MICOM-style taxonomy table (or CSV
+            file), see read_taxonomy.
+        output_file (Path): path to output TSV file with exchanges.
+        tradeoffs (list[float], optional): fractions of the maximum community
+            growth. Defaults to (0.5,).
+        medium_id (str, optional): medium ID. Defaults to None (use the
+            exchange bounds of the members).
+        media_db (Path, optional): path to media database TSV file. Defaults
+            to None.
+        cutoff (float, optional): minimum relative abundance of members.
+            Defaults to 1e-2.
+        cache_dir (Path, optional): directory where parsed models are cached.
+            Defaults to None.
+        processes (int, optional): number of parallel processes. Defaults to 1.
+        shared_compartment (str, optional): compartment of the common pool.
+            Defaults to "e".
+        tolerance (float, optional): minimum flux regarded as non-zero.
+            Defaults to 1e-6.
+
+    Returns:
+        pd.DataFrame: growth rate of each member, by sample and tradeoff.
+    """
+    if medium_id is not None and media_db is None:
+        raise ValueError("A media database is required to set the medium.")
+    samples = read_taxonomy(taxonomy, cutoff=cutoff)
+    kwargs = {
+        "tradeoffs": list(tradeoffs),
+        "medium_id": medium_id,
+        "media_db": media_db,
+        "cache_dir": cache_dir,
+        "shared_compartment": shared_compartment,
+        "tolerance": tolerance,
+    }
+    tasks = [(sample_id, members, kwargs) for sample_id, members in samples.items()]
+    growth_rows = []
+    with open(output_file, "w", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(EXCHANGE_COLUMNS)
+        for _, sample_growth, sample_exchanges in _imap(_grow_worker, tasks, processes):
+            growth_rows.extend(sample_growth)
+            writer.writerows(sample_exchanges)
+            f.flush()
+    return pd.DataFrame(growth_rows, columns=GROWTH_COLUMNS)
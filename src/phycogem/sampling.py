@@ -0,0 +1,543 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+import numpy as np
+
+from phycogem.lazy import lazy_import
+from phycogem.stoichiometry import StoichiometricMatrix
+
+if TYPE_CHECKING:
+    from cobra import Model
+
+cobra = lazy_import("cobra")
+optlang = lazy_import("optlang")
+pd = lazy_import("pandas")
+sparse = lazy_import("scipy.sparse")
+splinalg = lazy_import("scipy.sparse.linalg")
+
+
+class FluxSampleStore:
+    """Flux samples stored on disk as a memory-mapped array.
+
+    A store is a directory containing the samples x reactions array
+    (samples.npy) and a metadata file (metadata.json) recording the reaction
+    IDs and the number of completed samples. Statistics are computed in blocks,
+    so that samples never need to be loaded into memory at once.
+    """
+
+    samples_file = "samples.npy"
+    metadata_file = "metadata.json"
+
+    def __init__(self, store_dir: Path):
+        """
+        Args:
+            store_dir (Path): directory of the sample store.
+        """
+        self._store_dir = Path(store_dir)
+        with open(self._store_dir / self.metadata_file, "r") as f:
+            self._metadata = json.load(f)
+        self._samples = np.load(self._store_dir / self.samples_file, mmap_mode="r")
+
+    @property
+    def metadata(self) -> dict:
+        """Return store metadata."""
+        return self._metadata
+
+    @property
+    def reaction_ids(self) -> list[str]:
+        """Return reaction IDs in column order."""
+        return self._metadata["reaction_ids"]
+
+    @property
+    def n_samples(self) -> int:
+        """Return number of completed samples."""
+        return min(
+            self._metadata["n_batches_done"] * self._metadata["batch_size"],
+            self._metadata["n_samples"],
+        )
+
+    @property
+    def samples(self) -> np.ndarray:
+        """Return memory-mapped array of completed samples."""
+        return self._samples[: self.n_samples]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def _columns(self, reaction_ids: list[str] = None) -> list[int]:
+        if reaction_ids is None:
+            return list(range(len(self.reaction_ids)))
+        column_index = {rxn_id: i for i, rxn_id in enumerate(self.reaction_ids)}
+        return [column_index[rxn_id] for rxn_id in reaction_ids]
+
+    def iter_batches(self, batch_size: int = 10000) -> Iterator[pd.DataFrame]:
+        """Iterate over samples in batches of rows.
+
+        Args:
+            batch_size (int, optional): number of samples per batch.
+                Defaults to 10000.
+
+        Yields:
+            pd.DataFrame: batch of flux samples.
+        """
+        samples = self.samples
+        for start in range(0, len(samples), batch_size):
+            yield pd.DataFrame(
+                np.asarray(samples[start : start + batch_size]),
+                columns=self.reaction_ids,
+            )
+
+    def to_frame(self, reaction_ids: list[str] = None) -> pd.DataFrame:
+        """Load samples of selected reactions into a DataFrame.
+
+        Args:
+            reaction_ids (list[str], optional): reaction IDs. Defaults to None
+                (all reactions).
+
+        Returns:
+            pd.DataFrame: flux samples.
+        """
+        columns = self._columns(reaction_ids)
+        return pd.DataFrame(
+            np.asarray(self.samples[:, columns]),
+            columns=[self.reaction_ids[i] for i in columns],
+        )
+
+    def mean(self, batch_size: int = 10000) -> pd.Series:
+        """Compute mean flux of each reaction.
+
+        Args:
+            batch_size (int, optional): number of samples read at once.
+                Defaults to 10000.
+
+        Returns:
+            pd.Series: mean fluxes.
+        """
+        samples = self.samples
+        total = np.zeros(samples.shape[1], dtype=np.float64)
+        for start in range(0, len(samples), batch_size):
+            total += samples[start : start + batch_size].sum(axis=0, dtype=np.float64)
+        return pd.Series(total / max(len(samples), 1), index=self.reaction_ids)
+
+    def quantile(
+        self, q: float | list[float] = 0.5, max_block_size: int = 2**26
+    ) -> pd.DataFrame:
+        """Compute flux quantiles of each reaction.
+
+        Quantiles are computed on blocks of reactions, each block holding
+        at most max_block_size values in memory.
+
+        Args:
+            q (float | list[float], optional): quantiles. Defaults to 0.5.
+            max_block_size (int, optional): maximum number of values loaded
+                at once. Defaults to 2**26.
+
+        Returns:
+            pd.DataFrame: quantiles x reactions table.
+        """
+        quantiles = np.atleast_1d(q)
+        samples = self.samples
+        block_columns = max(1, max_block_size // max(len(samples), 1))
+        results = np.empty((len(quantiles), samples.shape[1]))
+        for start in range(0, samples.shape[1], block_columns):
+            block = np.asarray(samples[:, start : start + block_columns])
+            results[:, start : start + block_columns] = np.quantile(
+                block, quantiles, axis=0
+            )
+        return pd.DataFrame(results, index=quantiles, columns=self.reaction_ids)
+
+
+def get_warmup_points(model: Model, tolerance: float = 1e-9) -> np.ndarray:
+    """Generate warmup points by minimizing and maximizing each reaction flux.
+
+    Args:
+        model (Model): cobra model.
+        tolerance (float, optional): bound width below which reactions are
+            considered fixed and skipped. Defaults to 1e-9.
+
+    Returns:
+        np.ndarray: warmup points x reactions array of net fluxes.
+    """
+    reactions = model.reactions
+    variable_index = {name: i for i, name in enumerate(model.solver.variables.keys())}
+    forward_index = [variable_index[rxn.forward_variable.name] for rxn in reactions]
+    reverse_index = [variable_index[rxn.reverse_variable.name] for rxn in reactions]
+    warmup = []
+    with model:
+        model.objective = optlang.symbolics.Zero
+        for direction in ("min", "max"):
+            model.solver.objective.direction = direction
+            for rxn in reactions:
+                if rxn.upper_bound - rxn.lower_bound < tolerance:
+                    continue
+                model.solver.objective.set_linear_coefficients(
+                    {rxn.forward_variable: 1, rxn.reverse_variable: -1}
+                )
+                model.slim_optimize()
+                if model.solver.status == "optimal":
+                    # Primal values of all variables, in solver order
+                    primals = np.fromiter(
+                        model.solver.primal_values.values(), dtype=float
+                    )
+                    warmup.append(primals[forward_index] - primals[reverse_index])
+                model.solver.objective.set_linear_coefficients(
+                    {rxn.forward_variable: 0, rxn.reverse_variable: 0}
+                )
+    return np.array(warmup)
+
+
+def project_to_nullspace(
+    stoichiometry: sparse.csr_matrix,
+    vectors: np.ndarray,
+    tolerance: float = 1e-9,
+    max_refinements: int = 10,
+) -> np.ndarray:
+    """Project flux vectors onto the null space of a sparse stoichiometric matrix.
+
+    The projection of v is v - S^T y, where y solves (S S^T) y = S v. S S^T is
+    factorized once as a sparse matrix, with a small diagonal shift since it
+    is singular whenever metabolite rows are linearly dependent. The error of
+    the shift is removed by iterative refinement, which converges in one or
+    two steps for vectors already close to the null space, such as LP
+    solutions.
+
+    Args:
+        stoichiometry (sparse.csr_matrix): metabolites x reactions matrix.
+        vectors (np.ndarray): reactions x vectors array.
+        tolerance (float, optional): maximum absolute mass balance violation
+            of the projected vectors. Defaults to 1e-9.
+        max_refinements (int, optional): maximum number of refinement steps.
+            Defaults to 10.
+
+    Returns:
+        np.ndarray: reactions x vectors array of projected vectors.
+    """
+    stoichiometry = sparse.csc_matrix(stoichiometry)
+    normal_matrix = (stoichiometry @ stoichiometry.T).tocsc()
+    shift = 1e-10 * max(np.abs(normal_matrix.data).max(initial=0), 1)
+    lu = splinalg.splu(
+        (normal_matrix + shift * sparse.identity(normal_matrix.shape[0])).tocsc()
+    )
+    projected = np.array(vectors, dtype=float)
+    for _ in range(max_refinements):
+        imbalance = np.asarray(stoichiometry @ projected)
+        if np.abs(imbalance).max(initial=0) <= tolerance:
+            break
+        projected -= stoichiometry.T @ lu.solve(imbalance)
+    return projected
+
+
+def _run_chains(
+    points: np.ndarray,
+    directions: np.ndarray,
+    lower_bounds: np.ndarray,
+    upper_bounds: np.ndarray,
+    n_steps: int,
+    thinning: int,
+    rng: np.random.Generator,
+    tolerance: float,
+    burn_in: int = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Advance coordinate hit-and-run chains, all chains at once.
+
+    Args:
+        points (np.ndarray): chains x reactions array of current points.
+        directions (np.ndarray): reactions x coordinates array of (rounded)
+            search directions.
+        lower_bounds (np.ndarray): lower flux bounds.
+        upper_bounds (np.ndarray): upper flux bounds.
+        n_steps (int): number of samples to retrieve from each chain.
+        thinning (int): number of steps between retrieved samples.
+        rng (np.random.Generator): random number generator.
+        tolerance (float): direction components below this value are ignored.
+        burn_in (int, optional): number of steps discarded before the first
+            retrieved sample. Defaults to 0.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: samples (steps x chains x reactions)
+            and final points of the chains.
+    """
+    n_chains = points.shape[0]
+    samples = np.empty((n_steps, n_chains, points.shape[1]))
+    chains = np.arange(n_chains)
+    # A direction with no component above tolerance leaves the step length
+    # unbounded, so such directions are redrawn, i.e. never drawn at all.
+    coordinate_ids = np.flatnonzero((np.abs(directions) > tolerance).any(axis=0))
+    if len(coordinate_ids) == 0:
+        samples[:] = points
+        return samples, points
+    for step in range(-burn_in, n_steps * thinning):
+        coordinates = coordinate_ids[rng.integers(len(coordinate_ids), size=n_chains)]
+        delta = directions[:, coordinates].T
+        moving = np.abs(delta) > tolerance
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_lower = (lower_bounds - points) / delta
+            to_upper = (upper_bounds - points) / delta
+        step_min = np.where(moving, np.minimum(to_lower, to_upper), -np.inf).max(axis=1)
+        step_max = np.where(moving, np.maximum(to_lower, to_upper), np.inf).min(axis=1)
+        step_max = np.maximum(step_max, step_min)
+        step_lengths = step_min + (step_max - step_min) * rng.random(n_chains)
+        points = points + step_lengths[:, None] * delta
+        points = np.clip(points, lower_bounds, upper_bounds)
+        if step >= 0 and (step + 1) % thinning == 0:
+            samples[(step + 1) // thinning - 1, chains] = points
+    return samples, points
+
+
+def _run_chains_worker(args: tuple) -> np.ndarray:
+    return _run_chains(*args)
+
+
+class CHRRSampler:
+    """Coordinate hit-and-run sampler with rounding (CHRR).
+
+    The flux polytope {v : Sv = 0, lb <= v <= ub} is rounded with the principal
+    axes of a set of warmup points, which are computed once per model and
+    projected onto the null space of the (sparse) stoichiometric matrix, so
+    that S is never densified (see project_to_nullspace). Each chain starts at
+    a random point between the warmup center and a warmup point, and a burn-in
+    is discarded before the first sample. Many chains are then advanced
+    simultaneously as batched NumPy array operations, and chains may be split
+    across processes. Only stoichiometric and bound constraints are
+    considered, any additional solver constraints are ignored.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        thinning: int = 100,
+        n_chains: int = 100,
+        processes: int = None,
+        seed: int = None,
+        tolerance: float = 1e-9,
+        stoichiometry: sparse.csr_matrix = None,
+        burn_in: int = None,
+    ):
+        """
+        Args:
+            model (Model): cobra model.
+            thinning (int, optional): thinning factor. Defaults to 100.
+            n_chains (int, optional): number of chains run in parallel.
+                Defaults to 100.
+            processes (int, optional): number of processes among which chains
+                are split. Defaults to None (single process).
+            seed (int, optional): random seed. Defaults to None.
+            tolerance (float, optional): numerical tolerance. Defaults to 1e-9.
+            stoichiometry (sparse.csr_matrix, optional): stoichiometric matrix
+                of the model. Defaults to None (built from the model).
+            burn_in (int, optional): number of steps each chain takes before
+                the first sample is retrieved. Defaults to None (ten times the
+                dimension of the flux polytope).
+        """
+        self._reaction_ids = [rxn.id for rxn in model.reactions]
+        self._lower_bounds = np.array([rxn.lower_bound for rxn in model.reactions])
+        self._upper_bounds = np.array([rxn.upper_bound for rxn in model.reactions])
+        self._thinning = thinning
+        self._processes = processes or 1
+        self._tolerance = tolerance
+        self._rng = np.random.default_rng(seed)
+
+        warmup = get_warmup_points(model, tolerance)
+        center = warmup.mean(axis=0)
+        if stoichiometry is None:
+            stoichiometry = StoichiometricMatrix.from_model(model).matrix
+        _, singular_values, axes = np.linalg.svd(warmup - center, full_matrices=False)
+        keep = singular_values > tolerance * max(singular_values.max(initial=0), 1)
+        scales = singular_values[keep] / np.sqrt(len(warmup))
+        starts = warmup[self._rng.integers(len(warmup), size=n_chains)]
+        projected = project_to_nullspace(
+            stoichiometry,
+            np.column_stack([axes[keep].T * scales, center, starts.T]),
+            tolerance,
+        )
+        n_directions = int(keep.sum())
+        self._directions = projected[:, :n_directions]
+        self._center = np.clip(
+            projected[:, n_directions], self._lower_bounds, self._upper_bounds
+        )
+        # Points between the center and a warmup point lie within the polytope
+        fractions = self._rng.random((n_chains, 1))
+        starts = projected[:, n_directions + 1 :].T
+        self._points = np.clip(
+            self._center + fractions * (starts - self._center),
+            self._lower_bounds,
+            self._upper_bounds,
+        )
+        self._burn_in = 10 * self.dimension if burn_in is None else burn_in
+
+    @property
+    def dimension(self) -> int:
+        """Return dimension of the (rounded) flux polytope."""
+        return self._directions.shape[1]
+
+    @property
+    def n_chains(self) -> int:
+        """Return number of chains."""
+        return self._points.shape[0]
+
+    def sample(self, n: int) -> pd.DataFrame:
+        """Draw flux samples, continuing the chains from previous calls.
+
+        Burn-in steps are only taken by the first call.
+
+        Args:
+            n (int): number of samples.
+
+        Returns:
+            pd.DataFrame: flux samples.
+        """
+        n_steps = -(-n // self.n_chains)
+        chain_groups = np.array_split(
+            np.arange(self.n_chains), min(self._processes, self.n_chains)
+        )
+        seeds = self._rng.integers(np.iinfo(np.int32).max, size=len(chain_groups))
+        tasks = [
+            (
+                self._points[chains],
+                self._directions,
+                self._lower_bounds,
+                self._upper_bounds,
+                n_steps,
+                self._thinning,
+                np.random.default_rng(seed),
+                self._tolerance,
+                self._burn_in,
+            )
+            for chains, seed in zip(chain_groups, seeds)
+        ]
+        if len(tasks) == 1:
+            results = [_run_chains_worker(tasks[0])]
+        else:
+            with cobra.util.ProcessPool(len(tasks)) as pool:
+                results = pool.map(_run_chains_worker, tasks)
+        samples = np.concatenate([result[0] for result in results], axis=1)
+        self._points = np.concatenate([result[1] for result in results])
+        self._burn_in = 0
+        return pd.DataFrame(
+            samples.reshape(-1, samples.shape[-1])[:n], columns=self._reaction_ids
+        )
+
+
+def _write_metadata(store_dir: Path, metadata: dict) -> None:
+    metadata_file = store_dir / FluxSampleStore.metadata_file
+    tmp_file = metadata_file.with_suffix(".json.tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(metadata, f)
+    os.replace(tmp_file, metadata_file)
+
+
+def get_sampler(
+    model: Model,
+    method: str = "achr",
+    thinning: int = 100,
+    processes: int = None,
+    seed: int = None,
+):
+    """Initialize a flux sampler.
+
+    Args:
+        model (Model): cobra model.
+        method (str, optional): "achr", "optgp" or "chrr". Defaults to "achr".
+        thinning (int, optional): thinning factor. Defaults to 100.
+        processes (int, optional): processes used by OptGP and CHRR.
+            Defaults to None.
+        seed (int, optional): random seed. Defaults to None.
+
+    Returns:
+        HRSampler | CHRRSampler: flux sampler.
+    """
+    if method == "achr":
+        return cobra.sampling.ACHRSampler(model, thinning=thinning, seed=seed)
+    elif method == "optgp":
+        return cobra.sampling.OptGPSampler(
+            model, thinning=thinning, processes=processes, seed=seed
+        )
+    elif method == "chrr":
+        return CHRRSampler(model, thinning=thinning, processes=processes, seed=seed)
+    raise ValueError(f"Unknown sampling method {method}.")
+
+
+def sample_to_disk(
+    model: Model,
+    store_dir: Path,
+    n_samples: int,
+    batch_size: int = 1000,
+    method: str = "achr",
+    thinning: int = 100,
+    processes: int = None,
+    dtype: str = "float64",
+    seed: int = None,
+) -> FluxSampleStore:
+    """Sample the flux space of a model in batches written to disk.
+
+    Only one batch of samples is held in memory at a time. Metadata is updated
+    after each batch, so that sampling into an existing store resumes after the
+    last completed batch.
+
+    Args:
+        model (Model): cobra model.
+        store_dir (Path): directory of the sample store.
+        n_samples (int): total number of samples.
+        batch_size (int, optional): number of samples per batch.
+            Defaults to 1000.
+        method (str, optional): "achr", "optgp" or "chrr". Defaults to "achr".
+        thinning (int, optional): thinning factor. Defaults to 100.
+        processes (int, optional): processes used by OptGP and CHRR.
+            Defaults to None.
+        dtype (str, optional): dtype of stored samples, e.g. "float32" to
+            halve disk usage. Defaults to "float64".
+        seed (int, optional): random seed. Defaults to None.
+
+    Returns:
+        FluxSampleStore: store with the flux samples.
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    reaction_ids = [rxn.id for rxn in model.reactions]
+    n_batches = -(-n_samples // batch_size)
+    metadata = {
+        "reaction_ids": reaction_ids,
+        "n_samples": n_samples,
+        "batch_size": batch_size,
+        "n_batches": n_batches,
+        "n_batches_done": 0,
+        "method": method,
+        "thinning": thinning,
+        "dtype": np.dtype(dtype).name,
+    }
+    samples_file = store_dir / FluxSampleStore.samples_file
+    metadata_file = store_dir / FluxSampleStore.metadata_file
+    if metadata_file.is_file():
+        with open(metadata_file, "r") as f:
+            previous_metadata = json.load(f)
+        if {k: v for k, v in previous_metadata.items() if k != "n_batches_done"} != {
+            k: v for k, v in metadata.items() if k != "n_batches_done"
+        }:
+            raise ValueError(
+                f"Sample store {store_dir} was created with different settings."
+            )
+        metadata = previous_metadata
+        samples = np.load(samples_file, mmap_mode="r+")
+    else:
+        samples = np.lib.format.open_memmap(
+            samples_file, mode="w+", dtype=dtype, shape=(n_samples, len(reaction_ids))
+        )
+        _write_metadata(store_dir, metadata)
+
+    if metadata["n_batches_done"] < n_batches:
+        batch_seed = None if seed is None else seed + metadata["n_batches_done"]
+        sampler = get_sampler(model, method, thinning, processes, batch_seed)
+        for batch in range(metadata["n_batches_done"], n_batches):
+            start = batch * batch_size
+            stop = min(start + batch_size, n_samples)
+            batch_samples = sampler.sample(stop - start)
+            samples[start:stop] = batch_samples[reaction_ids].to_numpy(dtype=dtype)
+            samples.flush()
+            metadata["n_batches_done"] = batch + 1
+            _write_metadata(store_dir, metadata)
+    del samples
+    return FluxSampleStore(store_dir)
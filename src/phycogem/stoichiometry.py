@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from phycogem.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from cobra import Metabolite, Model, Reaction
+
+sparse = lazy_import("scipy.sparse")
+
+
+class StoichiometricMatrix:
+    """Sparse (CSR) stoichiometric matrix with aligned IDs and flux bounds.
+
+    Rows follow the order of the model's metabolites and columns the order of
+    its reactions. The matrix can be updated in place when reactions are added
+    or removed, and saved to a directory of .npy files that are loaded as
+    memory maps, so that worker processes share a single copy of it.
+    """
+
+    _arrays = (
+        "data",
+        "indices",
+        "indptr",
+        "metabolite_ids",
+        "reaction_ids",
+        "lower_bounds",
+        "upper_bounds",
+    )
+
+    def __init__(
+        self,
+        matrix: sparse.csr_matrix,
+        metabolite_ids: np.ndarray,
+        reaction_ids: np.ndarray,
+        lower_bounds: np.ndarray,
+        upper_bounds: np.ndarray,
+    ):
+        """
+        Args:
+            matrix (sparse.csr_matrix): metabolites x reactions matrix.
+            metabolite_ids (np.ndarray): IDs of metabolites (rows).
+            reaction_ids (np.ndarray): IDs of reactions (columns).
+            lower_bounds (np.ndarray): lower flux bounds of reactions.
+            upper_bounds (np.ndarray): upper flux bounds of reactions.
+        """
+        self._matrix = matrix
+        self._metabolite_ids = np.asarray(metabolite_ids, dtype=str)
+        self._reaction_ids = np.asarray(reaction_ids, dtype=str)
+        self._lower_bounds = lower_bounds
+        self._upper_bounds = upper_bounds
+        self._reaction_index = None
+
+    @classmethod
+    def from_model(cls, model: Model) -> StoichiometricMatrix:
+        """Build the stoichiometric matrix of a model.
+
+        Args:
+            model (Model): cobra model.
+
+        Returns:
+            StoichiometricMatrix: stoichiometric matrix.
+        """
+        met_index = {met.id: i for i, met in enumerate(model.metabolites)}
+        matrix = cls._build_columns(model.reactions, met_index, len(met_index))
+        return cls(
+            matrix,
+            [met.id for met in model.metabolites],
+            [rxn.id for rxn in model.reactions],
+            np.array([rxn.lower_bound for rxn in model.reactions], dtype=float),
+            np.array([rxn.upper_bound for rxn in model.reactions], dtype=float),
+        )
+
+    @staticmethod
+    def _build_columns(
+        reactions: list[Reaction], met_index: dict, n_metabolites: int
+    ) -> sparse.csr_matrix:
+        rows, cols, coefficients = [], [], []
+        for j, rxn in enumerate(reactions):
+            for met, coefficient in rxn._metabolites.items():
+                rows.append(met_index[met.id])
+                cols.append(j)
+                coefficients.append(coefficient)
+        return sparse.csr_matrix(
+            (np.array(coefficients, dtype=float), (rows, cols)),
+            shape=(n_metabolites, len(reactions)),
+        )
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """Return metabolites x reactions sparse matrix."""
+        return self._matrix
+
+    @property
+    def metabolite_ids(self) -> np.ndarray:
+        """Return IDs of metabolites, in row order."""
+        return self._metabolite_ids
+
+    @property
+    def reaction_ids(self) -> np.ndarray:
+        """Return IDs of reactions, in column order."""
+        return self._reaction_ids
+
+    @property
+    def lower_bounds(self) -> np.ndarray:
+        """Return lower flux bounds of reactions, in column order."""
+        return self._lower_bounds
+
+    @property
+    def upper_bounds(self) -> np.ndarray:
+        """Return upper flux bounds of reactions, in column order."""
+        return self._upper_bounds
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Return number of metabolites and reactions."""
+        return self._matrix.shape
+
+    @property
+    def density(self) -> float:
+        """Return fraction of non-zero entries."""
+        n_metabolites, n_reactions = self.shape
+        return self._matrix.nnz / max(n_metabolites * n_reactions, 1)
+
+    def get_reaction_indices(self, reaction_ids: list[str]) -> np.ndarray:
+        """Return column indices of reactions.
+
+        Args:
+            reaction_ids (list[str]): reaction IDs.
+
+        Returns:
+            np.ndarray: column indices.
+        """
+        if self._reaction_index is None:
+            self._reaction_index = {
+                rxn_id: j for j, rxn_id in enumerate(self._reaction_ids)
+            }
+        return np.array(
+            [self._reaction_index[rxn_id] for rxn_id in reaction_ids], dtype=int
+        )
+
+    def update_bounds(self, reactions: list[Reaction]) -> None:
+        """Copy the current flux bounds of reactions.
+
+        Args:
+            reactions (list[Reaction]): cobra reactions.
+        """
+        reactions = list(reactions)
+        if not reactions:
+            return
+        indices = self.get_reaction_indices([rxn.id for rxn in reactions])
+        if not self._lower_bounds.flags.writeable:
+            self._lower_bounds = self._lower_bounds.copy()
+            self._upper_bounds = self._upper_bounds.copy()
+        self._lower_bounds[indices] = [rxn.lower_bound for rxn in reactions]
+        self._upper_bounds[indices] = [rxn.upper_bound for rxn in reactions]
+
+    def add(
+        self, reactions: list[Reaction], metabolites: list[Metabolite] = ()
+    ) -> None:
+        """Append columns of reactions, and rows of new metabolites.
+
+        Args:
+            reactions (list[Reaction]): cobra reactions.
+            metabolites (list[Metabolite], optional): metabolites to append,
+                besides those of the reactions. Defaults to ().
+        """
+        met_ids = list(self._metabolite_ids)
+        met_index = {met_id: i for i, met_id in enumerate(met_ids)}
+        new_metabolites = list(metabolites) + [
+            met for rxn in reactions for met in rxn._metabolites
+        ]
+        for met in new_metabolites:
+            if met.id not in met_index:
+                met_index[met.id] = len(met_ids)
+                met_ids.append(met.id)
+        n_new_rows = len(met_ids) - len(self._metabolite_ids)
+        columns = self._build_columns(reactions, met_index, len(met_ids))
+        matrix = sparse.vstack(
+            [self._matrix, sparse.csr_matrix((n_new_rows, self._matrix.shape[1]))]
+        )
+        self._matrix = sparse.hstack([matrix, columns], format="csr")
+        self._metabolite_ids = np.asarray(met_ids, dtype=str)
+        self._reaction_ids = np.concatenate(
+            [self._reaction_ids, np.asarray([rxn.id for rxn in reactions], dtype=str)]
+        )
+        self._lower_bounds = np.concatenate(
+            [self._lower_bounds, [rxn.lower_bound for rxn in reactions]]
+        )
+        self._upper_bounds = np.concatenate(
+            [self._upper_bounds, [rxn.upper_bound for rxn in reactions]]
+        )
+        self._reaction_index = None
+
+    def remove(self, reaction_ids: list[str], metabolite_ids: list[str] = ()) -> None:
+        """Remove columns of reactions and rows of metabolites.
+
+        Args:
+            reaction_ids (list[str]): IDs of reactions to remove.
+            metabolite_ids (list[str], optional): IDs of metabolites to remove.
+                Defaults to ().
+        """
+        keep_cols = ~np.isin(self._reaction_ids, list(reaction_ids))
+        keep_rows = ~np.isin(self._metabolite_ids, list(metabolite_ids))
+        self._matrix = self._matrix[keep_rows][:, keep_cols]
+        self._metabolite_ids = self._metabolite_ids[keep_rows]
+        self._reaction_ids = self._reaction_ids[keep_cols]
+        self._lower_bounds = self._lower_bounds[keep_cols]
+        self._upper_bounds = self._upper_bounds[keep_cols]
+        self._reaction_index = None
+
+    def save(self, output_dir: Path) -> None:
+        """Save matrix, IDs and bounds as .npy files in a directory.
+
+        Args:
+            output_dir (Path): output directory.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "data": self._matrix.data,
+            "indices": self._matrix.indices,
+            "indptr": self._matrix.indptr,
+            "metabolite_ids": self._metabolite_ids,
+            "reaction_ids": self._reaction_ids,
+            "lower_bounds": self._lower_bounds,
+            "upper_bounds": self._upper_bounds,
+        }
+        for name in self._arrays:
+            np.save(output_dir / f"{name}.npy", np.asarray(arrays[name]))
+
+    @classmethod
+    def load(cls, input_dir: Path, mmap_mode: str = "r") -> StoichiometricMatrix:
+        """Load a matrix saved with save.
+
+        Args:
+            input_dir (Path): directory with .npy files.
+            mmap_mode (str, optional): memory-map mode of numpy.load, None to
+                read arrays into memory. Defaults to "r" (read-only maps).
+
+        Returns:
+            StoichiometricMatrix: stoichiometric matrix.
+        """
+        arrays = {
+            name: np.load(Path(input_dir) / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in cls._arrays
+        }
+        matrix = sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=(len(arrays["metabolite_ids"]), len(arrays["reaction_ids"])),
+            copy=False,
+        )
+        return cls(
+            matrix,
+            arrays["metabolite_ids"],
+            arrays["reaction_ids"],
+            arrays["lower_bounds"],
+            arrays["upper_bounds"],
+        )
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+import phycogem.bulk as bulk
+import phycogem.reconstruction_helpers as helpers
+from phycogem.compounds import CompoundDB, read_annotations
+from phycogem.lazy import lazy_import
+from phycogem.stoichiometry import StoichiometricMatrix
+
+if TYPE_CHECKING:
+    from cobra import Metabolite, Model
+
+sparse = lazy_import("scipy.sparse")
+
+REACTION_TABLE_COLUMNS = ["model", "reaction", "lb", "ub", "subsystem", "gpr"]
+
+
+def write_reaction_table(
+    model: Model, output_file: Path, model_name: str = "iML1515"
+) -> None:
+    """Write the reaction table of a CarveMe universe, one reaction at a time.
+
+    Args:
+        model (Model): cobra model.
+        output_file (Path): output CSV file.
+        model_name (str, optional): value of the model column. Defaults to
+            "iML1515".
+    """
+    with open(output_file, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(REACTION_TABLE_COLUMNS)
+        for rxn in model.reactions:
+            writer.writerow(
+                [
+                    model_name,
+                    rxn.id,
+                    rxn.lower_bound,
+                    rxn.upper_bound,
+                    rxn.subsystem,
+                    rxn.gene_reaction_rule,
+                ]
+            )
+
+
+def annotate_metabolites(
+    metabolites: list[Metabolite], cpd_annotations: Path | CompoundDB
+) -> None:
+    """Set formula and charge of metabolites found in compound annotations.
+
+    Metabolite IDs (without compartment) are joined with the annotations at
+    once, instead of looking up each metabolite.
+
+    Args:
+        metabolites (list[Metabolite]): cobra metabolites.
+        cpd_annotations (Path | CompoundDB): compound database, or TSV file
+            with formula and charge columns, indexed by compound ID.
+    """
+    compound_ids = [helpers.remove_compartment(met.id) for met in metabolites]
+    annotations = read_annotations(cpd_annotations, compound_ids)
+    positions = annotations.index.get_indexer(compound_ids)
+    formulas = annotations["formula"].to_numpy()
+    charges = annotations["charge"].to_numpy()
+    for met, i in zip(metabolites, positions):
+        if i >= 0:
+            met.formula = formulas[i]
+            met.charge = charges[i]
+
+
+def _classify_reactions(
+    stoichiometry: StoichiometricMatrix,
+    compartments: list[str],
+    allowed_compartments: set,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find shuttle reactions, their orphan metabolites and reactions to move.
+
+    Compartments of all reactions are computed at once, as the product of the
+    reaction-metabolite incidence matrix and the metabolite-compartment
+    indicator matrix.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: masks of shuttle reactions
+            (with several compartments, not all allowed), of metabolites only
+            involved in shuttle reactions and of other reactions with
+            compartments that are not allowed.
+    """
+    matrix = stoichiometry.matrix
+    incidence = sparse.csr_matrix(
+        (np.ones(matrix.nnz), matrix.indices, matrix.indptr), shape=matrix.shape
+    )
+    compartment_ids = sorted(set(compartments), key=str)
+    codes = {comp_id: k for k, comp_id in enumerate(compartment_ids)}
+    indicator = sparse.csr_matrix(
+        (
+            np.ones(len(compartments)),
+            (
+                [codes[comp_id] for comp_id in compartments],
+                np.arange(len(compartments)),
+            ),
+        ),
+        shape=(len(compartment_ids), len(compartments)),
+    )
+    rxn_compartments = (indicator @ incidence).T.tocsc()
+    unwanted = [
+        k
+        for k, comp_id in enumerate(compartment_ids)
+        if comp_id not in allowed_compartments
+    ]
+    unwanted_defined = [k for k in unwanted if compartment_ids[k] is not None]
+
+    n_compartments = rxn_compartments.getnnz(axis=1)
+    has_unwanted = rxn_compartments[:, unwanted].getnnz(axis=1) > 0
+    is_shuttle = (n_compartments > 1) & has_unwanted
+    to_move = ~is_shuttle & (rxn_compartments[:, unwanted_defined].getnnz(axis=1) > 0)
+
+    n_reactions = incidence.getnnz(axis=1)
+    n_shuttles = incidence[:, is_shuttle].getnnz(axis=1)
+    is_orphan = (n_shuttles > 0) & (n_shuttles == n_reactions)
+    return is_shuttle, is_orphan, to_move
+
+
+def curate_universe(
+    model: Model,
+    allowed_compartments: set,
+    cpd_annotations: Path | CompoundDB,
+    output_reaction_file: Path,
+    target_compartment: str = "c",
+    model_name: str = "iML1515",
+    stoichiometry: StoichiometricMatrix = None,
+) -> None:
+    """Turn a universal model into a CarveMe universe in a single planned pass.
+
+    Same result as calling, in order, GEM.remove_shuttle_reactions,
+    GEM.move_reactions_to_cytoplasm, GEM.annotate_compounds and
+    GEM.prepare_for_carveme. Shuttle reactions and reactions to move are
+    found at once on the sparse stoichiometric matrix, the new layout is
+    planned on IDs (see bulk.collapse_compartments) and applied in a few bulk
+    operations. Metabolites are then annotated with a single join on their
+    IDs, and the reaction table is streamed to the CSV file.
+
+    Args:
+        model (Model): cobra model, modified in place.
+        allowed_compartments (set): compartments that are kept.
+        cpd_annotations (Path | CompoundDB): compound database, or TSV file
+            with formula and charge columns, indexed by metabolite IDs without
+            compartment.
+        output_reaction_file (Path): output CSV file with the reaction table.
+        target_compartment (str, optional): compartment into which metabolites
+            of moved reactions are merged. Defaults to "c".
+        model_name (str, optional): value of the model column of the reaction
+            table. Defaults to "iML1515".
+        stoichiometry (StoichiometricMatrix, optional): stoichiometric matrix
+            of the model. Defaults to None (built from the model).
+    """
+    if stoichiometry is None:
+        stoichiometry = StoichiometricMatrix.from_model(model)
+    is_shuttle, is_orphan, to_move = _classify_reactions(
+        stoichiometry,
+        [met.compartment for met in model.metabolites],
+        allowed_compartments,
+    )
+    shuttle_rxns = [model.reactions[j] for j in np.flatnonzero(is_shuttle)]
+    new_metabolites, removed_metabolites, new_reactions = bulk._plan_collapse(
+        model,
+        [model.reactions[j] for j in np.flatnonzero(to_move)],
+        target_compartment,
+        allowed_compartments,
+        excluded_metabolites=set(stoichiometry.metabolite_ids[is_orphan]),
+    )
+    moved_rxns = [model.reactions.get_by_id(rxn.id) for rxn in new_reactions]
+
+    bulk.remove_reactions(model, shuttle_rxns, remove_orphans=True)
+    model.add_metabolites(new_metabolites)
+    bulk.remove_metabolites(model, removed_metabolites)
+    bulk.remove_reactions(model, moved_rxns, remove_orphans=True)
+    model.add_reactions(new_reactions)
+
+    annotate_metabolites(model.metabolites, cpd_annotations)
+    for met in model.metabolites:
+        if not met.compartment.startswith("C_"):
+            met.compartment = f"C_{met.compartment}"
+    write_reaction_table(model, output_reaction_file, model_name)
@@ -1,11 +1,23 @@
+from __future__ import annotations
 import json
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import cycle
 from pathlib import Path
-import matplotlib.pyplot as plt
-import seaborn as sns
-from pandas import DataFrame, Series
+from typing import TYPE_CHECKING, Callable
 
-import networkx as nx
-from networkx.readwrite import json_graph
+import numpy as np
+
+from phycogem.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from pandas import DataFrame, Series
+
+cobra = lazy_import("cobra")
+nx = lazy_import("networkx")
+pd = lazy_import("pandas")
+sns = lazy_import("seaborn")
 
 
 def plot_flux_distribution(
@@ -25,6 +37,7 @@ def plot_flux_distribution(
         fva (DataFrame, optional): DataFrame with flux variability analysis results. Defaults to None.
         figsize_per_plot (tuple, optional): Size of each individual plot. Defaults to (10, 6).
     """
+    import matplotlib.pyplot as plt
 
     n_reactions = len(reaction_ids)
     n_rows = (n_reactions + 1) // n_colums
@@ -81,78 +94,445 @@ def plot_flux_distribution(
     plt.show()
 
 
-def rename_rxn_ids_for_escher(fluxes: Series, reaction_mapping: dict):
+def compute_flux_densities(
+    sample: DataFrame,
+    reaction_ids: list = None,
+    grid_size: int = 200,
+    bandwidth_adjust: float = 1.0,
+    cut: float = 3.0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Estimate flux densities of many reactions at once.
+
+    Gaussian kernel density estimates, with Scott's rule bandwidth as in
+    seaborn's kdeplot, are computed for all reactions together: samples are
+    linearly binned onto each reaction's grid and convolved with the kernel
+    through FFTs over the whole sample matrix.
+
+    Args:
+        sample (DataFrame): DataFrame with sampled flux distributions.
+        reaction_ids (list, optional): reactions to evaluate. Defaults to None
+            (all columns).
+        grid_size (int, optional): number of grid points. Defaults to 200.
+        bandwidth_adjust (float, optional): bandwidth scaling factor.
+            Defaults to 1.0.
+        cut (float, optional): grid extends this many bandwidths beyond the
+            extreme samples. Defaults to 3.0.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: grids and densities, with one row per
+            reaction. Densities of reactions with constant flux are NaN.
+    """
+    if reaction_ids is None:
+        reaction_ids = list(sample.columns)
+    values = sample[reaction_ids].to_numpy(dtype=float)
+    n_samples, n_reactions = values.shape
+    bandwidths = bandwidth_adjust * values.std(axis=0, ddof=1) * n_samples ** (-1 / 5)
+    constant = ~(bandwidths > 0)
+    bandwidths[constant] = 1.0
+    lower = values.min(axis=0) - cut * bandwidths
+    upper = values.max(axis=0) + cut * bandwidths
+    steps = (upper - lower) / (grid_size - 1)
+    grids = lower[:, np.newaxis] + steps[:, np.newaxis] * np.arange(grid_size)
+
+    positions = (values - lower) / steps
+    left = np.clip(np.floor(positions).astype(int), 0, grid_size - 2)
+    right_weights = positions - left
+    offsets = np.arange(n_reactions) * grid_size
+    counts = np.bincount(
+        (left + offsets).ravel(),
+        weights=(1 - right_weights).ravel(),
+        minlength=n_reactions * grid_size,
+    ) + np.bincount(
+        (left + 1 + offsets).ravel(),
+        weights=right_weights.ravel(),
+        minlength=n_reactions * grid_size,
+    )
+    counts = counts.reshape(n_reactions, grid_size)
+
+    padded_size = 2 * grid_size
+    frequencies = np.fft.rfftfreq(padded_size)
+    kernels = np.exp(
+        -2 * (np.pi * frequencies * (bandwidths / steps)[:, np.newaxis]) ** 2
+    )
+    densities = np.fft.irfft(
+        np.fft.rfft(counts, n=padded_size, axis=1) * kernels, n=padded_size, axis=1
+    )[:, :grid_size]
+    densities = np.clip(densities, 0, None) / (n_samples * steps[:, np.newaxis])
+    densities[constant] = np.nan
+    return grids, densities
+
+
+def _draw_flux_distribution_page(
+    output_file: Path,
+    reaction_ids: list,
+    grids: np.ndarray,
+    densities: np.ndarray,
+    histograms: list[tuple[np.ndarray, np.ndarray]] = None,
+    flux_ranges: np.ndarray = None,
+    n_columns: int = 3,
+    figsize_per_plot: tuple = (4, 3),
+    dpi: int = 100,
+) -> Path:
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    n_rows = -(-len(reaction_ids) // n_columns)
+    width, height = figsize_per_plot[0] * n_columns, figsize_per_plot[1] * n_rows
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    # Fixed margins (in inches) instead of tight_layout, which costs as much
+    # as drawing the page.
+    fig.subplots_adjust(
+        left=0.8 / width,
+        right=1 - 0.2 / width,
+        bottom=0.9 / height,
+        top=1 - 0.4 / height,
+        wspace=0.35,
+        hspace=0.6,
+    )
+    axes = fig.subplots(n_rows, n_columns, squeeze=False)
+    for i, reaction_id in enumerate(reaction_ids):
+        ax = axes[i // n_columns, i % n_columns]
+        if histograms is not None:
+            heights, edges = histograms[i]
+            ax.stairs(
+                heights, edges, fill=True, color="skyblue", alpha=0.6, label="Histogram"
+            )
+        if np.isnan(densities[i]).any():
+            ax.axvline(grids[i].mean(), color="blue", label="Constant flux")
+        else:
+            ax.fill_between(
+                grids[i],
+                densities[i],
+                color="blue",
+                alpha=0.25,
+                label="Density Estimation",
+            )
+            ax.plot(grids[i], densities[i], color="blue")
+        if flux_ranges is not None:
+            ax.axvline(flux_ranges[i, 0], color="r", linestyle="--", label="Min Flux")
+            ax.axvline(flux_ranges[i, 1], color="b", linestyle="--", label="Max Flux")
+        ax.set_title(f"{reaction_id}")
+        ax.set_xlabel("mmol/gDW/h")
+        ax.set_ylabel("Density")
+    for j in range(len(reaction_ids), n_rows * n_columns):
+        fig.delaxes(axes[j // n_columns, j % n_columns])
+    handles, labels = axes[0, 0].get_legend_handles_labels()
+    fig.legend(handles, labels, loc="lower right", ncols=len(labels))
+    fig.savefig(output_file, dpi=dpi)
+    return output_file
+
+
+def _draw_flux_distribution_page_worker(args: tuple) -> Path:
+    page_args, page_kwargs = args
+    return _draw_flux_distribution_page(*page_args, **page_kwargs)
+
+
+def render_flux_distributions(
+    sample: DataFrame,
+    output_dir: Path,
+    reaction_ids: list = None,
+    histogram: bool = False,
+    fva: DataFrame = None,
+    plots_per_page: int = 12,
+    n_columns: int = 3,
+    figsize_per_plot: tuple = (4, 3),
+    file_format: str = "png",
+    dpi: int = 100,
+    processes: int = 1,
+) -> list[Path]:
+    """Plot flux distributions of many reactions into paginated figure files.
+
+    Unlike plot_flux_distribution, densities of all reactions are computed at
+    once (see compute_flux_densities) and figures are drawn without pyplot,
+    straight to files, so that it runs headless. Pages can be drawn in
+    parallel.
+
+    Args:
+        sample (DataFrame): DataFrame with sampled flux distributions.
+        output_dir (Path): directory where page files are written.
+        reaction_ids (list, optional): List of reaction IDs to plot. Defaults
+            to None (all reactions in sample).
+        histogram (bool, optional): Whether to overlay a histogram. Defaults
+            to False.
+        fva (DataFrame, optional): DataFrame with flux variability analysis
+            results. Defaults to None.
+        plots_per_page (int, optional): reactions per figure. Defaults to 12.
+        n_columns (int, optional): plots per row. Defaults to 3.
+        figsize_per_plot (tuple, optional): Size of each individual plot.
+            Defaults to (4, 3).
+        file_format (str, optional): figure file format. Defaults to "png".
+        dpi (int, optional): figure resolution. Defaults to 100.
+        processes (int, optional): number of parallel processes. Defaults to 1.
+
+    Returns:
+        list[Path]: paths to page files.
+    """
+    if reaction_ids is None:
+        reaction_ids = list(sample.columns)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    grids, densities = compute_flux_densities(sample, reaction_ids)
+    histograms = None
+    if histogram:
+        histograms = [
+            np.histogram(sample[reaction_id], bins=30, density=True)
+            for reaction_id in reaction_ids
+        ]
+    flux_ranges = None
+    if fva is not None:
+        flux_ranges = fva.loc[reaction_ids, ["minimum", "maximum"]].to_numpy()
+
+    tasks = []
+    for page, start in enumerate(range(0, len(reaction_ids), plots_per_page)):
+        page_slice = slice(start, start + plots_per_page)
+        page_args = (
+            output_dir / f"flux_distributions_{page + 1:03d}.{file_format}",
+            reaction_ids[page_slice],
+            grids[page_slice],
+            densities[page_slice],
+            histograms[page_slice] if histograms is not None else None,
+            flux_ranges[page_slice] if flux_ranges is not None else None,
+        )
+        page_kwargs = {
+            "n_columns": n_columns,
+            "figsize_per_plot": figsize_per_plot,
+            "dpi": dpi,
+        }
+        tasks.append((page_args, page_kwargs))
+
+    if processes > 1 and len(tasks) > 1:
+        with cobra.util.ProcessPool(min(processes, len(tasks))) as pool:
+            return list(pool.imap(_draw_flux_distribution_page_worker, tasks))
+    return [_draw_flux_distribution_page_worker(task) for task in tasks]
+
+
+_ESCHER_BASE_ID = re.compile(r"(.+?)_(?:c|h|m|x)")
+
+
+@lru_cache(maxsize=32)
+def _get_escher_id_groups(
+    reaction_ids: tuple, reaction_mapping: tuple
+) -> tuple[list, list[list[int]]]:
+    """Group reaction IDs that map to the same Escher reaction ID.
+
+    If a reaction is in more than one compartment, keep "c", then "m", then
+    any other. Cached for each model (reaction IDs) and mapping pair.
+
+    Returns:
+        tuple[list, list[list[int]]]: new IDs (sorted before renaming with the
+            mapping) and the positions of the reaction IDs grouped into each.
+    """
+    id_set = set(reaction_ids)
+    base_counts = Counter(
+        match.group(1)
+        for match in (
+            _ESCHER_BASE_ID.search(rxn_id)
+            for rxn_id in reaction_ids
+            if isinstance(rxn_id, str)
+        )
+        if match is not None
+    )
+    duplicated_reactions = {base for base, count in base_counts.items() if count > 1}
+    c_reactions = {base for base in duplicated_reactions if base + "_c" in id_set}
+    m_reactions = {
+        base
+        for base in duplicated_reactions
+        if base + "_m" in id_set and base not in c_reactions
+    }
+
+    def replace(rxn_id):
+        if not isinstance(rxn_id, str) or "_" not in rxn_id:
+            return rxn_id
+        base, comp = rxn_id.rsplit("_", 1)
+        if base not in base_counts:
+            return rxn_id
+        if base not in duplicated_reactions:
+            return base
+        if base in c_reactions:
+            return base if comp == "c" else rxn_id
+        if base in m_reactions:
+            return base if comp == "m" else rxn_id
+        return base
+
+    groups = {}
+    for position, rxn_id in enumerate(reaction_ids):
+        groups.setdefault(replace(rxn_id), []).append(position)
+    new_ids = sorted(groups)
+    mapping = dict(reaction_mapping)
+    return [mapping.get(rxn_id, rxn_id) for rxn_id in new_ids], [
+        groups[rxn_id] for rxn_id in new_ids
+    ]
+
+
+@lru_cache(maxsize=32)
+def get_escher_map_reaction_ids(escher_map: Path) -> frozenset:
+    """Get (cached) IDs of the reactions drawn in an Escher map.
+
+    Args:
+        escher_map (Path): path to Escher map JSON file.
+
+    Returns:
+        frozenset: reaction IDs.
+    """
+    with open(escher_map) as f:
+        map_data = json.load(f)
+    return frozenset(rxn["bigg_id"] for rxn in map_data[1]["reactions"].values())
+
+
+def rename_rxn_ids_for_escher(
+    fluxes: Series | DataFrame, reaction_mapping: dict, escher_map: Path = None
+) -> Series | DataFrame:
     """
     Rename reaction IDs to be compatible with E. coli escher map.
 
+    Reaction IDs differing only in compartment are merged, keeping the first
+    non-null value. The new IDs are computed once for each set of reaction
+    IDs and mapping, so renaming many samples or conditions is cheap.
+
     Args:
-    - fluxes (pd.Series): Input fluxes.
+    - fluxes (pd.Series | pd.DataFrame): Input fluxes, or flux samples with
+                      reactions as columns.
     - mapping (dict): Dictionary containing a subset of the entries
                       as keys and the new IDs as values.
+    - escher_map (Path, optional): Escher map JSON file. If given, only
+                      reactions in the map are kept.
 
     Returns:
-    - pd.Series: Series with renamed reaction IDs.
+    - pd.Series | pd.DataFrame: fluxes with renamed reaction IDs.
     """
-    base_ids = fluxes.index.str.extract(r"(.+?)_(?:c|h|m|x)")[0].dropna().astype(str)
-    unique_reactions = base_ids[~base_ids.duplicated(keep=False)].unique()
-    duplicated_reactions = base_ids[base_ids.duplicated(keep=False)].unique()
-    c_reactions = [r for r in duplicated_reactions if r + "_c" in fluxes.index]
-    m_reactions = [
-        r
-        for r in duplicated_reactions
-        if r + "_m" in fluxes.index and r not in c_reactions
-    ]
+    reaction_ids = fluxes.index if isinstance(fluxes, pd.Series) else fluxes.columns
+    new_ids, groups = _get_escher_id_groups(
+        tuple(reaction_ids), tuple(reaction_mapping.items())
+    )
+    if escher_map is not None:
+        map_reaction_ids = get_escher_map_reaction_ids(escher_map)
+        kept = [i for i, rxn_id in enumerate(new_ids) if rxn_id in map_reaction_ids]
+        new_ids = [new_ids[i] for i in kept]
+        groups = [groups[i] for i in kept]
 
-    # If in ore than one compartment, keep "c", then "m", then any other.
-    def custom_replace(s):
-        base, comp = s.rsplit("_", 1)
-        if base in unique_reactions:
-            return base
-        elif base in c_reactions and comp == "c":
-            return base
-        elif base in m_reactions and comp == "m":
-            return base
-        elif (
-            base in duplicated_reactions
-            and base not in c_reactions
-            and base not in m_reactions
-        ):
-            return base
-        else:
-            return s
+    values = fluxes.to_numpy()
+    if isinstance(fluxes, pd.Series):
+        values = values[np.newaxis, :]
+    new_values = values[:, [positions[0] for positions in groups]]
+    for j, positions in enumerate(groups):
+        for position in positions[1:]:
+            missing = pd.isna(new_values[:, j])
+            if not missing.any():
+                break
+            new_values[missing, j] = values[missing, position]
 
-    fluxes.index = fluxes.index.map(custom_replace)
-    fluxes = fluxes.groupby(fluxes.index).first().rename(index=reaction_mapping)
-    return fluxes
+    if isinstance(fluxes, pd.Series):
+        return pd.Series(
+            new_values[0],
+            index=pd.Index(new_ids, name=reaction_ids.name),
+            name=fluxes.name,
+        )
+    return pd.DataFrame(
+        new_values,
+        index=fluxes.index,
+        columns=pd.Index(new_ids, name=reaction_ids.name),
+    )
 
 
 def get_graph_object_from_smetana_table(
-    smetana_table: DataFrame, weight: str = None, output_graph: Path = None
+    smetana_table: DataFrame,
+    weight: str = None,
+    output_graph: Path = None,
+    reducer: str | Callable = None,
 ) -> nx.DiGraph:
     """Create a bipartite graph object from a smetana table.
 
+    The graph is built in bulk from the table columns. Duplicated edges keep
+    the weight of their last row, unless a reducer is given.
+
     Args:
         smetana_table (DataFrame): _description_
+        weight (str, optional): column with edge weights. Defaults to None.
         output_graph (Path, optional): _description_. Defaults to None.
+        reducer (str | Callable, optional): function (or name of pandas
+            aggregation, e.g. "sum" or "mean") used to aggregate the weights of
+            duplicated donor-compound-receiver rows. Requires weight.
+            Defaults to None.
 
     Returns:
         nx.DiGraph: _description_
     """
+    if reducer is not None:
+        if weight is None:
+            raise ValueError("A weight column is required to apply a reducer.")
+        smetana_table = smetana_table.groupby(
+            ["donor", "compound", "receiver"], sort=False, as_index=False
+        )[weight].agg(reducer)
+    donors = smetana_table["donor"].tolist()
+    compounds = smetana_table["compound"].tolist()
+    receivers = smetana_table["receiver"].tolist()
+    if weight is not None:
+        edge_weights = smetana_table[weight].tolist()
+    else:
+        edge_weights = [""] * len(smetana_table)
+
     B = nx.DiGraph()
-    for i, row in smetana_table.iterrows():
-        if weight is not None:
-            edge_weight = row[weight]
-        else:
-            edge_weight = ""
-        donor_id = row["donor"]
-        receiver_id = row["receiver"]
-        compound_id = row["compound"]
-        B.add_edge(donor_id, compound_id, weight=edge_weight)
-        B.add_edge(compound_id, receiver_id, weight=edge_weight)
-        B.add_node(donor_id, bipartite=0, group="genome")
-        B.add_node(receiver_id, bipartite=0, group="genome")
-        B.add_node(compound_id, bipartite=1, group="compound")
+    B.add_edges_from(
+        edge
+        for donor_id, compound_id, receiver_id, edge_weight in zip(
+            donors, compounds, receivers, edge_weights
+        )
+        for edge in (
+            (donor_id, compound_id, {"weight": edge_weight}),
+            (compound_id, receiver_id, {"weight": edge_weight}),
+        )
+    )
+    node_ids = [
+        node_id
+        for row_nodes in zip(donors, receivers, compounds)
+        for node_id in row_nodes
+    ]
+    node_partitions = dict(zip(node_ids, cycle((0, 0, 1))))
+    B.add_nodes_from(
+        (
+            node_id,
+            {"bipartite": partition, "group": "compound" if partition else "genome"},
+        )
+        for node_id, partition in node_partitions.items()
+    )
     if output_graph is not None:
-        graph_data = json_graph.cytoscape_data(B)
-        json.dump(graph_data, open(output_graph, "w"))
+        write_cytoscape_json(B, output_graph)
     return B
+
+
+def write_cytoscape_json(graph: nx.Graph, output_file: Path) -> None:
+    """Write graph in Cytoscape JSON format, one element at a time.
+
+    Produces the same document as json_graph.cytoscape_data, without building
+    it in memory.
+
+    Args:
+        graph (nx.Graph): networkx graph.
+        output_file (Path): path to output JSON file.
+    """
+    with open(output_file, "w") as f:
+        f.write('{"data": ')
+        f.write(json.dumps(list(graph.graph.items())))
+        f.write(f', "directed": {json.dumps(graph.is_directed())}')
+        f.write(f', "multigraph": {json.dumps(graph.is_multigraph())}')
+        f.write(', "elements": {"nodes": [')
+        for i, (node, attributes) in enumerate(graph.nodes.items()):
+            data = attributes.copy()
+            data["id"] = attributes.get("id") or str(node)
+            data["value"] = node
+            data["name"] = attributes.get("name") or str(node)
+            f.write(", " * (i > 0) + json.dumps({"data": data}))
+        f.write('], "edges": [')
+        if graph.is_multigraph():
+            edges = graph.edges(keys=True, data=True)
+        else:
+            edges = graph.edges(data=True)
+        for i, (source, target, *key, attributes) in enumerate(edges):
+            data = attributes.copy()
+            data["source"] = source
+            data["target"] = target
+            if key:
+                data["key"] = key[0]
+            f.write(", " * (i > 0) + json.dumps({"data": data}))
+        f.write("]}}")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module batch.py
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import cobra
+
+from phycogem.batch import curate_model, parse_steps, run_batch
+from phycogem.cache import ModelCache
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+
+class TestBatch(unittest.TestCase):
+    def test_run_and_resume_batch(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            model_dir, output_dir = tmp_dir / "models", tmp_dir / "curated"
+            model_dir.mkdir()
+            for model_id in ("model_a", "model_b"):
+                shutil.copy(model_file, model_dir / f"{model_id}.xml")
+                report = {
+                    "tests": {
+                        "test_find_duplicated_reactions": {
+                            "data": [["R01055", "R00546"]]
+                        }
+                    }
+                }
+                with open(tmp_dir / f"{model_id}.json", "w") as f:
+                    json.dump(report, f)
+            steps = [
+                (
+                    "remove_duplicated_reactions",
+                    {"memote_report": str(tmp_dir / "{model}.json")},
+                ),
+                "open_exchanges",
+            ]
+            manifest = run_batch(model_dir, steps, output_dir, processes=2)
+            self.assertEqual(list(manifest.status), ["done"] * 4)
+            self.assertTrue((output_dir / "manifest.tsv").is_file())
+            curated = cobra.io.read_sbml_model(str(output_dir / "model_a.xml"))
+            self.assertNotIn("R01055", curated.reactions)
+            self.assertTrue(all(rxn.lower_bound == -1000 for rxn in curated.exchanges))
+
+            steps.append(("set_medium", {"medium_id": "unknown", "media_db": "x"}))
+            manifest = run_batch(model_dir, steps, output_dir)
+            resumed = run_batch(model_dir, steps[:2], output_dir)
+        self.assertEqual(list(manifest.status), ["done", "done", "failed"] * 2)
+        previous = manifest[manifest["index"] < 2]
+        self.assertEqual(list(resumed.seconds), list(previous.seconds))
+
+    def test_rerun_with_unusable_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_dir = Path(tmp_dir)
+            steps = parse_steps(["open_exchanges"])
+            curate_model(model_file, steps, output_dir)
+            output_file = output_dir / f"{model_file.stem}.xml"
+            output_file.unlink()
+            checkpoints = ModelCache(output_dir / model_file.stem / "checkpoints")
+            checkpoints.put("1", "not a model")
+            records = curate_model(model_file, steps, output_dir)
+            self.assertEqual([record["status"] for record in records], ["done"])
+            self.assertTrue(output_file.is_file())
+
+    def test_unknown_step(self):
+        with self.assertRaises(ValueError):
+            parse_steps(["remove_blocked_reactions", "not_a_step"])
+
+
+if __name__ == "__main__":
+    unittest.main()
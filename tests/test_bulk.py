@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module bulk.py
+"""
+
+import unittest
+from pathlib import Path
+
+import numpy as np
+from cobra import Reaction
+from cobra.io import read_sbml_model
+
+import phycogem.bulk as bulk
+from phycogem.reconstruction import GEM
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+
+def move_reactions_one_by_one(model, allowed_compartments):
+    """Reference implementation, updating the model one metabolite at a time."""
+    reactions_to_add, reactions_to_remove = [], []
+    for reaction in model.reactions:
+        if reaction.compartments.issubset(allowed_compartments):
+            continue
+        new_metabolites = {}
+        for metabolite, stoich in reaction.metabolites.items():
+            new_met_id = metabolite.id[:-1] + "c"
+            new_metabolite = (
+                model.metabolites.get_by_id(new_met_id)
+                if new_met_id in model.metabolites
+                else metabolite.copy()
+            )
+            new_metabolite.compartment = "c"
+            new_metabolite.id = new_met_id
+            if new_met_id not in model.metabolites:
+                model.add_metabolites([new_metabolite])
+                model.remove_metabolites([metabolite])
+            new_metabolites[new_metabolite] = stoich
+        new_reaction = Reaction(
+            id=reaction.id,
+            lower_bound=reaction.lower_bound,
+            upper_bound=reaction.upper_bound,
+        )
+        new_reaction.gene_reaction_rule = reaction.gene_reaction_rule
+        new_reaction.add_metabolites(new_metabolites)
+        reactions_to_add.append(new_reaction)
+        reactions_to_remove.append(reaction)
+    model.remove_reactions(reactions_to_remove, remove_orphans=True)
+    model.add_reactions(reactions_to_add)
+
+
+def model_layout(model):
+    return (
+        [
+            (rxn.id, rxn.bounds, rxn.gene_reaction_rule, list(rxn.reaction))
+            for rxn in model.reactions
+        ],
+        [(met.id, met.compartment) for met in model.metabolites],
+        [gene.id for gene in model.genes],
+    )
+
+
+def variable_bounds(model):
+    return [(var.name, var.lb, var.ub) for var in model.variables]
+
+
+class TestBulk(unittest.TestCase):
+    def test_collapse_compartments_matches_sequential_moves(self):
+        allowed_compartments = {"c", "e", "p"}
+        expected = read_sbml_model(model_file)
+        move_reactions_one_by_one(expected, allowed_compartments)
+        gem = GEM(model_file)
+        gem.move_reactions_to_cytoplasm(allowed_compartments)
+        self.assertEqual(model_layout(gem.model), model_layout(expected))
+        self.assertTrue(
+            all(
+                rxn.compartments.issubset(allowed_compartments)
+                for rxn in gem.model.reactions
+            )
+        )
+        self.assertAlmostEqual(
+            gem.model.slim_optimize(), expected.slim_optimize(), places=6
+        )
+
+    def test_remove_reactions_matches_cobra(self):
+        expected, model = read_sbml_model(model_file), read_sbml_model(model_file)
+        reaction_ids = [rxn.id for rxn in expected.reactions[::3]]
+        expected.remove_reactions(reaction_ids, remove_orphans=True)
+        bulk.remove_reactions(
+            model, [model.reactions.get_by_id(rxn_id) for rxn_id in reaction_ids], True
+        )
+        self.assertEqual(model_layout(model), model_layout(expected))
+        self.assertEqual(
+            sorted(constraint.name for constraint in model.constraints),
+            sorted(constraint.name for constraint in expected.constraints),
+        )
+
+    def test_set_bounds_matches_cobra(self):
+        expected, model = read_sbml_model(model_file), read_sbml_model(model_file)
+        reactions = expected.reactions[::7]
+        lower_bounds = np.linspace(-20.0, 0.0, len(reactions))
+        upper_bounds = np.where(lower_bounds < -10, np.inf, 5.0)
+        for rxn, lb, ub in zip(reactions, lower_bounds, upper_bounds):
+            rxn.bounds = lb, ub
+        bulk.set_bounds(
+            model, [rxn.id for rxn in reactions], lower_bounds, upper_bounds
+        )
+        self.assertEqual(model_layout(model), model_layout(expected))
+        self.assertEqual(variable_bounds(model), variable_bounds(expected))
+        self.assertEqual(model.slim_optimize(), expected.slim_optimize())
+
+    def test_set_bounds_validates_all_bounds_first(self):
+        model = read_sbml_model(model_file)
+        rxn_a, rxn_b = model.reactions[:2]
+        bounds = variable_bounds(model)
+        with self.assertRaisesRegex(ValueError, rxn_b.id):
+            bulk.set_bounds(model, {rxn_a.id: (-5, 5), rxn_b.id: (5, -5)})
+        with self.assertRaises(KeyError):
+            bulk.set_bounds(model, [rxn_a.id, "unknown"], lower_bounds=0)
+        self.assertEqual(variable_bounds(model), bounds)
+
+    def test_set_bounds_reverted_on_context_exit(self):
+        model = read_sbml_model(model_file)
+        bounds = variable_bounds(model)
+        with model:
+            changed = bulk.set_bounds(model, model.exchanges, lower_bounds=-7)
+            self.assertTrue(changed)
+            self.assertTrue(all(rxn.lower_bound == -7 for rxn in model.exchanges))
+        self.assertEqual(variable_bounds(model), bounds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module cache.py
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+
+from phycogem.cache import ModelCache, hash_file
+from phycogem.reconstruction import GEM
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+
+class TestModelCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.cache = ModelCache(self.tmp_dir / "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_second_load_hits_cache(self):
+        gem = GEM(model_file, cache=self.cache)
+        self.assertIn(hash_file(model_file), self.cache)
+        cached_gem = GEM(model_file, cache=self.cache)
+        self.assertEqual(len(gem.model.reactions), len(cached_gem.model.reactions))
+        self.assertAlmostEqual(
+            gem.model.slim_optimize(), cached_gem.model.slim_optimize(), places=6
+        )
+
+    def test_changed_file_invalidates_entry(self):
+        model_copy = self.tmp_dir / "model.xml"
+        shutil.copy(model_file, model_copy)
+        gem = GEM(model_copy, cache=self.cache)
+        gem.model.remove_reactions([gem.model.reactions[0]])
+        gem.write(model_copy, cache=self.cache)
+        self.assertEqual(len(self.cache), 2)
+        cached_gem = GEM(model_copy, cache=self.cache)
+        self.assertEqual(len(cached_gem.model.reactions), len(gem.model.reactions))
+
+    def test_lru_eviction(self):
+        gem = GEM(model_file)
+        self.cache.put("a", gem.model)
+        os.utime(self.cache._entry_path("a"), (0, 0))
+        entry_size = self.cache.size
+        small_cache = ModelCache(self.cache.cache_dir, max_size=int(entry_size * 1.5))
+        small_cache.put("b", gem.model)
+        self.assertNotIn("a", small_cache)
+        self.assertIn("b", small_cache)
+
+    def test_incompatible_entry_is_a_miss(self):
+        # Pickle referencing a class missing in the installed packages
+        entry = self.cache._entry_path(hash_file(model_file))
+        entry.write_bytes(zlib.compress(b"cphycogem.cache\nMissingModel\n."))
+        self.assertIsNone(self.cache.get(hash_file(model_file)))
+        self.assertFalse(entry.is_file())
+        gem = GEM(model_file, cache=self.cache)
+        self.assertGreater(len(gem.model.reactions), 0)
+        self.assertIn(hash_file(model_file), self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module cli.py and import times of phycogem modules
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from phycogem.cli import main
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+# Generous wall time ceilings in seconds, so that loaded machines still pass
+# (importing cobra alone takes over a second).
+IMPORT_BUDGET = 1.0
+HELP_BUDGET = 1.0
+HEAVY_MODULES = ["cobra", "optlang", "pandas", "scipy", "matplotlib", "networkx"]
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import phycogem.batch, phycogem.cli, phycogem.interactions, phycogem.reconstruction
+import phycogem.samples, phycogem.visualization
+seconds = time.perf_counter() - start
+loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+print(json.dumps({{"seconds": seconds, "loaded": loaded}}))
+"""
+HELP_SCRIPT = f"""
+import contextlib, io, json, sys
+from phycogem.cli import main
+with contextlib.redirect_stdout(io.StringIO()) as help_text:
+    try:
+        main(["--help"])
+    except SystemExit:
+        pass
+loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+print(json.dumps({{"help": help_text.getvalue(), "loaded": loaded}}))
+"""
+
+# Packages must be loaded once even when phycogem is imported before cobra
+OBJECTIVE_SCRIPT = f"""
+import json
+from phycogem.reconstruction import GEM
+gem = GEM({str(model_file)!r})
+flux_ranges = gem.compute_flux_ranges([gem.model.reactions[0].id])
+print(json.dumps(flux_ranges.shape))
+"""
+
+
+def run_script(script: str):
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+
+class TestCLI(unittest.TestCase):
+    def test_imports_defer_heavy_dependencies(self):
+        result = run_script(IMPORT_SCRIPT)
+        self.assertEqual(result["loaded"], [])
+        self.assertLess(result["seconds"], IMPORT_BUDGET)
+
+    def test_help_is_fast(self):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-m", "phycogem.cli", "--help"],
+            capture_output=True,
+            text=True,
+        )
+        seconds = time.perf_counter() - start
+        self.assertEqual(process.returncode, 0)
+        self.assertIn("curate", process.stdout)
+        self.assertLess(seconds, HELP_BUDGET)
+
+    def test_help_defers_heavy_dependencies(self):
+        result = run_script(HELP_SCRIPT)
+        self.assertIn("curate", result["help"])
+        self.assertEqual(result["loaded"], [])
+
+    def test_deferred_imports_load_packages_once(self):
+        self.assertEqual(run_script(OBJECTIVE_SCRIPT), [1, 2])
+
+    def test_community_command(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_files = [Path(tmp_dir) / f"{name}.xml" for name in ("A", "B")]
+            for member_file in model_files:
+                shutil.copy(model_file, member_file)
+            output_file = Path(tmp_dir) / "community.xml"
+            main(["community", *map(str, model_files), "-o", str(output_file)])
+            text = output_file.read_text()
+            self.assertIn("biomass_A", text)
+            self.assertIn("biomass_B", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module community.py
+"""
+
+import unittest
+from pathlib import Path
+
+from cobra.util import create_stoichiometric_matrix
+
+from phycogem.reconstruction import GEM
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+
+class TestCommunity(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.gem = GEM(model_file)
+        cls.community = GEM.from_community({"a": cls.gem, "b": cls.gem})
+
+    def test_single_member_growth(self):
+        community = GEM.from_community({"a": self.gem}).model
+        self.assertAlmostEqual(
+            community.slim_optimize(), self.gem.model.slim_optimize(), places=6
+        )
+
+    def test_shared_extracellular_pool(self):
+        model = self.community.model
+        shared = [met for met in model.metabolites if met.compartment == "e"]
+        self.assertEqual(
+            len(shared),
+            len([met for met in self.gem.model.metabolites if met.compartment == "e"]),
+        )
+        self.assertIn("R01055_a", model.reactions)
+        self.assertIn("R01055_b", model.reactions)
+        self.assertEqual(len(model.genes), 2 * len(self.gem.model.genes))
+        rxn = model.reactions.get_by_id("R01055_a")
+        self.assertTrue(all(gene.id.endswith("_a") for gene in rxn.genes))
+
+    def test_solver_matches_stoichiometry(self):
+        model = self.community.model
+        stoichiometry = create_stoichiometric_matrix(model, array_type="dok")
+        met = model.metabolites[0]
+        i = model.metabolites.index(met)
+        coefficients = model.constraints[met.id].get_linear_coefficients(
+            [rxn.forward_variable for rxn in met.reactions]
+        )
+        for rxn in met.reactions:
+            j = model.reactions.index(rxn)
+            self.assertEqual(coefficients[rxn.forward_variable], stoichiometry[i, j])
+
+    def test_open_exchanges(self):
+        community = GEM.from_community({"a": self.gem, "b": self.gem})
+        community.open_exchanges()
+        self.assertTrue(
+            all(rxn.lower_bound == -1000 for rxn in community.model.exchanges)
+        )
+        self.assertGreater(
+            community.model.slim_optimize(), self.community.model.slim_optimize()
+        )
+
+    def test_duplicated_member_ids(self):
+        with self.assertRaises(ValueError):
+            GEM.from_community([self.gem, self.gem])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module composition.py
+"""
+
+import unittest
+
+from cobra import Metabolite
+
+from phycogem.composition import ElementMatrix
+
+
+class TestElementMatrix(unittest.TestCase):
+    def setUp(self):
+        self.metabolites = [
+            Metabolite("co2_e", formula="CO2"),
+            Metabolite("hco3_e", formula="CHO3"),
+            Metabolite("glc__D_e", formula="C6H12O6"),
+            Metabolite("nh4_e", formula="H4N"),
+            Metabolite("unknown_e"),
+        ]
+        self.elements = ElementMatrix()
+        self.elements.update(self.metabolites)
+
+    def test_classification_masks(self):
+        rows = self.elements.rows(met.id for met in self.metabolites)
+        self.assertEqual(
+            self.elements.has_formula(rows).tolist(), [True, True, True, True, False]
+        )
+        self.assertEqual(
+            self.elements.contains("C", rows).tolist(), [True, True, True, False, False]
+        )
+        self.assertEqual(
+            self.elements.is_co2(rows).tolist(), [True, False, False, False, False]
+        )
+        self.assertEqual(
+            self.elements.is_hco3(rows).tolist(), [False, True, False, False, False]
+        )
+
+    def test_update_changed_formula(self):
+        self.metabolites[4].formula = "C2H6O"
+        self.elements.update(self.metabolites)
+        rows = self.elements.rows(["unknown_e"])
+        self.assertTrue(self.elements.has_formula(rows)[0])
+        self.assertEqual(
+            self.elements.counts[rows[0], self.elements.elements.index("C")], 2
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
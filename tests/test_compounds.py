@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module compounds.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from cobra.io import load_model
+
+from phycogem.compounds import CompoundDB
+from phycogem.reconstruction import GEM
+from phycogem.reconstruction_helpers import assign_names_to_met_ids
+
+this_file_dir = Path(__file__).parent
+compounds_dir = this_file_dir.parent / "data" / "compounds"
+
+
+class TestCompoundDB(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = Path(self.tmp_dir.name) / "compounds.sqlite"
+        self.compound_db = self.build()
+
+    def tearDown(self):
+        self.compound_db.close()
+        self.tmp_dir.cleanup()
+
+    def build(self):
+        return CompoundDB.build(
+            self.db_file,
+            bigg_metabolites=compounds_dir / "BIGG_metabolites.json",
+            mnx_compounds=compounds_dir / "mnx_compounds.tsv",
+            inorganic=compounds_dir / "inorganic.txt",
+        )
+
+    def test_lookup(self):
+        table = self.compound_db.lookup(["glc__D", "unknown", "h2o", "glc__D"])
+        self.assertEqual(list(table.index), ["glc__D", "h2o"])
+        self.assertEqual(table.loc["glc__D", "name"], "D-Glucose")
+        self.assertEqual(table.loc["glc__D", "formula"], "C6H12O6")
+        self.assertEqual(table.loc["glc__D", "charge"], 0)
+        self.assertFalse(table.loc["glc__D", "inorganic"])
+        self.assertTrue(table.loc["h2o", "inorganic"])
+
+    def test_build_reuses_database(self):
+        mtime = self.db_file.stat().st_mtime_ns
+        self.assertEqual(len(self.build()), len(self.compound_db))
+        self.assertEqual(self.db_file.stat().st_mtime_ns, mtime)
+
+    def test_annotate_compounds_and_names(self):
+        gem = GEM.from_model(load_model("textbook"))
+        for met in gem.model.metabolites:
+            met.formula, met.charge = "", 99
+        gem.annotate_compounds(self.compound_db)
+        glucose = gem.model.metabolites.get_by_id("glc__D_e")
+        self.assertEqual((glucose.formula, glucose.charge), ("C6H12O6", 0))
+        self.assertEqual(
+            assign_names_to_met_ids(self.compound_db, ["EX_h2o_e", "EX_x_e"]),
+            [self.compound_db.get_names(["h2o"])["h2o"], "x"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
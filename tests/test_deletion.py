@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module deletion.py
+"""
+
+import unittest
+
+import numpy as np
+from cobra.flux_analysis import double_gene_deletion, single_gene_deletion
+from cobra.io import load_model
+
+from phycogem.deletion import CompiledGPR
+from phycogem.reconstruction import GEM
+
+
+class TestDeletion(unittest.TestCase):
+    def setUp(self):
+        self.gem = GEM.from_model(load_model("textbook"))
+
+    def test_compiled_gpr_matches_cobra(self):
+        model = self.gem.model
+        gprs = CompiledGPR.from_model(model)
+        rng = np.random.default_rng(0)
+        gene_states = rng.random((20, len(gprs.gene_ids))) > 0.2
+        active = gprs.evaluate(gene_states)
+        for k, states in enumerate(gene_states):
+            knockouts = {
+                gene_id for gene_id, state in zip(gprs.gene_ids, states) if not state
+            }
+            expected = [rxn.gpr.eval(knockouts) for rxn in model.reactions]
+            self.assertEqual(list(active[k]), expected)
+
+    def test_single_gene_deletion_matches_cobra(self):
+        growth = self.gem.single_gene_deletion()
+        expected = single_gene_deletion(self.gem.model, processes=1)
+        expected = {
+            next(iter(ids)): value for ids, value in expected[["ids", "growth"]].values
+        }
+        np.testing.assert_allclose(
+            growth.to_numpy(),
+            [expected[gene_id] for gene_id in growth.index],
+            atol=1e-9,
+        )
+
+    def test_double_gene_deletion_matches_cobra(self):
+        gene_ids = [gene.id for gene in self.gem.model.genes[:25]]
+        growth = self.gem.double_gene_deletion(gene_ids, processes=2)
+        expected = double_gene_deletion(
+            self.gem.model, gene_list1=gene_ids, processes=1
+        )
+        for ids, value in expected[["ids", "growth"]].values:
+            gene_i, gene_j = sorted(ids) * (3 - len(ids))
+            self.assertAlmostEqual(growth.loc[gene_i, gene_j], value, places=6)
+            self.assertAlmostEqual(growth.loc[gene_j, gene_i], value, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
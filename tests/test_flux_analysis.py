@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module flux_analysis.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from cobra.flux_analysis import find_blocked_reactions, flux_variability_analysis
+
+import phycogem.flux_analysis as flux_analysis
+from phycogem.reconstruction import GEM
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+
+class TestScan(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.gem = GEM(model_file)
+
+    def test_scan_matches_optimize(self):
+        ammonia = self.gem.model.reactions.get_by_id("AmmoniaEX")
+        original_bounds = ammonia.bounds
+        uptakes = np.linspace(0, -2, 5)
+        scan = self.gem.scan({"AmmoniaEX": uptakes}, reaction_ids=["BIOMASS"])
+        self.assertEqual(ammonia.bounds, original_bounds)
+        for uptake in uptakes:
+            with self.gem.model:
+                ammonia.lower_bound = uptake
+                expected = self.gem.model.optimize().fluxes["BIOMASS"]
+            self.assertAlmostEqual(scan.loc[uptake, "BIOMASS"], expected, places=6)
+
+    def test_scan_in_parallel(self):
+        grid = {"AmmoniaEX": np.linspace(0, -2, 6), "CalciumEX": np.zeros(6)}
+        serial = self.gem.scan(grid)
+        parallel = self.gem.scan(grid, processes=2)
+        np.testing.assert_allclose(
+            serial["objective"].values, parallel["objective"].values, atol=1e-6
+        )
+
+
+class TestFluxVariability(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.gem = GEM(model_file)
+        cls.reaction_ids = [rxn.id for rxn in cls.gem.model.reactions[:60]]
+        cls.expected = flux_variability_analysis(
+            cls.gem.model, cls.reaction_ids, fraction_of_optimum=0.9
+        )
+
+    def test_flux_ranges_match_cobra(self):
+        flux_ranges = self.gem.compute_flux_ranges(
+            self.reaction_ids, fraction_of_optimum=0.9, chunk_size=25, processes=2
+        )
+        np.testing.assert_allclose(
+            flux_ranges.values, self.expected.loc[self.reaction_ids].values, atol=1e-6
+        )
+
+    def test_resume_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint = Path(tmp_dir) / "fva.tsv"
+            self.gem.compute_flux_ranges(
+                self.reaction_ids[:30],
+                fraction_of_optimum=0.9,
+                chunk_size=10,
+                checkpoint=checkpoint,
+            )
+            flux_ranges = self.gem.compute_flux_ranges(
+                self.reaction_ids,
+                fraction_of_optimum=0.9,
+                chunk_size=10,
+                checkpoint=checkpoint,
+            )
+            self.assertEqual(len(open(checkpoint).readlines()), 61)
+        self.assertEqual(list(flux_ranges.index), self.reaction_ids)
+        np.testing.assert_allclose(
+            flux_ranges.values, self.expected.loc[self.reaction_ids].values, atol=1e-6
+        )
+
+    def test_checkpoint_mismatch(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint = Path(tmp_dir) / "fva.tsv"
+            self.gem.compute_flux_ranges(
+                self.reaction_ids[:10],
+                fraction_of_optimum=0.9,
+                checkpoint=checkpoint,
+            )
+            with self.assertRaises(ValueError):
+                self.gem.compute_flux_ranges(
+                    self.reaction_ids[:10],
+                    fraction_of_optimum=0.5,
+                    checkpoint=checkpoint,
+                )
+            with self.gem.model:
+                rxn = self.gem.model.reactions.get_by_id(self.reaction_ids[0])
+                rxn.bounds = (0, 1)
+                with self.assertRaises(ValueError):
+                    self.gem.compute_flux_ranges(
+                        self.reaction_ids[:10],
+                        fraction_of_optimum=0.9,
+                        checkpoint=checkpoint,
+                    )
+
+
+class TestBlockedReactions(unittest.TestCase):
+    def test_same_blocked_reactions_as_cobra(self):
+        gem = GEM(model_file)
+        expected = find_blocked_reactions(gem.model)
+        blocked = flux_analysis.find_blocked_reactions(gem.model)
+        self.assertEqual(set(blocked), set(expected))
+        dead_ends = flux_analysis.find_dead_end_reactions(gem.model)
+        self.assertTrue(dead_ends.any())
+        self.assertTrue(
+            {rxn.id for rxn, dead in zip(gem.model.reactions, dead_ends) if dead}
+            <= set(expected)
+        )
+        gem.remove_blocked_reactions()
+        self.assertEqual(flux_analysis.find_blocked_reactions(gem.model), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
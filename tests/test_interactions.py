@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module interactions.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from cobra.io import load_model, write_sbml_model
+
+from phycogem.interactions import INTERACTION_COLUMNS, screen_interactions
+from phycogem.visualization import get_graph_object_from_smetana_table
+
+
+class TestScreenInteractions(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.model_dir = Path(cls.tmp_dir.name) / "models"
+        cls.model_dir.mkdir()
+        donor = load_model("textbook")
+        write_sbml_model(donor, str(cls.model_dir / "donor.xml"))
+        receiver = load_model("textbook")
+        receiver.reactions.EX_glc__D_e.lower_bound = 0
+        write_sbml_model(receiver, str(cls.model_dir / "receiver.xml"))
+        cls.model_files = sorted(cls.model_dir.glob("*.xml"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_screen_interactions(self):
+        cache_dir = Path(self.tmp_dir.name) / "cache"
+        interactions = screen_interactions(self.model_files, cache_dir=cache_dir)
+        self.assertEqual(list(interactions.columns), INTERACTION_COLUMNS)
+        self.assertTrue((interactions.donor == "donor").all())
+        self.assertTrue((interactions.receiver == "receiver").all())
+        self.assertIn("ac_e", interactions.compound.values)
+        self.assertNotIn("glc__D_e", interactions.compound.values)
+
+        cached = screen_interactions(self.model_files, cache_dir=cache_dir)
+        self.assertTrue(cached.equals(interactions))
+        graph = get_graph_object_from_smetana_table(interactions, weight="uptake")
+        self.assertTrue(graph.has_edge("donor", "ac_e"))
+
+
+if __name__ == "__main__":
+    unittest.main()
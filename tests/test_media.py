@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module media.py
+"""
+
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from phycogem.media import MediaDB
+from phycogem.reconstruction import GEM
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+media_file = this_file_dir.parent / "data" / "marine_media" / "media_db.tsv"
+
+
+class TestMediaDB(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.media_db = MediaDB(media_file)
+        cls.gem = GEM(model_file)
+        compounds = pd.read_csv(media_file, sep="\t").compound.unique()
+        for rxn, compound in zip(list(cls.gem.model.exchanges)[:40], compounds):
+            rxn.id = f"EX_{compound}_e"
+        cls.gem.model.repair()
+
+    def test_media_are_indexed(self):
+        self.assertIn("MARINE", self.media_db)
+        self.assertEqual(self.media_db["M9"]["EX_glc__D_e"], 1000)
+        with self.assertRaises(ValueError):
+            self.media_db["unknown"]
+
+    def test_set_medium(self):
+        for medium_id in self.media_db.medium_ids:
+            self.gem.set_medium(medium_id, self.media_db)
+            medium = self.media_db.get_model_medium(self.gem.model, medium_id)
+            self.assertEqual(self.gem.model.medium, medium)
+            self.assertTrue(
+                all(
+                    rxn.lower_bound == 0
+                    for rxn in self.gem.model.reactions
+                    if rxn.id.startswith("EX_") and rxn.id not in medium
+                )
+            )
+        self.gem.set_medium("M9", media_file, energy_source=("EX_glc__D_e", 10))
+        self.assertEqual(self.gem.model.medium["EX_glc__D_e"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module profiling.py
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import phycogem.profiling as profiling
+from phycogem.batch import run_batch
+from phycogem.reconstruction import GEM
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+
+class TestProfiling(unittest.TestCase):
+    def test_profile_gem_calls(self):
+        original = GEM.open_exchanges
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            trace_file = Path(tmp_dir) / "trace.json"
+            with profiling.profile(trace_file=trace_file) as profiler:
+                gem = GEM(model_file)
+                gem.remove_duplicated_reactions([["R01055", "R00546"]])
+                gem.compute_flux_ranges(["R00546"])
+            self.assertIs(GEM.open_exchanges, original)
+
+            summary = profiler.summary()
+            self.assertEqual(summary.loc["GEM.__init__", "reactions_added"], 994)
+            self.assertGreater(summary.loc["GEM.__init__", "io_seconds"], 0)
+            self.assertEqual(
+                summary.loc["GEM.remove_duplicated_reactions", "reactions_removed"], 1
+            )
+            self.assertGreater(summary.loc["GEM.compute_flux_ranges", "lp_solves"], 0)
+            with open(trace_file) as f:
+                events = json.load(f)["traceEvents"]
+            self.assertEqual(len(events), 3)
+            self.assertTrue(all(event["ph"] == "X" for event in events))
+
+    def test_profile_batch_workers(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            model_dir = tmp_dir / "models"
+            model_dir.mkdir()
+            for model_id in ("model_a", "model_b"):
+                shutil.copy(model_file, model_dir / f"{model_id}.xml")
+            with profiling.profile(trace_dir=tmp_dir / "traces") as profiler:
+                run_batch(
+                    model_dir, ["open_exchanges"], tmp_dir / "curated", processes=2
+                )
+            summary = profiler.summary(tmp_dir / "traces")
+            self.assertEqual(summary.loc["GEM.open_exchanges", "calls"], 2)
+            self.assertEqual(summary.loc["GEM.write", "calls"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
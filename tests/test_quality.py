@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module quality.py
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from phycogem.quality import Memote, read_memote_tests, summarize_reports
+
+this_file_dir = Path(__file__).parent
+
+
+def make_report(n_reactions: int) -> dict:
+    return {
+        "meta": {"model": "model", "note": 'braces "{[" in strings'},
+        "tests": {
+            "test_reactions_presence": {
+                "title": 'Total "Reactions" \\ é',
+                "data": [f"R{i}" for i in range(n_reactions)],
+                "metric": 1.0,
+                "result": "passed",
+            },
+            "test_find_duplicated_reactions": {
+                "title": "Duplicated Reactions",
+                "data": [["R1", "R2"]],
+                "metric": 0.1,
+                "result": "failed",
+            },
+            "test_blocked_reactions": {
+                "title": "Blocked Reactions",
+                "data": {"a": [], "b": ["R3"]},
+                "metric": {"a": 0.0, "b": 0.2},
+                "result": {"a": "passed", "b": "failed"},
+            },
+        },
+        "score": {"total_score": 0.5},
+    }
+
+
+class TestMemote(unittest.TestCase):
+    def test_read_selected_tests(self):
+        report = make_report(1000)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report_file = Path(tmp_dir) / "model.json"
+            with open(report_file, "w") as f:
+                json.dump(report, f, indent=2)
+            for chunk_size in (5, 64, 2**20):
+                self.assertEqual(
+                    read_memote_tests(report_file, chunk_size=chunk_size),
+                    report["tests"],
+                )
+            self.assertEqual(
+                read_memote_tests(report_file, ["test_blocked_reactions"], 7),
+                {"test_blocked_reactions": report["tests"]["test_blocked_reactions"]},
+            )
+            memote = Memote(report_file)
+            self.assertEqual(
+                list(memote.report["tests"]), ["test_find_duplicated_reactions"]
+            )
+            self.assertEqual(memote.get_duplicated_reactions(), [["R1", "R2"]])
+
+    def test_summarize_reports(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for model, n_reactions in (("model_a", 10), ("model_b", 20)):
+                with open(Path(tmp_dir) / f"{model}.json", "w") as f:
+                    json.dump(make_report(n_reactions), f)
+            results = summarize_reports(
+                tmp_dir,
+                ["test_find_duplicated_reactions", "test_blocked_reactions"],
+                processes=2,
+            )
+        self.assertEqual(len(results), 6)
+        self.assertEqual(set(results.model), {"model_a", "model_b"})
+        blocked = results[results.test == "test_blocked_reactions"]
+        self.assertEqual(list(blocked.parameter), ["a", "b", "a", "b"])
+        self.assertEqual(list(blocked.metric), [0.0, 0.2, 0.0, 0.2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,14 +9,64 @@ import tempfile
 import unittest
 from pathlib import Path
 
+from cobra.io import load_model
+
 from phycogem.reconstruction import *
 
 this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
 
 
 class TestGEM(unittest.TestCase):
     def test_remove_shuttle_reactions(self):
-        self.assertEqual()
+        gem = GEM(model_file)
+        allowed_compartments = {"c", "e", "p"}
+        shuttle_rxn_ids = {
+            rxn.id
+            for rxn in gem.model.reactions
+            if len(rxn.compartments) > 1
+            and not rxn.compartments.issubset(allowed_compartments)
+        }
+        self.assertTrue(shuttle_rxn_ids)
+        n_reactions = len(gem.model.reactions)
+        gem.remove_shuttle_reactions(allowed_compartments)
+        self.assertEqual(len(gem.model.reactions), n_reactions - len(shuttle_rxn_ids))
+        self.assertFalse(
+            shuttle_rxn_ids.intersection(gem.model.reactions.list_attr("id"))
+        )
+
+    def test_rescale_fluxes(self):
+        gem = GEM(model_file)
+        rxn = gem.model.reactions[0]
+        rxn.bounds = (10.0, 20.0)
+        gem.stoichiometry
+        gem.rescale_fluxes(maximum_flux=10.0)
+        self.assertEqual(rxn.bounds, (0.1, 0.2))
+        self.assertEqual(gem.model.variables[rxn.id].lb, 0.1)
+        j = gem.stoichiometry.get_reaction_indices([rxn.id])[0]
+        self.assertEqual(gem.stoichiometry.lower_bounds[j], 0.1)
+
+    def test_exchange_helpers_close_forced_uptakes(self):
+        gem = GEM.from_model(load_model("textbook"))
+        glucose = gem.model.reactions.EX_glc__D_e
+        glucose.bounds = (-10.0, -1.0)
+        gem.close_exchanges()
+        self.assertEqual(glucose.bounds, (0.0, 0.0))
+
+        glucose.bounds = (-10.0, -1.0)
+        gem.open_inorganic_exchanges()
+        self.assertEqual(glucose.bounds, (0.0, 0.0))
+
+        glucose.bounds = (-10.0, -1.0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            media_db = Path(tmp_dir) / "media.tsv"
+            media_db.write_text(
+                "medium\tdescription\tcompound\tname\n"
+                "oxic\toxygen only\to2\toxygen\n"
+            )
+            gem.set_medium("oxic", media_db)
+        self.assertEqual(glucose.bounds, (0.0, 0.0))
+        self.assertEqual(gem.model.reactions.EX_o2_e.lower_bound, -1000)
 
 
 if __name__ == "__main__":
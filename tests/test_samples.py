@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module samples.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+from cobra.io import load_model, write_sbml_model
+
+from phycogem.samples import EXCHANGE_COLUMNS, grow_samples, read_taxonomy
+
+
+class TestSamples(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        tmp_dir = Path(cls.tmp_dir.name)
+        model = load_model("textbook")
+        write_sbml_model(model, str(tmp_dir / "ecoli.xml"))
+        model.reactions.PGI.knock_out()
+        write_sbml_model(model, str(tmp_dir / "pgi.xml"))
+        cls.taxonomy_file = tmp_dir / "taxonomy.csv"
+        pd.DataFrame(
+            {
+                "sample_id": ["s1", "s1", "s2", "s2", "s2"],
+                "id": ["wt", "pgi", "wt", "pgi", "rare"],
+                "abundance": [6, 4, 50, 50, 0.1],
+                "file": ["ecoli.xml", "pgi.xml", "ecoli.xml", "pgi.xml", "x.xml"],
+            }
+        ).to_csv(cls.taxonomy_file, index=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_read_taxonomy(self):
+        samples = read_taxonomy(self.taxonomy_file, cutoff=0.01)
+        self.assertEqual(list(samples), ["s1", "s2"])
+        self.assertEqual(list(samples["s2"]), ["wt", "pgi"])
+        model_file, abundance = samples["s1"]["wt"]
+        self.assertEqual(model_file, self.taxonomy_file.parent / "ecoli.xml")
+        self.assertAlmostEqual(abundance, 0.6)
+
+    def test_grow_samples(self):
+        output_file = Path(self.tmp_dir.name) / "exchanges.tsv"
+        growth = grow_samples(
+            self.taxonomy_file,
+            output_file,
+            tradeoffs=[0.5, 1.0],
+            cache_dir=Path(self.tmp_dir.name) / "cache",
+            processes=2,
+        )
+        self.assertEqual(len(growth), 2 * 2 * 2)
+        growth = growth.set_index(["community", "tradeoff", "member"])
+        s1 = growth.loc[("s1", 0.5)]
+        self.assertAlmostEqual(
+            s1["community_growth"].iloc[0],
+            0.5 * growth.loc[("s1", 1.0), "community_growth"].iloc[0],
+            places=5,
+        )
+        self.assertAlmostEqual(
+            (s1["abundance"] * s1["growth_rate"]).sum(),
+            s1["community_growth"].iloc[0],
+            places=6,
+        )
+
+        exchanges = pd.read_csv(output_file, sep="\t")
+        self.assertEqual(list(exchanges.columns), EXCHANGE_COLUMNS)
+        self.assertEqual(set(exchanges["community"]), {"s1", "s2"})
+        self.assertTrue((exchanges["donor"] != exchanges["receiver"]).all())
+        self.assertTrue((exchanges["flux"] > 0).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
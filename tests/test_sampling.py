@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module sampling.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from cobra.util import create_stoichiometric_matrix
+from scipy.linalg import null_space
+
+from phycogem.reconstruction import GEM
+from phycogem.sampling import (
+    CHRRSampler,
+    FluxSampleStore,
+    _run_chains,
+    project_to_nullspace,
+)
+from phycogem.stoichiometry import StoichiometricMatrix
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+
+class TestSampleToDisk(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.gem = GEM(model_file)
+
+    def test_streamed_samples_and_statistics(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = self.gem.sample_flux_space(
+                25,
+                output_dir=tmp_dir,
+                batch_size=10,
+                thinning=1,
+                dtype="float32",
+                seed=1,
+            )
+            self.assertEqual(len(store), 25)
+            self.assertEqual(store.samples.dtype, np.float32)
+            samples = store.to_frame()
+            np.testing.assert_allclose(
+                store.mean().values, samples.mean().values, atol=1e-3
+            )
+            np.testing.assert_allclose(
+                store.quantile([0.5], max_block_size=100).values[0],
+                samples.quantile(0.5).values,
+                atol=1e-3,
+            )
+
+    def test_resume_store(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.gem.sample_flux_space(
+                20, output_dir=tmp_dir, batch_size=10, thinning=1, seed=1
+            )
+            store = FluxSampleStore(tmp_dir)
+            samples = store.to_frame()
+            resumed_store = self.gem.sample_flux_space(
+                20, output_dir=tmp_dir, batch_size=10, thinning=1, seed=1
+            )
+            np.testing.assert_array_equal(
+                resumed_store.to_frame().values, samples.values
+            )
+            with self.assertRaises(ValueError):
+                self.gem.sample_flux_space(
+                    30, output_dir=tmp_dir, batch_size=10, thinning=1
+                )
+
+
+class TestCHRRSampler(unittest.TestCase):
+    def test_samples_are_feasible(self):
+        gem = GEM(model_file)
+        samples = gem.sample_flux_space(
+            200, n_processes=2, method="chrr", thinning=5, seed=0
+        )
+        self.assertEqual(samples.shape, (200, len(gem.model.reactions)))
+        stoichiometry = create_stoichiometric_matrix(gem.model)
+        self.assertLess(np.abs(stoichiometry @ samples.values.T).max(), 1e-6)
+        lower_bounds = np.array([rxn.lower_bound for rxn in gem.model.reactions])
+        upper_bounds = np.array([rxn.upper_bound for rxn in gem.model.reactions])
+        self.assertTrue(np.all(samples.values >= lower_bounds - 1e-9))
+        self.assertTrue(np.all(samples.values <= upper_bounds + 1e-9))
+        self.assertGreater(samples.std().max(), 0)
+
+    def test_first_batch_is_mixed(self):
+        sampler = CHRRSampler(GEM(model_file).model, thinning=10, seed=0)
+        first = sampler.sample(500)
+        for _ in range(5):
+            sampler.sample(500)
+        last = sampler.sample(500)
+        variable = last.std() > 1e-6
+        std = last.std()[variable]
+        mean_shift = (first.mean() - last.mean())[variable].abs() / std
+        self.assertLess(mean_shift.median(), 0.15)
+        self.assertGreater((first.std()[variable] / std).median(), 0.85)
+
+    def test_project_to_nullspace_matches_dense(self):
+        gem = GEM(model_file)
+        stoichiometry = StoichiometricMatrix.from_model(gem.model).matrix
+        nullspace = null_space(stoichiometry.toarray())
+        rng = np.random.default_rng(0)
+        vectors = nullspace @ rng.standard_normal((nullspace.shape[1], 5))
+        vectors += 1e-6 * rng.standard_normal(vectors.shape)
+        projected = project_to_nullspace(stoichiometry, vectors)
+        np.testing.assert_allclose(
+            projected, nullspace @ (nullspace.T @ vectors), atol=1e-8
+        )
+
+    def test_chains_skip_null_directions(self):
+        directions = np.array([[1.0, 0.0], [0.0, 1e-12]])
+        samples, points = _run_chains(
+            np.zeros((4, 2)),
+            directions,
+            -np.ones(2),
+            np.ones(2),
+            n_steps=10,
+            thinning=2,
+            rng=np.random.default_rng(0),
+            tolerance=1e-9,
+        )
+        self.assertTrue(np.isfinite(samples).all())
+        self.assertTrue((samples[..., 1] == 0).all())
+        self.assertGreater(np.abs(samples[..., 0]).max(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module stoichiometry.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from cobra.util import create_stoichiometric_matrix
+
+from phycogem.reconstruction import GEM
+from phycogem.stoichiometry import StoichiometricMatrix
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+
+class TestStoichiometricMatrix(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.gem = GEM(model_file)
+
+    def assertMatchesModel(self, stoichiometry, model):
+        rebuilt = StoichiometricMatrix.from_model(model)
+        self.assertEqual(list(stoichiometry.reaction_ids), list(rebuilt.reaction_ids))
+        self.assertEqual(
+            list(stoichiometry.metabolite_ids), list(rebuilt.metabolite_ids)
+        )
+        self.assertEqual((stoichiometry.matrix != rebuilt.matrix).nnz, 0)
+        np.testing.assert_array_equal(stoichiometry.lower_bounds, rebuilt.lower_bounds)
+        np.testing.assert_array_equal(stoichiometry.upper_bounds, rebuilt.upper_bounds)
+
+    def test_from_model(self):
+        model = self.gem.model
+        stoichiometry = StoichiometricMatrix.from_model(model)
+        expected = create_stoichiometric_matrix(model, array_type="dok").tocsr()
+        self.assertEqual((stoichiometry.matrix != expected).nnz, 0)
+        self.assertEqual(stoichiometry.shape, expected.shape)
+
+    def test_gem_updates(self):
+        gem = GEM.from_model(self.gem.model.copy())
+        stoichiometry = gem.stoichiometry
+        self.assertIs(gem.stoichiometry, stoichiometry)
+
+        model = gem.model
+        gem.remove_duplicated_reactions([[model.reactions[0].id, None]])
+        gem.add_transport_reaction(model.metabolites[0].id, model.metabolites[1].id)
+        gem.open_exchanges()
+        gem.remove_shuttle_reactions(allowed_compartments={"c", "e", "p"})
+        self.assertIs(gem.stoichiometry, stoichiometry)
+        self.assertMatchesModel(stoichiometry, model)
+
+    def test_bounds_restored_after_context(self):
+        gem = GEM.from_model(self.gem.model.copy())
+        gem.stoichiometry
+        with gem.model:
+            gem.set_bounds(gem.model.reactions[:10], lower_bounds=0, upper_bounds=1)
+            self.assertMatchesModel(gem.stoichiometry, gem.model)
+        self.assertMatchesModel(gem.stoichiometry, gem.model)
+
+    def test_save_and_load(self):
+        stoichiometry = self.gem.stoichiometry
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stoichiometry.save(tmp_dir)
+            loaded = StoichiometricMatrix.load(tmp_dir)
+            self.assertFalse(loaded.matrix.data.flags.writeable)
+            self.assertMatchesModel(loaded, self.gem.model)
+            loaded.update_bounds(self.gem.model.reactions[:1])
+            del loaded
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module universe.py
+"""
+
+import filecmp
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from phycogem.reconstruction import GEM
+
+this_file_dir = Path(__file__).parent
+model_file = this_file_dir.parent / "data" / "models" / "iSO595v7.xml"
+
+
+def model_layout(model):
+    return (
+        [
+            (rxn.id, rxn.bounds, rxn.gene_reaction_rule, rxn.reaction)
+            for rxn in model.reactions
+        ],
+        [
+            (met.id, met.compartment, met.formula, met.charge)
+            for met in model.metabolites
+        ],
+        [gene.id for gene in model.genes],
+    )
+
+
+class TestUniverse(unittest.TestCase):
+    def test_curate_universe_matches_sequential_passes(self):
+        allowed_compartments = {"c", "e", "p"}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            expected, gem = GEM(model_file), GEM(model_file)
+            # Model IDs end in "[c]", so they are kept whole as compound IDs.
+            met_ids = [met.id for met in gem.model.metabolites[::5]]
+            cpd_annotations = tmp_dir / "compounds.tsv"
+            pd.DataFrame(
+                {"formula": "C6H12O6", "charge": -1.0},
+                index=pd.Index(met_ids, name="BiGG"),
+            ).to_csv(cpd_annotations, sep="\t")
+
+            expected.remove_shuttle_reactions(allowed_compartments)
+            expected.move_reactions_to_cytoplasm(allowed_compartments)
+            expected.annotate_compounds(cpd_annotations)
+            expected.prepare_for_carveme(tmp_dir / "expected.csv")
+            gem.curate_universe(
+                cpd_annotations, tmp_dir / "universe.csv", allowed_compartments
+            )
+
+            self.assertEqual(model_layout(gem.model), model_layout(expected.model))
+            self.assertTrue(
+                filecmp.cmp(
+                    tmp_dir / "universe.csv", tmp_dir / "expected.csv", shallow=False
+                )
+            )
+            self.assertGreater(
+                sum(met.formula == "C6H12O6" for met in gem.model.metabolites), 0
+            )
+            self.assertEqual(
+                gem.stoichiometry.shape,
+                (len(gem.model.metabolites), len(gem.model.reactions)),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
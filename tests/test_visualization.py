@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for module visualization.py
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from networkx.readwrite import json_graph
+from scipy.stats import gaussian_kde
+
+from phycogem.visualization import (
+    compute_flux_densities,
+    get_graph_object_from_smetana_table,
+    rename_rxn_ids_for_escher,
+    render_flux_distributions,
+)
+
+this_file_dir = Path(__file__).parent
+
+
+class TestSmetanaGraph(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.smetana_table = pd.DataFrame(
+            {
+                "donor": ["g1", "g1", "g2", "g1"],
+                "compound": ["M_ac_e", "M_nh4_e", "M_ac_e", "M_ac_e"],
+                "receiver": ["g2", "g3", "g3", "g2"],
+                "smetana": [0.1, 0.2, 0.3, 0.4],
+            }
+        )
+
+    def test_graph_and_cytoscape_json(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_graph = Path(tmp_dir) / "graph.json"
+            graph = get_graph_object_from_smetana_table(
+                self.smetana_table, weight="smetana", output_graph=output_graph
+            )
+            with open(output_graph) as f:
+                graph_data = json.load(f)
+        self.assertEqual(list(graph.nodes), ["g1", "M_ac_e", "g2", "M_nh4_e", "g3"])
+        self.assertEqual(graph.nodes["M_ac_e"]["group"], "compound")
+        self.assertEqual(graph.nodes["g3"]["bipartite"], 0)
+        self.assertEqual(graph.edges["g1", "M_ac_e"]["weight"], 0.4)
+        self.assertEqual(
+            graph_data, json.loads(json.dumps(json_graph.cytoscape_data(graph)))
+        )
+
+    def test_aggregate_duplicated_edges(self):
+        graph = get_graph_object_from_smetana_table(
+            self.smetana_table, weight="smetana", reducer="sum"
+        )
+        self.assertAlmostEqual(graph.edges["M_ac_e", "g2"]["weight"], 0.5)
+        self.assertEqual(graph.number_of_edges(), 6)
+        with self.assertRaises(ValueError):
+            get_graph_object_from_smetana_table(self.smetana_table, reducer="sum")
+
+
+class TestEscherRenaming(unittest.TestCase):
+    def test_rename_series_and_samples(self):
+        reaction_ids = ["ACN_a_c", "ACN_a_m", "SCS_m", "PGK_m", "PGK_x", "BIOMASS"]
+        fluxes = pd.Series([1.0, 2.0, 3.0, 4.0, 5.0, 6.0], index=reaction_ids)
+        renamed = rename_rxn_ids_for_escher(fluxes, {"ACN_a": "ACONTa"})
+        self.assertEqual(
+            renamed.to_dict(),
+            {
+                "ACONTa": 1.0,
+                "ACN_a_m": 2.0,
+                "BIOMASS": 6.0,
+                "PGK": 4.0,
+                "PGK_x": 5.0,
+                "SCS": 3.0,
+            },
+        )
+        samples = pd.DataFrame([fluxes.values, fluxes.values * 2], columns=reaction_ids)
+        renamed_samples = rename_rxn_ids_for_escher(samples, {"ACN_a": "ACONTa"})
+        self.assertEqual(list(renamed_samples.columns), list(renamed.index))
+        self.assertEqual(renamed_samples.loc[1, "PGK_x"], 10.0)
+
+
+class TestFluxDistributions(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        cls.sample = pd.DataFrame(
+            {
+                "R1": rng.normal(size=500),
+                "R2": rng.gamma(2, size=500),
+                "R3": np.ones(500),
+            }
+        )
+
+    def test_densities_match_gaussian_kde(self):
+        grids, densities = compute_flux_densities(self.sample)
+        for i, reaction_id in enumerate(["R1", "R2"]):
+            expected = gaussian_kde(self.sample[reaction_id])(grids[i])
+            np.testing.assert_allclose(densities[i], expected, atol=1e-3)
+        self.assertTrue(np.isnan(densities[2]).all())
+
+    def test_render_pages(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pages = render_flux_distributions(
+                self.sample, tmp_dir, histogram=True, plots_per_page=2, processes=2
+            )
+            self.assertEqual(len(pages), 2)
+            self.assertTrue(all(page.is_file() for page in pages))
+
+
+if __name__ == "__main__":
+    unittest.main()